@@ -0,0 +1,31 @@
+import re
+import unicodedata
+from typing import List
+
+
+def normalize_words(text: str) -> List[str]:
+    """
+    Splits text into lowercase words without punctuation or accents, so that WER only counts
+    differences in the words themselves ("Hello, world!" and "hello world" match).
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"[\w']+", text)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    (substitutions + deletions + insertions) / reference words, from the word-level edit
+    distance of the normalized texts. 0.0 is a perfect transcript; it can exceed 1.0.
+    """
+    expected = normalize_words(reference)
+    actual = normalize_words(hypothesis)
+    if not expected:
+        return float(bool(actual))
+    previous = list(range(len(actual) + 1))
+    for i, word in enumerate(expected, 1):
+        current = [i]
+        for j, other in enumerate(actual, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / len(expected)
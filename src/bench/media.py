@@ -0,0 +1,77 @@
+import os
+
+# A 440 Hz tone that is on for 3 s and off for 1 s, so chunking finds quiet split points.
+TONE = "aevalsrc=exprs='0.3*sin(2*PI*440*t)*lt(mod(t,4),3)':sample_rate=44100:channel_layout=mono"
+PICTURE = "testsrc2=size=320x240:rate=25"
+# Read by ffmpeg's flite (text-to-speech) source as the fixed sample for accuracy benchmarks.
+SPEECH_TEXT = (
+    "The quick brown fox jumps over the lazy dog. "
+    "Please call Stella and ask her to bring these things with her from the store. "
+    "Six spoons of fresh snow peas, five thick slabs of blue cheese, and maybe a snack for her brother Bob. "
+    "We also need a small plastic snake and a big toy frog for the kids."
+)
+
+
+def make_media(output_dir: str, seconds: float, video: bool = True) -> str:
+    """
+    Generates a synthetic test file of the given length with ffmpeg's lavfi sources:
+    an H.264/AAC MP4 with a test pattern, or an M4A with audio only.
+    Files are reused if they already exist in output_dir.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"synthetic_{int(seconds)}s.{'mp4' if video else 'm4a'}"
+    path = os.path.join(output_dir, name)
+    if os.path.exists(path):
+        return path
+    import ffmpeg  # imported here so the CLI (which lists the benchmarks) starts without it
+
+    audio = ffmpeg.input(TONE, f='lavfi', t=seconds)
+    if video:
+        picture = ffmpeg.input(PICTURE, f='lavfi', t=seconds)
+        output = ffmpeg.output(picture, audio, f"{path}.part", format='mp4', vcodec='libx264', preset='ultrafast', acodec='aac')
+    else:
+        output = ffmpeg.output(audio, f"{path}.part", format='ipod', acodec='aac')
+
+    try:
+        output.overwrite_output().run(capture_stdout=True, capture_stderr=True)
+    except ffmpeg.Error as e:
+        print(f"Error generating synthetic media: {e.stderr.decode()}")
+        raise
+    os.replace(f"{path}.part", path)
+    return path
+
+
+def make_speech(output_dir: str) -> str:
+    """
+    Synthesizes SPEECH_TEXT as a 16 kHz mono WAV with ffmpeg's flite source, so Whisper's
+    accuracy can be measured without shipping a recording. Raises ffmpeg.Error if this
+    ffmpeg build has no flite support. The file is reused if it already exists.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "speech.wav")
+    if os.path.exists(path):
+        return path
+    import ffmpeg
+
+    speech = ffmpeg.input(f"flite=text='{SPEECH_TEXT}':voice=slt", f='lavfi')
+    ffmpeg.output(speech, f"{path}.part", format='wav', acodec='pcm_s16le', ac=1, ar=16000).overwrite_output().run(capture_stdout=True, capture_stderr=True)
+    os.replace(f"{path}.part", path)
+    return path
+
+
+def make_segments(count: int, words_per_segment: int = 12, seconds_per_segment: float = 3.0) -> list:
+    """
+    Builds a synthetic Whisper-style segment list with deterministic text.
+    Every tenth line repeats, like intros or "[Music]" markers do in real transcripts.
+    """
+    vocabulary = ("video", "model", "audio", "summary", "speech", "token", "frame", "signal", "batch", "queue", "cache", "stream")
+    segments = []
+    for i in range(count):
+        if i % 10 == 9:
+            text = "[Music]"
+        else:
+            words = [vocabulary[(i * 7 + j * 3) % len(vocabulary)] for j in range(words_per_segment)]
+            text = f"Line {i}: " + " ".join(words) + "."
+        start = i * seconds_per_segment
+        segments.append({"id": i, "start": start, "end": start + seconds_per_segment, "text": text})
+    return segments
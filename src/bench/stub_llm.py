@@ -0,0 +1,98 @@
+import asyncio
+import json
+import random
+from typing import AsyncIterator, Optional
+
+from src.core.llm import LLMClient, LLMError, LLMRateLimitError, LLMTimeoutError
+
+FAILURE_MODES = ("error", "rate_limit", "timeout", "malformed", "short")
+
+
+class StubLLMClient(LLMClient):
+    """
+    Deterministic offline LLMClient for benchmarks and tests.
+    Translation batches (prompts with an "Input JSON:" list) are answered by tagging every
+    line; anything else gets a summary built from the first words of the prompt.
+    Each request waits latency seconds (plus up to jitter), and a fraction failure_rate of
+    prompts fail in failure_mode:
+      error / rate_limit / timeout  raise the matching LLMError
+      malformed                     answer with text that is not JSON
+      short                         drop the last line of a translation batch
+    Whether a prompt fails depends only on the seed and the prompt, not on request order.
+    """
+
+    provider = "stub"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_mode: str = "error",
+        tokens_per_second: Optional[float] = None,
+        summary_words: int = 60,
+        seed: int = 0,
+        model: str = "stub",
+    ):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"failure_mode must be one of {', '.join(FAILURE_MODES)}")
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.tokens_per_second = tokens_per_second
+        self.summary_words = summary_words
+        self.seed = seed
+        self.model = model
+        self.requests = 0
+        self.failures = 0
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        rng = random.Random(f"{self.seed}:{system_prompt}:{prompt}")
+        self.requests += 1
+        await asyncio.sleep(self.latency + self.jitter * rng.random())
+        return self._answer(prompt, rng)
+
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        rng = random.Random(f"{self.seed}:{system_prompt}:{prompt}")
+        self.requests += 1
+        await asyncio.sleep(self.latency + self.jitter * rng.random())
+        answer = self._answer(prompt, rng)
+        for word in answer.split(" "):
+            if self.tokens_per_second:
+                await asyncio.sleep(1.0 / self.tokens_per_second)
+            yield word + " "
+
+    def _answer(self, prompt: str, rng: random.Random) -> str:
+        failing = rng.random() < self.failure_rate
+        if failing:
+            self.failures += 1
+            if self.failure_mode == "error":
+                raise LLMError("stub failure")
+            if self.failure_mode == "rate_limit":
+                raise LLMRateLimitError("stub rate limit", retry_after=0.0)
+            if self.failure_mode == "timeout":
+                raise LLMTimeoutError("stub timeout")
+            if self.failure_mode == "malformed":
+                return "Sorry, I cannot help with that."
+
+        lines = self._input_lines(prompt)
+        if lines is not None:
+            answer = [f"[{self.model}] {line}" for line in lines]
+            if failing and self.failure_mode == "short":
+                answer = answer[:-1]
+            return json.dumps(answer, ensure_ascii=False)
+
+        words = prompt.split()
+        return "Summary: " + " ".join(words[-self.summary_words:])
+
+    @staticmethod
+    def _input_lines(prompt: str) -> Optional[list]:
+        start = prompt.find("Input JSON:\n")
+        end = prompt.rfind("\n\nOutput JSON:")
+        if start == -1 or end == -1:
+            return None
+        try:
+            return json.loads(prompt[start + len("Input JSON:\n"):end])
+        except ValueError:
+            return None
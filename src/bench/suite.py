@@ -0,0 +1,257 @@
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.bench.media import SPEECH_TEXT, make_media, make_segments, make_speech
+from src.bench.stub_llm import StubLLMClient
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+
+class SkipBenchmark(Exception):
+    """
+    Raised by a benchmark whose tools (ffmpeg, Whisper) are not available here.
+    """
+
+
+class BenchConfig:
+    def __init__(
+        self,
+        work_dir: str = os.path.join("output", "bench"),
+        media_seconds: float = 60.0,
+        repeat: int = 3,
+        segments: int = 400,
+        llm_latency: float = 0.02,
+        llm_failure_rate: float = 0.0,
+        llm_failure_mode: str = "short",
+        sample: Optional[str] = None,
+        whisper_model: str = "tiny",
+    ):
+        self.work_dir = work_dir
+        self.media_seconds = media_seconds
+        self.repeat = repeat
+        self.segments = segments
+        self.llm_latency = llm_latency
+        self.llm_failure_rate = llm_failure_rate
+        self.llm_failure_mode = llm_failure_mode
+        # Speech sample for accuracy benchmarks, with its reference transcript in <sample>.txt.
+        self.sample = sample
+        self.whisper_model = whisper_model
+
+    def stub_client(self) -> StubLLMClient:
+        return StubLLMClient(latency=self.llm_latency, failure_rate=self.llm_failure_rate, failure_mode=self.llm_failure_mode)
+
+
+def _media(config: BenchConfig, video: bool = True) -> str:
+    try:
+        return make_media(config.work_dir, config.media_seconds, video=video)
+    except FileNotFoundError as e:
+        raise SkipBenchmark("ffmpeg not found") from e
+
+
+def _timed(config: BenchConfig, func: Callable[[], object]) -> Tuple[float, object]:
+    """
+    Runs func config.repeat times and returns (median seconds, last result).
+    """
+    timings = []
+    result = None
+    for _ in range(max(1, config.repeat)):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench_extract_audio(config: BenchConfig) -> dict:
+    from src.core.audio import AudioProcessor
+
+    media = _media(config)
+    output_path = os.path.join(config.work_dir, "extract.wav")
+    seconds, _ = _timed(config, lambda: AudioProcessor().extract_audio(media, output_path))
+    return {"seconds": seconds, "real_time_factor": seconds / config.media_seconds}
+
+
+def bench_load_audio(config: BenchConfig) -> dict:
+    from src.core.audio import AudioProcessor
+
+    media = _media(config)
+    seconds, audio = _timed(config, lambda: AudioProcessor().load_audio(media))
+    return {"seconds": seconds, "real_time_factor": seconds / config.media_seconds, "samples": int(len(audio))}
+
+
+def bench_transcribe_tiny(config: BenchConfig) -> dict:
+    try:
+        import whisper  # noqa: F401
+    except ImportError as e:
+        raise SkipBenchmark(f"Whisper not installed ({e})") from e
+    from src.core.audio import AudioProcessor
+    from src.core.transcriber import Transcriber
+
+    audio = AudioProcessor().load_audio(_media(config, video=False))
+    transcriber = Transcriber("tiny")
+    transcriber.model  # load outside the timed runs
+    seconds, result = _timed(config, lambda: transcriber.transcribe(audio))
+    return {"seconds": seconds, "real_time_factor": seconds / config.media_seconds, "segments": len(result["segments"])}
+
+
+def _speech(config: BenchConfig) -> Tuple[str, str]:
+    """
+    Returns (audio path, reference transcript): config.sample, or a synthesized sample.
+    """
+    if config.sample:
+        reference_path = os.path.splitext(config.sample)[0] + ".txt"
+        if not os.path.exists(reference_path):
+            raise SkipBenchmark(f"no reference transcript {reference_path}")
+        with open(reference_path, "r", encoding="utf-8") as f:
+            return config.sample, f.read()
+    import ffmpeg
+
+    try:
+        return make_speech(config.work_dir), SPEECH_TEXT
+    except FileNotFoundError as e:
+        raise SkipBenchmark("ffmpeg not found") from e
+    except ffmpeg.Error as e:
+        raise SkipBenchmark("ffmpeg has no flite speech synthesis; pass a sample") from e
+
+
+def bench_whisper_profiles(config: BenchConfig) -> dict:
+    """
+    Transcribes one speech sample with every Whisper profile and reports each profile's
+    real-time factor and word error rate, to pick a throughput/accuracy tradeoff.
+    "seconds" is the accurate (default) profile's time.
+    """
+    try:
+        import whisper  # noqa: F401
+    except ImportError as e:
+        raise SkipBenchmark(f"Whisper not installed ({e})") from e
+    from src.bench.accuracy import word_error_rate
+    from src.core.audio import AudioProcessor
+    from src.core.models import WHISPER_PROFILES
+    from src.core.transcriber import SAMPLE_RATE, Transcriber
+
+    path, reference = _speech(config)
+    audio = AudioProcessor().load_audio(path)
+    duration = len(audio) / SAMPLE_RATE
+    profiles = {}
+    for name, profile in WHISPER_PROFILES.items():
+        transcriber = Transcriber(config.whisper_model, profile=profile)
+        transcriber.model  # load (and quantize) outside the timed runs
+        seconds, result = _timed(config, lambda: transcriber.transcribe(audio))
+        profiles[name] = {"seconds": seconds, "real_time_factor": seconds / duration, "wer": word_error_rate(reference, result["text"])}
+    return {"seconds": profiles["accurate"]["seconds"], "audio_seconds": duration, "profiles": profiles}
+
+
+def bench_translate_segments(config: BenchConfig) -> dict:
+    from src.core.translator import Translator
+
+    segments = make_segments(config.segments)
+    client = config.stub_client()
+    # A fixed token budget keeps the batches identical between runs.
+    seconds, _ = _timed(config, lambda: Translator(client, max_concurrency=4).translate_segments(segments, "French", token_budget=800))
+    return {"seconds": seconds, "requests_per_run": client.requests / max(1, config.repeat), "segments": len(segments)}
+
+
+def bench_summarize(config: BenchConfig) -> dict:
+    from src.core.summarizer import Summarizer
+
+    segments = make_segments(config.segments * 4)
+    client = config.stub_client()
+    seconds, _ = _timed(config, lambda: Summarizer(client, chunk_tokens=3000, fan_out=4).summarize_segments(segments))
+    return {"seconds": seconds, "requests_per_run": client.requests / max(1, config.repeat)}
+
+
+def bench_save_srt(config: BenchConfig) -> dict:
+    from src.core.subtitles import save_srt
+
+    result = {"segments": make_segments(config.segments * 50)}
+    os.makedirs(config.work_dir, exist_ok=True)
+    output_path = os.path.join(config.work_dir, "bench.srt")
+    seconds, _ = _timed(config, lambda: save_srt(result, output_path))
+    return {"seconds": seconds, "segments": len(result["segments"])}
+
+
+def bench_export_formats(config: BenchConfig) -> dict:
+    from src.core.transcript import EXPORT_FORMATS, Transcript
+
+    transcript = Transcript.from_result({"segments": make_segments(config.segments * 50)})
+    os.makedirs(config.work_dir, exist_ok=True)
+    base_path = os.path.join(config.work_dir, "bench_export")
+    # A fresh copy per run, so the timestamps are formatted every time.
+    seconds, _ = _timed(config, lambda: transcript.with_texts(transcript.texts).export(base_path, EXPORT_FORMATS))
+    return {"seconds": seconds, "segments": len(transcript), "formats": len(EXPORT_FORMATS)}
+
+
+BENCHMARKS: Dict[str, Callable[[BenchConfig], dict]] = {
+    "extract_audio": bench_extract_audio,
+    "load_audio": bench_load_audio,
+    "transcribe_tiny": bench_transcribe_tiny,
+    "whisper_profiles": bench_whisper_profiles,
+    "translate_segments": bench_translate_segments,
+    "summarize": bench_summarize,
+    "save_srt": bench_save_srt,
+    "export_formats": bench_export_formats,
+}
+
+
+def run_benchmarks(config: BenchConfig, names: Optional[List[str]] = None, on_result: Optional[Callable[[str, dict], None]] = None) -> Dict[str, dict]:
+    """
+    Runs the named benchmarks (all by default) and returns {name: result}.
+    Every result has "seconds" (median of config.repeat runs) or "skipped" with the reason.
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}")
+        try:
+            results[name] = BENCHMARKS[name](config)
+        except SkipBenchmark as e:
+            results[name] = {"skipped": str(e)}
+        if on_result:
+            on_result(name, results[name])
+    return results
+
+
+def load_baseline(path: str = DEFAULT_BASELINE) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results: Dict[str, dict], path: str = DEFAULT_BASELINE):
+    """
+    Stores the timings of results as the new baseline, keeping entries for benchmarks
+    that were skipped or not run this time.
+    """
+    merged = load_baseline(path)
+    merged.update({name: result for name, result in results.items() if "seconds" in result})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+                "results": merged,
+            },
+            f,
+            indent=2,
+        )
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float]]:
+    """
+    Returns (name, baseline seconds, current seconds) for every benchmark that got slower
+    than its baseline by more than threshold (0.2 = 20%).
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("seconds")
+        current = result.get("seconds")
+        if base and current is not None and current > base * (1 + threshold):
+            regressions.append((name, base, current))
+    return regressions
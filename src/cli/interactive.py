@@ -7,9 +7,14 @@ import os
 from src.core.downloader import VideoDownloader
 from src.core.audio import AudioProcessor
 from src.core.transcriber import Transcriber
+from src.core.transcript import Transcript
 from src.core.summarizer import Summarizer
 from src.core.translator import Translator
-from src.core.llm import OllamaClient, OpenAIClient
+from src.core.llm import create_client
+from src.core.cache import ArtifactCache
+from src.core.llm_cache import CachedLLMClient, open_llm_stores
+from src.core.jobs import JobManifest
+from src.cli.render import stream_to_file
 
 console = Console()
 
@@ -68,23 +73,35 @@ def interactive_mode():
             validate=lambda result: len(result) > 0,
         ).execute()
 
+    burn_subs = False
+    if "embed_subs" in actions:
+        burn_subs = inquirer.confirm(
+            message="Burn subtitles into the picture? (re-encodes the whole video; otherwise they are added as tracks)",
+            default=False,
+        ).execute()
+
     # 4. Execute
     console.print("\n[bold green]Starting processing...[/bold green]")
 
+    cache = ArtifactCache()
+    response_cache, translation_memory = open_llm_stores()
+
     try:
         # Download
         video_path = None
         if "download" in actions:
-            with console.status("Downloading video..."):
-                downloader = VideoDownloader("output")
-                video_path = downloader.download(url)
+            # The video stream is only needed to embed subtitles.
+            audio_only = "embed_subs" not in actions
+            with console.status("Downloading audio..." if audio_only else "Downloading video..."):
+                downloader = VideoDownloader("output", cache=cache)
+                video_path = downloader.download(url, audio_only=audio_only)
             console.print(f"[green]Downloaded:[/green] {video_path}")
 
         # Audio
         audio_path = None
         if "extract_audio" in actions and video_path:
             with console.status("Extracting audio..."):
-                audio_processor = AudioProcessor()
+                audio_processor = AudioProcessor(cache=cache)
                 audio_path = audio_processor.extract_audio(video_path)
             console.print(f"[green]Audio extracted:[/green] {audio_path}")
 
@@ -93,77 +110,62 @@ def interactive_mode():
         srt_path = None
         if "transcribe" in actions and audio_path:
             with console.status(f"Transcribing (Model: {model_size})..."):
-                transcriber = Transcriber(model_size=model_size)
-                transcript_result = transcriber.transcribe(audio_path)
+                transcriber = Transcriber(model_size=model_size, cache=cache)
+                transcript_result = Transcript.from_result(transcriber.transcribe(audio_path))
 
                 base, _ = os.path.splitext(video_path)
-                srt_path = f"{base}.srt"
-                transcriber.save_srt(transcript_result, srt_path)
+                srt_path = transcript_result.export(base, ["srt"])["srt"]
             console.print(f"[green]Transcription saved:[/green] {srt_path}")
 
         # Initialize LLM
         client = None
         if ("summarize" in actions or "translate" in actions) and transcript_result:
-            if llm_provider == "openai":
-                api_key = os.getenv("OPENAI_API_KEY")
-                client = OpenAIClient(api_key=api_key, model=llm_model)
-            else:
-                client = OllamaClient(model=llm_model)
+            client = CachedLLMClient(create_client(llm_provider, llm_model), response_cache)
 
         # Translate
         translated_srt_path = None
         if "translate" in actions and client and transcript_result:
+            # One segment-level pass yields the translated subtitles, the full text and the summary input.
             with console.status(f"Translating to {target_language}..."):
-                # 1. Translate full text for summary/reference (optional but good to have)
-                prompt = f"Translate the following text to {target_language}:\n\n{transcript_result['text']}"
-                translated_text = client.generate(prompt, system_prompt=f"You are a professional translator. Translate the text to {target_language}.")
-
-                base, _ = os.path.splitext(video_path)
-                trans_path = f"{base}_{target_language}.txt"
-                with open(trans_path, "w") as f:
-                    f.write(translated_text)
-                console.print(f"[green]Translation text saved:[/green] {trans_path}")
-
-                # 2. Translate Segments for Subtitles
-                if "embed_subs" in actions:
-                    console.print("[dim]Translating subtitles segments...[/dim]")
-                    translator = Translator(client)
-                    translated_segments = translator.translate_segments(transcript_result["segments"], target_language)
-
-                    # Create a new result dict with translated segments
-                    translated_result = transcript_result.copy()
-                    translated_result["segments"] = translated_segments
-
-                    translated_srt_path = f"{base}_{target_language}.srt"
-                    # Ensure transcriber is initialized if not already (e.g., if transcribe wasn't selected)
-                    if 'transcriber' not in locals():
-                        transcriber = Transcriber(model_size="base") # Default model size if not transcribed
-                    transcriber.save_srt(translated_result, translated_srt_path)
-                    console.print(f"[green]Translated SRT saved:[/green] {translated_srt_path}")
+                # Finished batches are checkpointed, so an interrupted run resumes with the remaining lines.
+                job = JobManifest.for_url("output", url)
+                checkpoint = job.checkpoint("translate", target_language=target_language, llm_provider=llm_provider, llm_model=llm_model)
+                translator = Translator(client, memory=translation_memory, checkpoint=checkpoint)
+                transcript_result = translator.translate_transcript(transcript_result, target_language)
+
+            base, _ = os.path.splitext(video_path)
+            trans_path = f"{base}_{target_language}.txt"
+            with open(trans_path, "w", encoding="utf-8") as f:
+                f.write(transcript_result.text.strip() + "\n")
+            console.print(f"[green]Translation text saved:[/green] {trans_path}")
+            if "embed_subs" in actions:
+                translated_srt_path = f"{base}_{target_language}.srt"
+                transcript_result.write(translated_srt_path, "srt")
+                console.print(f"[green]Translated SRT saved:[/green] {translated_srt_path}")
 
         # Summarize
         if "summarize" in actions and client and transcript_result:
-            with console.status("Summarizing..."):
-                summarizer = Summarizer(client)
-                summary = summarizer.summarize(transcript_result["text"])
-
-                base, _ = os.path.splitext(video_path)
-                summary_path = f"{base}_summary.txt"
-                with open(summary_path, "w") as f:
-                    f.write(summary)
-
+            summarizer = Summarizer(client)
+            base, _ = os.path.splitext(video_path)
+            summary_path = f"{base}_summary.txt"
+            console.print("\n[bold]Summary:[/bold]")
+            stream_to_file(console, summarizer.summarize_segments_stream(transcript_result), summary_path, "Summarizing...")
             console.print(f"[green]Summary saved:[/green] {summary_path}")
-            console.print(Panel(summary, title="Summary"))
 
         # Embed Subs
         if "embed_subs" in actions and video_path:
-            # Use translated SRT if available, otherwise original
-            subs_to_embed = translated_srt_path if translated_srt_path else srt_path
+            # Soft subtitles get one track per language; burn-in uses the translation if there is one.
+            tracks = [(path, title) for path, title in ((translated_srt_path, target_language), (srt_path, "Original")) if path]
 
-            if subs_to_embed:
-                with console.status(f"Embedding subtitles ({os.path.basename(subs_to_embed)})..."):
+            if tracks:
+                with console.status(f"Embedding subtitles ({', '.join(os.path.basename(path) for path, _ in tracks)})..."):
                     audio_processor = AudioProcessor() # Reusing for embed_subtitles method
-                    output_video = audio_processor.embed_subtitles(video_path, subs_to_embed)
+                    output_video = audio_processor.embed_subtitles(
+                        video_path,
+                        [path for path, _ in tracks],
+                        titles=[title for _, title in tracks],
+                        burn_in=burn_subs,
+                    )
                 console.print(f"[green]Video with subtitles:[/green] {output_video}")
             else:
                 console.print("[yellow]No subtitles available to embed.[/yellow]")
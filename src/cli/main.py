@@ -1,34 +1,105 @@
 import typer
 import os
-from typing import Optional
+import threading
+import time
+from typing import List, Optional
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.markup import escape
+from rich.table import Table
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
-from src.core.downloader import VideoDownloader
-from src.core.audio import AudioProcessor
-from src.core.transcriber import Transcriber
-from src.core.summarizer import Summarizer
-from src.core.llm import OllamaClient, OpenAIClient
+# Modules that pull in yt-dlp, NumPy, Whisper/torch or InquirerPy are imported inside the
+# commands, right before the stage that needs them, so --help and light runs start quickly.
+from src.core.llm import DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, LLMError, create_client
+from src.core.cache import ArtifactCache, DEFAULT_CACHE_DIR
+from src.core.llm_cache import open_llm_stores
+from src.core.metrics import RunMetrics, STAGE_NAMES
+from src.core.models import resolve_profile
+from src.core.subtitles import EXPORT_FORMATS, format_timestamp
+from src.core.runner import STREAM_SEARCH_SECONDS, ProcessOptions, ProcessResult, ProcessRunner
+from src.core.daemon import DEFAULT_ENDPOINT, Daemon, DaemonClient, DaemonError, create_server
+from src.bench.stub_llm import FAILURE_MODES
+from src.bench.suite import BENCHMARKS, BenchConfig, DEFAULT_BASELINE, DEFAULT_THRESHOLD, find_regressions, load_baseline, run_benchmarks, save_baseline
+from src.cli.render import stream_to_file
 
 app = typer.Typer()
 console = Console()
 
-from src.cli.interactive import interactive_mode
+def interactive_mode():
+    from src.cli.interactive import interactive_mode as run_interactive
+
+    run_interactive()
+
+def whisper_settings(profile: str, **overrides) -> dict:
+    """
+    Checks a --whisper-profile and its overrides, exiting with an error if they are invalid.
+    Returns the overrides that were given.
+    """
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    try:
+        resolve_profile(profile, **overrides)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    return overrides
+
+@app.callback(invoke_without_command=True)
+def main(ctx: typer.Context):
+    """
+    Download, transcribe, summarize and translate videos.
+    Runs the interactive wizard when no command is given.
+    """
+    if ctx.invoked_subcommand is None:
+        interactive_mode()
 
 @app.command()
 def process(
     url: Optional[str] = typer.Argument(None, help="URL of the video to process"),
     output_dir: str = typer.Option("output", help="Directory to save outputs"),
     model_size: str = typer.Option("base", help="Whisper model size (tiny, base, small, medium, large)"),
+    whisper_profile: str = typer.Option("accurate", help="Whisper CPU profile: accurate, beam, balanced (int8) or fast (int8, greedy)"),
+    whisper_threads: Optional[int] = typer.Option(None, help="torch threads for Whisper (default: the profile's; 0 = torch's default)"),
+    beam_size: Optional[int] = typer.Option(None, help="Override the profile's beam size"),
+    best_of: Optional[int] = typer.Option(None, help="Override the profile's number of sampling candidates"),
+    temperature: Optional[str] = typer.Option(None, help="Override the profile's temperature fallback, e.g. 0 or 0,0.4,0.8"),
+    condition_on_previous_text: Optional[bool] = typer.Option(
+        None, "--condition-on-previous-text/--no-condition-on-previous-text", help="Override whether each window is prompted with the previous text"
+    ),
+    quantize: Optional[bool] = typer.Option(None, "--quantize/--no-quantize", help="Override whether Whisper runs with int8 linear layers"),
     llm_provider: str = typer.Option("ollama", help="LLM provider (ollama or openai)"),
     llm_model: str = typer.Option("llama3", help="LLM model name"),
     translate: bool = typer.Option(False, help="Translate to English using Whisper"),
     target_language: Optional[str] = typer.Option(None, help="Target language for translation (using LLM)"),
     embed_subs: bool = typer.Option(False, help="Embed subtitles into the video"),
+    burn_subs: bool = typer.Option(False, "--burn-subs", help="Burn the subtitles into the picture (re-encodes the video) instead of adding a subtitle track"),
+    encoder_preset: str = typer.Option("veryfast", help="x264 preset used by --burn-subs"),
+    encoder_threads: int = typer.Option(0, help="Encoder threads used by --burn-subs (0 = automatic)"),
+    in_memory_audio: bool = typer.Option(False, "--in-memory-audio", help="Decode audio straight into Whisper instead of writing a WAV file"),
+    parallel_workers: int = typer.Option(1, help="Whisper worker processes for chunked transcription of long audio (1 = single pass)"),
+    chunk_seconds: float = typer.Option(300.0, help="Target chunk length in seconds for parallel transcription"),
+    stream: bool = typer.Option(False, "--stream", help="Transcribe while downloading, writing subtitles window by window"),
+    window_seconds: float = typer.Option(30.0, help="Audio window length in seconds for --stream"),
+    formats: str = typer.Option("srt", help="Comma-separated transcript formats to write (srt, vtt, jsonl, txt)"),
+    summary_chunk_tokens: int = typer.Option(3000, help="Token budget per summarization request; longer transcripts are summarized in chunks"),
+    summary_fan_out: int = typer.Option(4, help="Concurrent LLM requests when summarizing in chunks"),
+    llm_timeout: float = typer.Option(DEFAULT_TIMEOUT, help="Timeout in seconds for each LLM request"),
+    llm_max_in_flight: int = typer.Option(DEFAULT_MAX_IN_FLIGHT, help="Maximum concurrent requests to the LLM provider"),
+    cache: bool = typer.Option(True, help="Reuse cached downloads, extracted audio, transcripts and LLM responses"),
+    cache_dir: str = typer.Option(DEFAULT_CACHE_DIR, help="Directory for the artifact cache"),
+    cache_max_size: float = typer.Option(20.0, help="Maximum artifact cache size in GB"),
+    metrics_file: Optional[str] = typer.Option(None, help="Where to write the JSON run report (default: <video>_metrics.json)"),
+    prometheus_file: Optional[str] = typer.Option(None, help="Also write the run metrics in Prometheus text format to this file"),
+    profile: Optional[str] = typer.Option(None, help=f"Run one stage under cProfile ({', '.join(STAGE_NAMES)})"),
+    resume: bool = typer.Option(True, "--resume/--restart", help="Skip stages an earlier run of this URL already completed; --restart starts over"),
+    search_index: bool = typer.Option(True, "--index/--no-index", help="Add finished transcripts to the search index (see `search`)"),
+    daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Hand the job to a running daemon (see `daemon`) instead of processing it here"),
+    daemon_endpoint: str = typer.Option(DEFAULT_ENDPOINT, help="Daemon address (unix:/path.sock or http://host:port)"),
+    priority: int = typer.Option(0, help="Queue priority when running through the daemon (higher runs first)"),
 ):
     """
     Process a video: Download -> Transcribe -> Summarize -> Translate (optional).
     If no URL is provided, enters interactive mode.
+    When a daemon is running, the job is submitted to it and this command only reports progress.
     """
     if url is None:
         interactive_mode()
@@ -36,81 +107,674 @@ def process(
 
     console.print(f"[bold green]Processing video:[/bold green] {url}")
 
-    # 1. Download
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-        progress.add_task(description="Downloading video...", total=None)
-        downloader = VideoDownloader(output_dir)
-        video_path = downloader.download(url)
-    console.print(f"[green]Downloaded:[/green] {video_path}")
-
-    # 2. Extract Audio
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-        progress.add_task(description="Extracting audio...", total=None)
-        audio_processor = AudioProcessor()
-        audio_path = audio_processor.extract_audio(video_path)
-    console.print(f"[green]Audio extracted:[/green] {audio_path}")
-
-    # 3. Transcribe/Translate (Whisper)
-    # If target_language is set, we just transcribe first (unless it's English, but let's keep it simple).
-    # If translate flag is set (and no target_language), we use Whisper's translate (to English).
-    whisper_task = "translate" if translate and not target_language else "transcribe"
-
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-        progress.add_task(description=f"{whisper_task.capitalize().rstrip('e')}ing audio (Whisper)...", total=None)
-        transcriber = Transcriber(model_size=model_size)
-        result = transcriber.transcribe(audio_path, task=whisper_task)
-
-        # Save SRT
-        base, _ = os.path.splitext(video_path)
-        srt_path = f"{base}.srt"
-        transcriber.save_srt(result, srt_path)
-    console.print(f"[green]Transcription saved:[/green] {srt_path}")
-
-    # Initialize LLM Client
-    if llm_provider == "openai":
-        api_key = os.getenv("OPENAI_API_KEY")
-        llm_client = OpenAIClient(api_key=api_key, model=llm_model)
-    else:
-        llm_client = OllamaClient(model=llm_model)
-
-    # 4. LLM Translation (if requested)
-    transcript_text = result["text"]
-
-    if target_language:
-        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-            progress.add_task(description=f"Translating to {target_language}...", total=None)
-            # We need a Translator class or just do it inline for now.
-            # Let's do it inline to fix the build first, then refactor.
-            prompt = f"Translate the following text to {target_language}:\n\n{transcript_text}"
-            translated_text = llm_client.generate(prompt, system_prompt=f"You are a professional translator. Translate the text to {target_language}.")
-
-            # Update transcript text for summarization
-            transcript_text = translated_text
-
-            # Save translated text
-            trans_path = f"{base}_{target_language}.txt"
-            with open(trans_path, "w") as f:
-                f.write(translated_text)
-        console.print(f"[green]Translation saved:[/green] {trans_path}")
-
-    # 5. Summarize
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-        progress.add_task(description="Summarizing transcript...", total=None)
-        summarizer = Summarizer(llm_client)
-        summary = summarizer.summarize(transcript_text)
-
-        summary_path = f"{base}_summary.txt"
-        with open(summary_path, "w") as f:
-            f.write(summary)
-    console.print(f"[green]Summary saved:[/green] {summary_path}")
-    console.print(f"\n[bold]Summary:[/bold]\n{summary}\n")
-
-    # 5. Embed Subtitles
-    if embed_subs:
-        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-            progress.add_task(description="Embedding subtitles...", total=None)
-            output_video_path = audio_processor.embed_subtitles(video_path, srt_path)
-        console.print(f"[green]Video with subtitles saved:[/green] {output_video_path}")
+    if profile and profile not in STAGE_NAMES:
+        console.print(f"[bold red]Error:[/bold red] --profile must be one of: {', '.join(STAGE_NAMES)}")
+        raise typer.Exit(code=1)
+    if profile == "transcribe" and parallel_workers > 1:
+        console.print("[bold red]Error:[/bold red] --profile transcribe needs --parallel-workers 1; cProfile cannot see worker processes")
+        raise typer.Exit(code=1)
+
+    if stream and window_seconds <= STREAM_SEARCH_SECONDS:
+        console.print(f"[bold red]Error:[/bold red] --window-seconds must be longer than {STREAM_SEARCH_SECONDS:g} seconds")
+        raise typer.Exit(code=1)
+
+    export_formats = [fmt.strip().lower() for fmt in formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in export_formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        console.print(f"[bold red]Error:[/bold red] Unknown format(s) {', '.join(unknown)}; choose from {', '.join(EXPORT_FORMATS)}")
+        raise typer.Exit(code=1)
+    whisper_options = whisper_settings(
+        whisper_profile,
+        threads=whisper_threads,
+        beam_size=beam_size,
+        best_of=best_of,
+        temperature=temperature,
+        condition_on_previous_text=condition_on_previous_text,
+        quantize=quantize,
+    )
+
+    options = ProcessOptions(
+        url=url,
+        output_dir=output_dir,
+        model_size=model_size,
+        whisper_profile=whisper_profile,
+        whisper_options=whisper_options,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        translate=translate,
+        target_language=target_language,
+        embed_subs=embed_subs,
+        burn_subs=burn_subs,
+        encoder_preset=encoder_preset,
+        encoder_threads=encoder_threads,
+        in_memory_audio=in_memory_audio,
+        parallel_workers=parallel_workers,
+        chunk_seconds=chunk_seconds,
+        stream=stream,
+        window_seconds=window_seconds,
+        formats=export_formats,
+        summary_chunk_tokens=summary_chunk_tokens,
+        summary_fan_out=summary_fan_out,
+        llm_timeout=llm_timeout,
+        llm_max_in_flight=llm_max_in_flight,
+        cache=cache,
+        cache_dir=cache_dir,
+        cache_max_size=cache_max_size,
+        resume=resume,
+        search_index=search_index,
+        metrics_file=metrics_file,
+        prometheus_file=prometheus_file,
+        profile=profile,
+    )
+    if daemon:
+        client = DaemonClient(daemon_endpoint)
+        if client.available():
+            process_with_daemon(client, options, priority)
+            return
+
+    descriptions = {
+        "download": "Downloading video..." if embed_subs else "Downloading audio...",
+        "extract": "Extracting audio...",
+        "transcribe": "Downloading and transcribing..." if stream else f"{options.whisper_task.capitalize().rstrip('e')}ing audio (Whisper)...",
+        "translate": f"Translating subtitles to {target_language}...",
+        "embed": "Embedding subtitles...",
+    }
+    spinner = {}
+
+    def on_stage(stage: str, status: str, result: ProcessResult):
+        if status == "started":
+            if stage in descriptions:
+                progress = Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True, console=console)
+                progress.add_task(description=descriptions[stage], total=None)
+                progress.start()
+                spinner[stage] = progress
+            elif stage == "summarize":
+                console.print("\n[bold]Summary:[/bold]")
+            return
+        if stage in spinner:
+            spinner.pop(stage).stop()
+        if status == "resumed":
+            console.print(f"[dim]Resuming: {stage} already done[/dim]")
+        print_stage_output(stage, result.to_dict())
+
+    def on_segments(segments: List[dict]):
+        for segment in segments:
+            console.print(f"[dim]{format_timestamp(segment['start'])}[/dim] {segment['text'].strip()}")
+
+    runner = ProcessRunner(
+        options,
+        on_stage=on_stage,
+        on_segments=on_segments,
+        render=lambda llm_stream, path, description: stream_to_file(console, llm_stream, path, description),
+    )
+    try:
+        result = runner.run()
+    except LLMError as e:
+        label = "Translation" if runner.current_stage == "translate" else "Summarization"
+        console.print(f"[bold red]{label} failed:[/bold red] {e}")
+        if runner.metrics_path:
+            console.print(f"[yellow]Metrics of the failed run saved:[/yellow] {runner.metrics_path}")
+        raise typer.Exit(code=1)
+    finally:
+        for progress in spinner.values():
+            progress.stop()
+
+    if runner.response_cache is not None:
+        stats = runner.response_cache.stats()
+        console.print(f"[dim]LLM response cache: {stats['hits']} hits, {stats['misses']} misses[/dim]")
+
+    # Run report
+    print_metrics(runner.metrics)
+    console.print(f"[green]Metrics saved:[/green] {result.metrics_path}")
+    for stage in runner.metrics.stages:
+        if stage.profile_path:
+            console.print(f"[green]Profile of {stage.name} saved:[/green] {stage.profile_path} (view with: python -m pstats {stage.profile_path})")
+
+STAGE_OUTPUTS = {
+    "download": ("video_path", "Downloaded"),
+    "extract": ("audio_path", "Audio extracted"),
+    "transcribe": ("srt_path", "Transcription saved"),
+    "translate": ("translation_path", "Translation saved"),
+    "summarize": ("summary_path", "Summary saved"),
+    "embed": ("output_video_path", "Video with subtitles saved"),
+}
+
+def print_stage_output(stage: str, result: dict):
+    key, label = STAGE_OUTPUTS[stage]
+    if stage == "transcribe" and len(result.get("subtitle_paths") or {}) > 1:
+        console.print(f"[green]{label}:[/green] {', '.join(result['subtitle_paths'].values())}")
+        return
+    if stage == "translate":
+        console.print(f"[green]{label}:[/green] {result.get(key)}, {result.get('translated_srt_path')}")
+        return
+    console.print(f"[green]{label}:[/green] {result.get(key)}")
+
+def process_with_daemon(client: DaemonClient, options: ProcessOptions, priority: int):
+    """
+    Submits the job to the daemon and follows it until it finishes.
+    Paths are made absolute because the daemon may run in another directory.
+    """
+    params = dict(options.__dict__)
+    for name in ("output_dir", "cache_dir", "metrics_file", "prometheus_file"):
+        if params[name]:
+            params[name] = os.path.abspath(params[name])
+    try:
+        job = client.submit(params, priority=priority)
+        console.print(f"[dim]Submitted to daemon at {client.endpoint} as job {job['id']}[/dim]")
+        reported = set()
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True, console=console) as progress:
+            task = progress.add_task(description="Queued...", total=None)
+            while job["status"] in ("queued", "running"):
+                time.sleep(0.5)
+                job = client.job(job["id"])
+                for stage in job["completed_stages"]:
+                    if stage not in reported:
+                        reported.add(stage)
+                        key, label = STAGE_OUTPUTS[stage]
+                        progress.console.print(f"[green]{label}:[/green] {job['result'][key]}")
+                if job["status"] == "running":
+                    progress.update(task, description=f"Running: {job['stage'] or 'starting'}...")
+    except DaemonError as e:
+        console.print(f"[bold red]Daemon error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+    if job["status"] != "done":
+        console.print(f"[bold red]Job {job['status']}:[/bold red] {job['error'] or ''}")
+        raise typer.Exit(code=1)
+    with open(job["result"]["summary_path"], "r") as f:
+        console.print("\n[bold]Summary:[/bold]")
+        console.print(f.read())
+    console.print(f"[green]Metrics saved:[/green] {job['result']['metrics_path']}")
+
+def print_metrics(metrics: RunMetrics):
+    """
+    Prints a table of the per-stage measurements of a run.
+    """
+    table = Table(title="Run metrics")
+    for column in ("Stage", "Wall", "CPU", "Peak RSS", "Throughput"):
+        table.add_column(column, justify="left" if column in ("Stage", "Throughput") else "right")
+    for stage in metrics.stages:
+        rates = stage.throughput()
+        details = []
+        if stage.counters.get("first_segment_seconds"):
+            details.append(f"first subtitle after {stage.counters['first_segment_seconds']:.1f}s")
+        if "bytes_per_second" in rates:
+            details.append(f"{rates['bytes_per_second'] / 1024 ** 2:.1f} MB/s")
+        if "real_time_factor" in rates:
+            details.append(f"RTF {rates['real_time_factor']:.2f}")
+        if "requests" in stage.counters:
+            details.append(f"{stage.counters['requests']} requests, {rates.get('tokens_per_second', 0.0):.1f} tokens/s")
+        table.add_row(
+            stage.name,
+            f"{stage.wall_seconds:.2f}s",
+            f"{stage.cpu_seconds:.2f}s",
+            f"{stage.peak_rss_bytes / 1024 ** 2:.0f} MB",
+            ", ".join(details),
+        )
+    console.print(table)
+
+@app.command()
+def batch(
+    urls: Optional[List[str]] = typer.Argument(None, help="URLs of the videos to process"),
+    urls_file: Optional[str] = typer.Option(None, "--file", "-f", help="File with one URL per line"),
+    output_dir: str = typer.Option("output", help="Directory to save outputs"),
+    model_size: str = typer.Option("base", help="Whisper model size (tiny, base, small, medium, large)"),
+    whisper_profile: str = typer.Option("accurate", help="Whisper CPU profile: accurate, beam, balanced (int8) or fast (int8, greedy)"),
+    whisper_threads: Optional[int] = typer.Option(None, help="torch threads for Whisper (default: the profile's; 0 = torch's default)"),
+    beam_size: Optional[int] = typer.Option(None, help="Override the profile's beam size"),
+    best_of: Optional[int] = typer.Option(None, help="Override the profile's number of sampling candidates"),
+    temperature: Optional[str] = typer.Option(None, help="Override the profile's temperature fallback, e.g. 0 or 0,0.4,0.8"),
+    condition_on_previous_text: Optional[bool] = typer.Option(
+        None, "--condition-on-previous-text/--no-condition-on-previous-text", help="Override whether each window is prompted with the previous text"
+    ),
+    quantize: Optional[bool] = typer.Option(None, "--quantize/--no-quantize", help="Override whether Whisper runs with int8 linear layers"),
+    llm_provider: str = typer.Option("ollama", help="LLM provider (ollama or openai)"),
+    llm_model: str = typer.Option("llama3", help="LLM model name"),
+    translate: bool = typer.Option(False, help="Translate to English using Whisper"),
+    target_language: Optional[str] = typer.Option(None, help="Target language for translation (using LLM)"),
+    download_workers: int = typer.Option(2, help="Concurrent downloads"),
+    extract_workers: int = typer.Option(2, help="Concurrent ffmpeg audio extractions"),
+    transcribe_workers: int = typer.Option(1, help="Whisper worker processes"),
+    llm_workers: int = typer.Option(2, help="Concurrent LLM translate/summarize jobs"),
+    queue_size: int = typer.Option(2, help="Maximum videos waiting between two stages"),
+    summary_chunk_tokens: int = typer.Option(3000, help="Token budget per summarization request; longer transcripts are summarized in chunks"),
+    summary_fan_out: int = typer.Option(4, help="Concurrent LLM requests when summarizing in chunks"),
+    llm_timeout: float = typer.Option(DEFAULT_TIMEOUT, help="Timeout in seconds for each LLM request"),
+    llm_max_in_flight: int = typer.Option(DEFAULT_MAX_IN_FLIGHT, help="Maximum concurrent requests to the LLM provider"),
+    in_memory_audio: bool = typer.Option(False, "--in-memory-audio", help="Decode audio straight into Whisper instead of writing a WAV file"),
+    audio_only: bool = typer.Option(True, "--audio-only/--keep-video", help="Download only the audio stream; --keep-video also fetches and keeps the video"),
+    resume: bool = typer.Option(True, "--resume/--restart", help="Skip stages an earlier run already completed for each URL; --restart starts over"),
+    search_index: bool = typer.Option(True, "--index/--no-index", help="Add finished transcripts to the search index (see `search`)"),
+    cache: bool = typer.Option(True, help="Reuse cached downloads, extracted audio, transcripts and LLM responses"),
+    cache_dir: str = typer.Option(DEFAULT_CACHE_DIR, help="Directory for the artifact cache"),
+    cache_max_size: float = typer.Option(20.0, help="Maximum artifact cache size in GB"),
+):
+    """
+    Process several videos as an overlapping pipeline.
+    Downloads, audio extraction, Whisper and the LLM steps for different videos run at the same time.
+    """
+    all_urls = list(urls or [])
+    if urls_file:
+        with open(urls_file, "r") as f:
+            all_urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not all_urls:
+        console.print("[bold red]Error:[/bold red] No URLs given.")
+        raise typer.Exit(code=1)
+    whisper_options = whisper_settings(
+        whisper_profile,
+        threads=whisper_threads,
+        beam_size=beam_size,
+        best_of=best_of,
+        temperature=temperature,
+        condition_on_previous_text=condition_on_previous_text,
+        quantize=quantize,
+    )
+
+    items = run_batch(
+        all_urls,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        llm_timeout=llm_timeout,
+        llm_max_in_flight=llm_max_in_flight,
+        cache=cache,
+        cache_dir=cache_dir,
+        cache_max_size=cache_max_size,
+        output_dir=output_dir,
+        model_size=model_size,
+        whisper_profile=resolve_profile(whisper_profile, **whisper_options),
+        task="translate" if translate and not target_language else "transcribe",
+        target_language=target_language,
+        download_workers=download_workers,
+        extract_workers=extract_workers,
+        transcribe_workers=transcribe_workers,
+        llm_workers=llm_workers,
+        queue_size=queue_size,
+        summary_chunk_tokens=summary_chunk_tokens,
+        summary_fan_out=summary_fan_out,
+        in_memory_audio=in_memory_audio,
+        audio_only=audio_only,
+        resume=resume,
+        search_index=search_index,
+    )
+
+    failed = [item for item in items if item.error]
+    for item in items:
+        if item.error:
+            console.print(f"[red]Failed ({item.failed_stage}):[/red] {item.url}")
+        else:
+            console.print(f"[green]Done:[/green] {item.url} -> {item.summary_path}")
+    if failed:
+        raise typer.Exit(code=1)
+
+@app.command()
+def sync(
+    source: str = typer.Argument(..., help="URL of the playlist or channel to sync"),
+    output_dir: str = typer.Option("output", help="Directory to save outputs"),
+    model_size: str = typer.Option("base", help="Whisper model size (tiny, base, small, medium, large)"),
+    whisper_profile: str = typer.Option("accurate", help="Whisper CPU profile: accurate, beam, balanced (int8) or fast (int8, greedy)"),
+    whisper_threads: Optional[int] = typer.Option(None, help="torch threads for Whisper (default: the profile's; 0 = torch's default)"),
+    beam_size: Optional[int] = typer.Option(None, help="Override the profile's beam size"),
+    best_of: Optional[int] = typer.Option(None, help="Override the profile's number of sampling candidates"),
+    temperature: Optional[str] = typer.Option(None, help="Override the profile's temperature fallback, e.g. 0 or 0,0.4,0.8"),
+    condition_on_previous_text: Optional[bool] = typer.Option(
+        None, "--condition-on-previous-text/--no-condition-on-previous-text", help="Override whether each window is prompted with the previous text"
+    ),
+    quantize: Optional[bool] = typer.Option(None, "--quantize/--no-quantize", help="Override whether Whisper runs with int8 linear layers"),
+    llm_provider: str = typer.Option("ollama", help="LLM provider (ollama or openai)"),
+    llm_model: str = typer.Option("llama3", help="LLM model name"),
+    translate: bool = typer.Option(False, help="Translate to English using Whisper"),
+    target_language: Optional[str] = typer.Option(None, help="Target language for translation (using LLM)"),
+    download_workers: int = typer.Option(2, help="Concurrent downloads"),
+    transcribe_workers: int = typer.Option(1, help="Whisper worker processes"),
+    llm_workers: int = typer.Option(2, help="Concurrent LLM translate/summarize jobs"),
+    metadata_workers: int = typer.Option(4, help="Concurrent metadata requests for new videos"),
+    stop_after_known: int = typer.Option(20, help="Stop reading the listing after this many already-processed videos in a row (0: read all of it)"),
+    limit: Optional[int] = typer.Option(None, help="Process at most this many videos; the rest are picked up by the next sync"),
+    index_file: Optional[str] = typer.Option(None, help="Index of processed videos (default: <output-dir>/.sync.sqlite)"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only list the videos that would be processed"),
+    search_index: bool = typer.Option(True, "--index/--no-index", help="Add finished transcripts to the search index (see `search`)"),
+    cache: bool = typer.Option(True, help="Reuse cached downloads, extracted audio, transcripts and LLM responses"),
+    cache_dir: str = typer.Option(DEFAULT_CACHE_DIR, help="Directory for the artifact cache"),
+    cache_max_size: float = typer.Option(20.0, help="Maximum artifact cache size in GB"),
+):
+    """
+    Process the videos of a playlist or channel that earlier syncs have not processed yet.
+    The listing is compared with an index of processed video IDs, so a rerun only fetches
+    metadata for, and processes, new (or changed) uploads.
+    """
+    from src.core.downloader import VideoDownloader
+    from src.core.sync import ChannelSync, SyncIndex, default_index_path, forget_run
+
+    whisper_options = whisper_settings(
+        whisper_profile,
+        threads=whisper_threads,
+        beam_size=beam_size,
+        best_of=best_of,
+        temperature=temperature,
+        condition_on_previous_text=condition_on_previous_text,
+        quantize=quantize,
+    )
+    index = SyncIndex(index_file or default_index_path(output_dir))
+    with console.status("Listing videos...") as status:
+        def on_progress(phase: str, count: int):
+            status.update(f"Listed {count} videos..." if phase == "list" else f"Fetched metadata for {count} candidates...")
+
+        syncer = ChannelSync(VideoDownloader(output_dir), index, metadata_workers=metadata_workers, stop_after_known=stop_after_known, on_progress=on_progress)
+        plan = syncer.plan(source, limit=limit)
+
+    scope = "stopped at known videos" if plan.stopped_early else "full listing"
+    console.print(f"Scanned {plan.scanned} videos ({scope}): {len(plan.new)} new, {len(plan.changed)} changed, {index.count(source)} already processed")
+    for video_id, reason in plan.skipped.items():
+        console.print(f"[yellow]Skipped {video_id}:[/yellow] {reason}")
+    if dry_run or not plan.entries:
+        for entry in plan.entries:
+            console.print(f"{'changed' if entry.changed else 'new'}: {entry.title} ({entry.url})")
+        return
+
+    artifact_cache = ArtifactCache(cache_dir, max_size=int(cache_max_size * 1024 ** 3)) if cache else None
+    for entry in plan.changed:
+        forget_run(output_dir, entry.url, artifact_cache)
+
+    items = run_batch(
+        [entry.url for entry in plan.entries],
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        cache=cache,
+        cache_dir=cache_dir,
+        artifact_cache=artifact_cache,
+        output_dir=output_dir,
+        model_size=model_size,
+        whisper_profile=resolve_profile(whisper_profile, **whisper_options),
+        task="translate" if translate and not target_language else "transcribe",
+        target_language=target_language,
+        download_workers=download_workers,
+        transcribe_workers=transcribe_workers,
+        llm_workers=llm_workers,
+        search_index=search_index,
+    )
+    succeeded = [entry for entry, item in zip(plan.entries, items) if not item.error]
+    index.mark_processed(source, succeeded)
+    for item in items:
+        if item.error:
+            console.print(f"[red]Failed ({item.failed_stage}):[/red] {item.url}")
+        else:
+            console.print(f"[green]Done:[/green] {item.url} -> {item.summary_path}")
+    if len(succeeded) < len(items):
+        raise typer.Exit(code=1)
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Words to find (all must appear in a segment)"),
+    output_dir: str = typer.Option("output", help="Directory whose transcripts are indexed"),
+    index_file: Optional[str] = typer.Option(None, help="Search index (default: <output-dir>/.search.sqlite)"),
+    limit: int = typer.Option(20, help="Maximum number of hits"),
+    language: Optional[str] = typer.Option(None, help="Only search transcripts in this language"),
+    raw: bool = typer.Option(False, "--raw", help="Pass the query to SQLite FTS5 as is (phrases, OR, NEAR, prefix*)"),
+    as_json: bool = typer.Option(False, "--json", help="Print one JSON object per hit"),
+):
+    """
+    Find where something was said across all indexed transcripts.
+    Hits are ranked by relevance and carry start/end times in milliseconds.
+    """
+    import json
+    import sqlite3
+
+    from src.core.search import SearchIndex, default_index_path
+
+    index = SearchIndex(index_file or default_index_path(output_dir))
+    try:
+        # In the table, control characters mark the matches so brackets in the text cannot be mistaken for them.
+        hits = index.search(query, limit=limit, language=language, raw=raw, marks=("[", "]") if as_json else ("\x02", "\x03"))
+    except sqlite3.OperationalError as e:
+        console.print(f"[bold red]Invalid query:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    if as_json:
+        for hit in hits:
+            print(json.dumps(hit.to_dict(), ensure_ascii=False))
+        return
+    if not hits:
+        stats = index.stats()
+        console.print(f"No matches in {stats['documents']} indexed transcripts." + (" Run `index` to add existing ones." if not stats["documents"] else ""))
+        return
+
+    table = Table(title=f"Results for {query!r}")
+    table.add_column("Time")
+    table.add_column("Video")
+    table.add_column("Text")
+    for hit in hits:
+        label = escape(hit.title or hit.video)
+        if hit.language:
+            label += f" [dim]({escape(hit.language)})[/dim]"
+        text = escape(hit.text).replace("\x02", "[bold yellow]").replace("\x03", "[/bold yellow]")
+        table.add_row(f"{format_timestamp(hit.start_ms / 1000)}\n[dim]{hit.start_ms}-{hit.end_ms} ms[/dim]", label, text)
+    console.print(table)
+
+@app.command("index")
+def build_index(
+    output_dir: str = typer.Argument("output", help="Directory to scan for .srt files"),
+    index_file: Optional[str] = typer.Option(None, help="Search index (default: <output-dir>/.search.sqlite)"),
+    force: bool = typer.Option(False, "--force", help="Re-index every file, not only new and changed ones"),
+):
+    """
+    Add existing transcripts (.srt files) to the search index.
+    Only new and changed files are read, so this is cheap to rerun.
+    """
+    from src.core.search import SearchIndex, backfill, default_index_path
+
+    index = SearchIndex(index_file or default_index_path(output_dir))
+    with console.status("Indexing transcripts...") as status:
+        segments = [0]
+
+        def on_file(path: str, count: int):
+            segments[0] += count
+            status.update(f"Indexed {os.path.basename(path)} ({segments[0]} segments so far)")
+
+        indexed, skipped = backfill(index, output_dir, force=force, on_file=on_file)
+    stats = index.stats()
+    console.print(f"Indexed {indexed} files ({segments[0]} segments), {skipped} unchanged. Index: {stats['documents']} transcripts, {stats['segments']} segments.")
+
+def run_batch(
+    urls: List[str],
+    llm_provider: str,
+    llm_model: str,
+    llm_timeout: float = DEFAULT_TIMEOUT,
+    llm_max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    cache: bool = True,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    cache_max_size: float = 20.0,
+    artifact_cache: Optional[ArtifactCache] = None,
+    search_index: bool = True,
+    **pipeline_options,
+) -> list:
+    """
+    Runs urls through a BatchPipeline (see its arguments) with per-stage progress bars.
+    Used by `batch` and `sync`. artifact_cache, if given, is used instead of opening cache_dir.
+    """
+    from src.core.pipeline import BatchPipeline, STAGES
+    from src.core.search import SearchIndex, default_index_path
+
+    if artifact_cache is None and cache:
+        artifact_cache = ArtifactCache(cache_dir, max_size=int(cache_max_size * 1024 ** 3))
+    llm_client = create_client(llm_provider, llm_model, timeout=llm_timeout, max_in_flight=llm_max_in_flight)
+    # The pipeline puts the response cache around each video's metered client itself.
+    response_cache, translation_memory = open_llm_stores(cache_dir) if cache else (None, None)
+
+    index = SearchIndex(default_index_path(pipeline_options.get("output_dir", "output"))) if search_index else None
+
+    console.print(f"[bold green]Processing {len(urls)} videos[/bold green]")
+
+    with Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("{task.fields[active]}"),
+        TimeElapsedColumn(),
+        console=console,
+    ) as progress:
+        stage_tasks = {stage: progress.add_task(stage.capitalize(), total=len(urls), active="") for stage in STAGES}
+        active = {stage: 0 for stage in STAGES}
+        lock = threading.Lock()
+
+        def on_event(stage: str, status: str, item):
+            with lock:
+                if status == "started":
+                    active[stage] += 1
+                elif status in ("done", "failed"):
+                    active[stage] -= 1
+                if status in ("done", "failed", "skipped"):
+                    progress.advance(stage_tasks[stage])
+                progress.update(stage_tasks[stage], active=f"{active[stage]} running" if active[stage] else "")
+            if status == "failed":
+                progress.console.print(f"[red]{stage} failed for {item.url}:[/red] {item.error}")
+
+        pipeline = BatchPipeline(
+            llm_client,
+            cache=artifact_cache,
+            search_index=index,
+            translation_memory=translation_memory,
+            response_cache=response_cache,
+            on_event=on_event,
+            **pipeline_options,
+        )
+        return pipeline.run(urls)
+
+
+@app.command("daemon")
+def run_daemon(
+    listen: str = typer.Option(DEFAULT_ENDPOINT, help="Address to serve the job API on (unix:/path.sock or http://host:port)"),
+    workers: int = typer.Option(2, help="Jobs processed at the same time"),
+    transcribe_slots: int = typer.Option(1, help="Jobs that may run Whisper at the same time"),
+    download_slots: int = typer.Option(2, help="Jobs that may download at the same time"),
+    preload: Optional[List[str]] = typer.Option(None, help="Whisper model sizes to load at start-up (repeatable)"),
+):
+    """
+    Run a long-lived daemon that keeps Whisper models and LLM clients warm.
+    Jobs submitted by `process` (or any HTTP client) are processed in priority order.
+    """
+    daemon = Daemon(workers=workers, transcribe_slots=transcribe_slots, download_slots=download_slots, preload=preload or ())
+    try:
+        server = create_server(daemon, listen)
+    except (DaemonError, OSError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    if preload:
+        console.print(f"Loading Whisper models: {', '.join(preload)}")
+    daemon.start()
+    console.print(f"[bold green]Daemon listening on {listen}[/bold green] ({workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("Stopping; waiting for running jobs...")
+    finally:
+        server.server_close()
+        if listen.startswith("unix:") and os.path.exists(listen[len("unix:"):]):
+            os.remove(listen[len("unix:"):])
+        daemon.stop()
+
+@app.command()
+def jobs(
+    daemon_endpoint: str = typer.Option(DEFAULT_ENDPOINT, help="Daemon address (unix:/path.sock or http://host:port)"),
+    cancel: Optional[str] = typer.Option(None, help="Cancel the queued job with this id"),
+):
+    """
+    List the jobs of a running daemon.
+    """
+    client = DaemonClient(daemon_endpoint)
+    try:
+        if cancel:
+            client.cancel(cancel)
+            console.print(f"Cancelled job {cancel}")
+            return
+        all_jobs = client.jobs()
+    except DaemonError as e:
+        console.print(f"[bold red]Daemon error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Jobs on {daemon_endpoint}")
+    for column in ("Id", "Priority", "Status", "Stage", "URL"):
+        table.add_column(column)
+    for job in all_jobs:
+        table.add_row(job["id"], str(job["priority"]), job["status"], job["stage"] or "", job["url"])
+    console.print(table)
+
+@app.command()
+def bench(
+    only: Optional[List[str]] = typer.Argument(None, help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})"),
+    media_seconds: float = typer.Option(60.0, help="Length of the synthetic media in seconds"),
+    segments: int = typer.Option(400, help="Transcript segments for the translation benchmark (the others scale from it)"),
+    repeat: int = typer.Option(3, help="Runs per benchmark; the median is reported"),
+    llm_latency: float = typer.Option(0.02, help="Latency of the stub LLM per request in seconds"),
+    llm_failure_rate: float = typer.Option(0.0, help="Fraction of stub LLM requests that fail"),
+    llm_failure_mode: str = typer.Option("short", help=f"How stub LLM requests fail ({', '.join(FAILURE_MODES)})"),
+    work_dir: str = typer.Option(os.path.join("output", "bench"), help="Directory for the synthetic media and outputs"),
+    baseline: str = typer.Option(DEFAULT_BASELINE, help="Baseline file to compare against"),
+    update_baseline: bool = typer.Option(False, "--update-baseline", help="Store these results as the new baseline"),
+    threshold: float = typer.Option(DEFAULT_THRESHOLD, help="Slowdown over the baseline that counts as a regression (0.2 = 20%)"),
+    sample: Optional[str] = typer.Option(None, help="Speech recording for whisper_profiles, with its reference transcript in <sample>.txt (default: synthesized with ffmpeg's flite)"),
+    whisper_model: str = typer.Option("tiny", help="Whisper model size for whisper_profiles"),
+):
+    """
+    Benchmark the processing steps offline with synthetic media and a stub LLM.
+    Exits with code 1 if a benchmark regressed against the baseline.
+    """
+    config = BenchConfig(
+        work_dir=work_dir,
+        media_seconds=media_seconds,
+        repeat=repeat,
+        segments=segments,
+        llm_latency=llm_latency,
+        llm_failure_rate=llm_failure_rate,
+        llm_failure_mode=llm_failure_mode,
+        sample=sample,
+        whisper_model=whisper_model,
+    )
+    previous = load_baseline(baseline)
+
+    table = Table(title="Benchmarks")
+    for column in ("Benchmark", "Median", "Baseline", "Change", "Details"):
+        table.add_column(column, justify="left" if column in ("Benchmark", "Details") else "right")
+
+    def on_result(name: str, result: dict):
+        status = f"skipped ({result['skipped']})" if "skipped" in result else f"{result['seconds']:.3f}s"
+        console.print(f"[dim]{name}: {status}[/dim]")
+
+    try:
+        results = run_benchmarks(config, only, on_result=on_result)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+    for name, result in results.items():
+        if "skipped" in result:
+            table.add_row(name, "-", "-", "-", f"skipped: {result['skipped']}")
+            continue
+        base = previous.get(name, {}).get("seconds")
+        change = f"{(result['seconds'] / base - 1) * 100:+.0f}%" if base else "-"
+        details = ", ".join(
+            f"{key}={value:.3g}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in result.items()
+            if key != "seconds" and not isinstance(value, dict)
+        )
+        table.add_row(name, f"{result['seconds']:.3f}s", f"{base:.3f}s" if base else "-", change, details)
+    console.print(table)
+
+    profiles = results.get("whisper_profiles", {}).get("profiles")
+    if profiles:
+        profile_table = Table(title=f"Whisper profiles ({whisper_model})")
+        for column in ("Profile", "Median", "Real-time factor", "WER"):
+            profile_table.add_column(column, justify="left" if column == "Profile" else "right")
+        for profile_name, profile in profiles.items():
+            profile_table.add_row(profile_name, f"{profile['seconds']:.3f}s", f"{profile['real_time_factor']:.3f}", f"{profile['wer']:.1%}")
+        console.print(profile_table)
+
+    regressions = find_regressions(results, previous, threshold)
+    for name, base, current in regressions:
+        console.print(f"[bold red]Regression:[/bold red] {name} took {current:.3f}s, baseline {base:.3f}s")
+    if update_baseline:
+        save_baseline(results, baseline)
+        console.print(f"[green]Baseline saved:[/green] {baseline}")
+    if regressions and not update_baseline:
+        raise typer.Exit(code=1)
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,34 @@
+from typing import Iterator
+
+from rich.console import Console
+
+from src.core.llm import StreamTimer
+
+
+def stream_to_file(console: Console, stream: Iterator[str], path: str, description: str) -> str:
+    """
+    Prints LLM output as it arrives and appends it to path chunk by chunk, so a partial
+    file is left behind if the request breaks off. Shows a spinner until the first token,
+    then reports time-to-first-token and tokens/sec. Returns the full text.
+    """
+    timer = StreamTimer(stream)
+    status = console.status(description)
+    status.start()
+    try:
+        with open(path, "w") as f:
+            for chunk in timer:
+                if status is not None:
+                    status.stop()
+                    status = None
+                console.print(chunk, end="", markup=False, highlight=False, soft_wrap=True)
+                f.write(chunk)
+                f.flush()
+    finally:
+        if status is not None:
+            status.stop()
+    console.print()
+    console.print(
+        f"[dim]First token after {timer.time_to_first_token:.2f}s, "
+        f"~{timer.tokens} tokens at {timer.tokens_per_second:.1f} tokens/s[/dim]"
+    )
+    return timer.text
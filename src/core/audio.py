@@ -1,8 +1,24 @@
 import os
-from typing import Optional
+import queue
+import threading
+from typing import Iterable, Iterator, Optional, Sequence, Union
 import ffmpeg
+import numpy as np
+
+from src.core.cache import ArtifactCache
+
+# Text subtitle codec to use for soft subtitles, per output container.
+SUBTITLE_CODECS = {
+    ".mp4": "mov_text",
+    ".m4v": "mov_text",
+    ".mov": "mov_text",
+    ".mkv": "srt",
+}
 
 class AudioProcessor:
+    def __init__(self, cache: Optional[ArtifactCache] = None):
+        self.cache = cache
+
     def extract_audio(self, video_path: str, output_path: Optional[str] = None) -> str:
         """
         Extracts audio from a video file.
@@ -12,6 +28,19 @@ class AudioProcessor:
             base, _ = os.path.splitext(video_path)
             output_path = f"{base}.wav"
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(
+                "extract_audio",
+                source=self.cache.file_digest(video_path),
+                acodec="pcm_s16le",
+                ac=1,
+                ar="16k",
+            )
+            cached_path = self.cache.get_file(cache_key, os.path.dirname(os.path.abspath(output_path)), os.path.basename(output_path))
+            if cached_path:
+                return cached_path
+
         try:
             (
                 ffmpeg
@@ -24,40 +53,191 @@ class AudioProcessor:
             print(f"Error extracting audio: {e.stderr.decode()}")
             raise
 
+        if cache_key is not None:
+            self.cache.put_file(cache_key, output_path)
         return output_path
 
-    def embed_subtitles(self, video_path: str, subtitle_path: str, output_path: Optional[str] = None) -> str:
+    def load_audio(self, media_path: str, sample_rate: int = 16000) -> np.ndarray:
+        """
+        Decodes the audio track of a media file straight into memory.
+        A single ffmpeg process streams mono s16le PCM through a pipe; nothing is written to disk.
+        Returns a float32 array in [-1, 1], the format Whisper's transcribe() expects.
+        """
+        process = (
+            ffmpeg
+            .input(media_path, threads=0)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            .global_args('-loglevel', 'error', '-nostdin')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+
+        chunks = []
+        block_size = sample_rate * 2 * 60  # one minute of s16le samples
+        while True:
+            data = process.stdout.read(block_size)
+            if not data:
+                break
+            # An odd trailing byte can only appear at EOF; drop it rather than misalign samples.
+            chunks.append(np.frombuffer(data[:len(data) - len(data) % 2], np.int16).astype(np.float32) / 32768.0)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            print(f"Error loading audio: {stderr.decode()}")
+            raise ffmpeg.Error('ffmpeg', None, stderr)
+
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def stream_audio(
+        self, source: Union[str, Iterable[bytes]], sample_rate: int = 16000, block_seconds: float = 5.0, finish_source: bool = False
+    ) -> Iterator[np.ndarray]:
+        """
+        Decodes audio incrementally and yields float32 blocks of about block_seconds as ffmpeg
+        produces them. source is a media path or an iterable of byte chunks (e.g. a download in
+        progress), which is fed to ffmpeg's stdin from a background thread.
+        ffmpeg's output is also read in the background and buffered, so a slow consumer (Whisper)
+        never stalls the decoder or the download feeding it.
+        With finish_source, the rest of source is still read if ffmpeg gives up on it (unless the
+        consumer stopped), so a download completes and can be decoded from the file instead.
+        """
+        piped = not isinstance(source, str)
+        process = (
+            ffmpeg
+            .input('pipe:' if piped else source, threads=0)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            .global_args('-loglevel', 'error')
+            .run_async(pipe_stdin=piped, pipe_stdout=True, pipe_stderr=True)
+        )
+        errors = []
+        blocks = queue.Queue()
+        stopped = threading.Event()
+
+        def feed():
+            chunks = iter(source)
+            try:
+                try:
+                    for data in chunks:
+                        process.stdin.write(data)
+                except BrokenPipeError:
+                    # ffmpeg exited; its own error is reported below.
+                    if finish_source and not stopped.is_set():
+                        for _ in chunks:
+                            pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        def read():
+            block_size = int(sample_rate * block_seconds) * 2
+            for data in iter(lambda: process.stdout.read(block_size), b""):
+                # Kept as int16 until consumed: half the memory of float32 while it waits.
+                blocks.put(np.frombuffer(data[:len(data) - len(data) % 2], np.int16))
+            blocks.put(None)
+
+        threads = [threading.Thread(target=read, name="audio-read", daemon=True)]
+        if piped:
+            threads.append(threading.Thread(target=feed, name="audio-feed", daemon=True))
+        stderr = []
+        # stderr is drained too, so a chatty ffmpeg cannot block on a full pipe.
+        threads.append(threading.Thread(target=lambda: stderr.append(process.stderr.read()), name="audio-stderr", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        finished = False
+        try:
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                yield block.astype(np.float32) / 32768.0
+            finished = True
+        finally:
+            if not finished:
+                stopped.set()
+                process.kill()  # the consumer stopped early
+            for thread in threads:
+                thread.join()
+            returncode = process.wait()
+
+        if errors:
+            raise errors[0]
+        if returncode != 0:
+            print(f"Error streaming audio: {stderr[0].decode()}")
+            raise ffmpeg.Error('ffmpeg', None, stderr[0])
+
+    def probe_duration(self, media_path: str) -> float:
+        """
+        Returns the duration of a media file in seconds (0.0 if ffprobe cannot tell).
+        """
+        try:
+            return float(ffmpeg.probe(media_path)["format"]["duration"])
+        except (ffmpeg.Error, KeyError, ValueError):
+            return 0.0
+
+    def embed_subtitles(
+        self,
+        video_path: str,
+        subtitle_paths: Union[str, Sequence[str]],
+        output_path: Optional[str] = None,
+        titles: Optional[Sequence[str]] = None,
+        burn_in: bool = False,
+        preset: str = "veryfast",
+        threads: int = 0,
+    ) -> str:
         """
         Embeds subtitles into a video file.
+        By default every SRT is muxed as its own soft subtitle track while audio and video are
+        stream-copied, which takes seconds. With burn_in, the first SRT is rendered into the
+        picture instead; that re-encodes the video with libx264 at the given preset and thread count.
         Returns the path to the video file with embedded subtitles.
         """
+        if isinstance(subtitle_paths, str):
+            subtitle_paths = [subtitle_paths]
+        if not subtitle_paths:
+            raise ValueError("No subtitles to embed")
+
+        base, ext = os.path.splitext(video_path)
         if output_path is None:
-            base, ext = os.path.splitext(video_path)
+            # Soft subtitles need a container that can hold a text track; fall back to Matroska.
+            if not burn_in and ext.lower() not in SUBTITLE_CODECS:
+                ext = ".mkv"
             output_path = f"{base}_subbed{ext}"
 
-        try:
-            video = ffmpeg.input(video_path)
-            # soft subtitles
-            # (
-            #     ffmpeg
-            #     .output(video, output_path, vf=f"subtitles={subtitle_path}")
-            #     .overwrite_output()
-            #     .run(capture_stdout=True, capture_stderr=True)
-            # )
-
-            # For soft subs (mkv/mp4 container support varies), we usually map the subtitle stream.
-            # But for "burning in" (hard subs), we use the subtitles filter.
-            # Let's support hard subs for now as it's more universally compatible for viewing.
-            # If soft subs are preferred, we can change this.
-
-            (
-                ffmpeg
-                .input(video_path)
-                .output(output_path, vf=f"subtitles='{subtitle_path}'")
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+        video = ffmpeg.input(video_path)
+        if burn_in:
+            output = ffmpeg.output(
+                video.video.filter('subtitles', subtitle_paths[0]),
+                video['a?'],
+                output_path,
+                vcodec='libx264',
+                preset=preset,
+                threads=threads,
+                acodec='copy',
+            )
+        else:
+            codec = SUBTITLE_CODECS.get(os.path.splitext(output_path)[1].lower(), 'srt')
+            # mov_text tracks are labelled by their handler name, Matroska ones by title.
+            tag = 'handler_name' if codec == 'mov_text' else 'title'
+            metadata = {
+                f'metadata:s:s:{i}': f'{tag}={title}'
+                for i, title in enumerate(titles or []) if title
+            }
+            output = ffmpeg.output(
+                video['v'],
+                video['a?'],
+                *[ffmpeg.input(path)['s'] for path in subtitle_paths],
+                output_path,
+                c='copy',
+                **{'c:s': codec},
+                **metadata,
             )
 
+        try:
+            output.overwrite_output().run(capture_stdout=True, capture_stderr=True)
         except ffmpeg.Error as e:
             print(f"Error embedding subtitles: {e.stderr.decode()}")
             raise
@@ -0,0 +1,300 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "video-summarizer")
+DEFAULT_MAX_SIZE = 20 * 1024 ** 3  # 20 GB
+# Cache hits only update their entry's last access time in batches: once this many are
+# pending, after this many seconds, before eviction, and when the cache is closed.
+TOUCH_BATCH = 64
+TOUCH_INTERVAL = 60.0
+
+
+class ArtifactCache:
+    """
+    Content-addressed store for pipeline artifacts (videos, audio, transcripts).
+    Entries are keyed on a hash of the stage name and its parameters and are
+    evicted least-recently-used once the total size exceeds max_size bytes.
+    The index is a SQLite database next to the objects, so several processes (the daemon,
+    a CLI run, a sync) can share one cache directory without losing each other's entries.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "index.sqlite")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, object TEXT NOT NULL, name TEXT, digest TEXT, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS digests (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL)")
+        self._touched: Dict[str, float] = {}
+        self._flushed = time.monotonic()
+        # Hits still pending when the cache is dropped (or the process exits) are written then.
+        self._finalizer = weakref.finalize(self, self._write_touches, self._conn, self._touched)
+        self._import_json_index()
+        self._prune_digests()
+
+    @staticmethod
+    def make_key(stage: str, **params) -> str:
+        """
+        Builds a cache key from the stage name and its parameters.
+        """
+        payload = json.dumps({"stage": stage, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def file_digest(self, path: str) -> str:
+        """
+        Returns the SHA-256 of a file's contents.
+        Digests are memoized on (size, mtime) so unchanged files are only read once.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            memo = self._conn.execute("SELECT size, mtime_ns, digest FROM digests WHERE path = ?", (path,)).fetchone()
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    def get_file(self, key: str, dest_dir: str, filename: Optional[str] = None) -> Optional[str]:
+        """
+        Copies a cached file into dest_dir (under its original name unless filename is given).
+        Returns the destination path on a hit, None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT object, name, digest FROM entries WHERE key = ? AND kind = 'file'", (key,)).fetchone()
+        if row is None:
+            return None
+        object_name, name, digest = row
+        object_path = os.path.join(self.objects_dir, object_name)
+
+        dest_path = os.path.abspath(os.path.join(dest_dir, filename or name))
+        if not (os.path.exists(dest_path) and self.file_digest(dest_path) == digest):
+            os.makedirs(dest_dir, exist_ok=True)
+            tmp_path = f"{dest_path}.part"
+            try:
+                shutil.copyfile(object_path, tmp_path)
+            except FileNotFoundError:
+                # Removed behind the index's back, or evicted by another process just now.
+                self._forget(key, object_name)
+                return None
+            os.replace(tmp_path, dest_path)
+        self._touch(key)
+        return dest_path
+
+    def put_file(self, key: str, path: str):
+        """
+        Stores a copy of the file at path under key.
+        """
+        name = os.path.basename(path)
+        digest = self.file_digest(path)
+        object_name = f"{key}{os.path.splitext(name)[1]}"
+        object_path = os.path.join(self.objects_dir, object_name)
+        tmp_path = f"{object_path}.part"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, object_path)
+        self._put(key, "file", object_name, os.path.getsize(object_path), name=name, digest=digest)
+
+    def get_json(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached JSON document stored under key, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT object FROM entries WHERE key = ? AND kind = 'json'", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(os.path.join(self.objects_dir, row[0]), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._forget(key, row[0])
+            return None
+        self._touch(key)
+        return data
+
+    def put_json(self, key: str, data: dict):
+        """
+        Stores a JSON-serializable document under key.
+        """
+        object_name = f"{key}.json"
+        object_path = os.path.join(self.objects_dir, object_name)
+        tmp_path = f"{object_path}.part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, object_path)
+        self._put(key, "json", object_name, os.path.getsize(object_path))
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def delete(self, key: str):
+        """
+        Removes one cached artifact, e.g. a download whose source has changed.
+        """
+        with self._lock:
+            self._touched.pop(key, None)
+            row = self._conn.execute("DELETE FROM entries WHERE key = ? RETURNING object", (key,)).fetchone()
+        if row:
+            self._remove_objects([row[0]])
+
+    def clear(self):
+        """
+        Removes every cached artifact.
+        """
+        with self._lock:
+            self._touched.clear()
+            with self._transaction():
+                objects = [row[0] for row in self._conn.execute("DELETE FROM entries RETURNING object").fetchall()]
+                self._conn.execute("DELETE FROM digests")
+        self._remove_objects(objects)
+
+    def close(self):
+        with self._lock:
+            self._finalizer()
+            self._conn.close()
+
+    def _put(self, key: str, kind: str, object_name: str, size: int, name: Optional[str] = None, digest: Optional[str] = None):
+        """
+        Records an object written under objects_dir and evicts what no longer fits.
+        """
+        with self._lock:
+            self._flush_touches()
+            with self._transaction():
+                row = self._conn.execute("SELECT object FROM entries WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, kind, object, name, digest, size, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, kind, object_name, name, digest, size, time.time()),
+                )
+                doomed = self._evict()
+        if row and row[0] != object_name and row[0] not in doomed:
+            doomed.append(row[0])
+        self._remove_objects(doomed)
+
+    def _evict(self) -> List[str]:
+        """
+        Drops least-recently-used entries until the cache fits in max_size and returns their
+        objects, to be removed once the transaction commits. Caller holds the lock.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return []
+        doomed = []
+        for key, object_name, size in self._conn.execute("SELECT key, object, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_size:
+                break
+            total -= size
+            doomed.append((key, object_name))
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in doomed])
+        for key, _ in doomed:
+            self._touched.pop(key, None)
+        return [object_name for _, object_name in doomed]
+
+    def _forget(self, key: str, object_name: str):
+        """
+        Drops an entry whose object is missing or unreadable, unless it has been replaced since.
+        """
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM entries WHERE key = ? AND object = ?", (key, object_name))
+        self._remove_objects([object_name])
+
+    def _touch(self, key: str):
+        with self._lock:
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._flushed >= TOUCH_INTERVAL:
+                self._flush_touches()
+
+    def _flush_touches(self):
+        """
+        Writes the pending last access times. Caller holds the lock.
+        """
+        self._write_touches(self._conn, self._touched)
+        self._flushed = time.monotonic()
+
+    @staticmethod
+    def _write_touches(conn: sqlite3.Connection, touched: Dict[str, float]):
+        if not touched:
+            return
+        with contextlib.suppress(sqlite3.Error):
+            conn.executemany("UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?", [(when, key) for key, when in touched.items()])
+        touched.clear()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so processes sharing the cache evict one at a time.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _remove_objects(self, object_names: List[str]):
+        for object_name in object_names:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.objects_dir, object_name))
+
+    def _prune_digests(self):
+        """
+        Forgets the digests of files that no longer exist.
+        """
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM digests").fetchall()]
+            missing = [(path,) for path in paths if not os.path.exists(path)]
+            if missing:
+                self._conn.executemany("DELETE FROM digests WHERE path = ?", missing)
+
+    def _import_json_index(self):
+        """
+        Moves the entries of an index.json written by earlier versions into the database,
+        so their objects keep counting towards max_size.
+        """
+        json_path = os.path.join(self.cache_dir, "index.json")
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (key, kind, object, name, digest, size, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, entry["kind"], entry["object"], entry.get("name"), entry.get("digest"), entry["size"], entry["last_access"])
+                    for key, entry in index.get("entries", {}).items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                [(path, memo["size"], memo["mtime_ns"], memo["digest"]) for path, memo in index.get("digests", {}).items()],
+            )
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(json_path)
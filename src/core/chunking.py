@@ -0,0 +1,127 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def frame_energy(audio: np.ndarray, sample_rate: int = 16000, frame_seconds: float = 0.02) -> np.ndarray:
+    """
+    Returns the mean energy of each non-overlapping frame of audio.
+    """
+    frame_length = max(1, int(sample_rate * frame_seconds))
+    num_frames = len(audio) // frame_length
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    return np.einsum("ij,ij->i", frames, frames) / frame_length
+
+
+def find_split_points(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    chunk_seconds: float = 300.0,
+    search_seconds: float = 30.0,
+    frame_seconds: float = 0.02,
+    smooth_seconds: float = 0.5,
+) -> List[int]:
+    """
+    Picks sample offsets to cut audio into chunks of roughly chunk_seconds.
+    Each cut is placed at the quietest point (smoothed frame energy) within
+    search_seconds of the nominal boundary, so words are not split in half.
+    Returns the interior cut points in samples, in ascending order.
+    """
+    duration = len(audio) / sample_rate
+    if duration <= chunk_seconds * 1.5:
+        return []
+
+    energy = frame_energy(audio, sample_rate, frame_seconds)
+    smooth_frames = max(1, int(smooth_seconds / frame_seconds))
+    energy = np.convolve(energy, np.ones(smooth_frames) / smooth_frames, mode="same")
+
+    frame_length = int(sample_rate * frame_seconds)
+    search_frames = int(search_seconds / frame_seconds)
+    points = []
+    boundary = chunk_seconds
+    while boundary < duration - chunk_seconds / 2:
+        center = int(boundary / frame_seconds)
+        lo = max(0, center - search_frames)
+        hi = min(len(energy), center + search_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        points.append(quietest * frame_length)
+        boundary = quietest * frame_seconds + chunk_seconds
+    return points
+
+
+def split_audio(audio: np.ndarray, split_points: List[int], overlap_samples: int = 0) -> List[Tuple[np.ndarray, int, int, int]]:
+    """
+    Cuts audio at split_points, padding every chunk with overlap_samples of its neighbours.
+    Returns (chunk, chunk_offset, owned_start, owned_end) tuples, where chunk_offset is the
+    sample index chunk starts at and [owned_start, owned_end) is the region the chunk is
+    responsible for when the results are stitched back together.
+    """
+    bounds = [0] + list(split_points) + [len(audio)]
+    chunks = []
+    for owned_start, owned_end in zip(bounds[:-1], bounds[1:]):
+        start = max(0, owned_start - overlap_samples)
+        end = min(len(audio), owned_end + overlap_samples)
+        chunks.append((audio[start:end], start, owned_start, owned_end))
+    return chunks
+
+
+def find_quiet_cut(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    min_seconds: float = 20.0,
+    max_seconds: float = 30.0,
+    frame_seconds: float = 0.02,
+    smooth_seconds: float = 0.5,
+) -> int:
+    """
+    Returns the sample offset of the quietest point of audio between min_seconds and
+    max_seconds, where a streamed window can be cut without splitting a word.
+    """
+    energy = frame_energy(audio[:int(max_seconds * sample_rate)], sample_rate, frame_seconds)
+    smooth_frames = max(1, int(smooth_seconds / frame_seconds))
+    energy = np.convolve(energy, np.ones(smooth_frames) / smooth_frames, mode="same")
+    lo = max(0, min(int(min_seconds / frame_seconds), len(energy) - 1))
+    quietest = lo + int(np.argmin(energy[lo:]))
+    return quietest * int(sample_rate * frame_seconds)
+
+
+def shift_segment(segment: dict, shift: float, segment_id: int) -> dict:
+    """
+    Returns a copy of a Whisper segment moved shift seconds later, with a new id.
+    """
+    shifted = dict(segment)
+    shifted["id"] = segment_id
+    shifted["seek"] = segment.get("seek", 0) + int(shift * 100)  # seek is in 10 ms mel frames
+    shifted["start"] = segment["start"] + shift
+    shifted["end"] = segment["end"] + shift
+    if "words" in segment:
+        shifted["words"] = [dict(word, start=word["start"] + shift, end=word["end"] + shift) for word in segment["words"]]
+    return shifted
+
+
+def stitch_results(results: List[dict], chunks: List[Tuple[np.ndarray, int, int, int]], sample_rate: int = 16000) -> dict:
+    """
+    Merges per-chunk Whisper results into one result with the same shape as a single pass.
+    Timestamps are shifted by each chunk's offset, and segments that fall in the overlap
+    padding (midpoint outside the chunk's owned region) are dropped so nothing is duplicated.
+    """
+    segments = []
+    languages = []
+    for result, (_, offset, owned_start, owned_end) in zip(results, chunks):
+        languages.append(result.get("language"))
+        shift = offset / sample_rate
+        lo = owned_start / sample_rate
+        hi = owned_end / sample_rate
+        for segment in result["segments"]:
+            midpoint = (segment["start"] + segment["end"]) / 2 + shift
+            if not lo <= midpoint < hi:
+                continue
+            segments.append(shift_segment(segment, shift, len(segments)))
+
+    known = [language for language in languages if language]
+    language = max(set(known), key=known.count) if known else None
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language,
+    }
@@ -0,0 +1,409 @@
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.core.cache import ArtifactCache, DEFAULT_CACHE_DIR
+from src.core.llm import LLMClient, create_client
+from src.core.llm_cache import open_llm_stores
+from src.core.runner import ProcessOptions, ProcessResult, ProcessRunner
+
+DEFAULT_ENDPOINT = os.getenv(
+    "VIDEO_SUMMARIZER_DAEMON",
+    f"unix:{os.path.join(DEFAULT_CACHE_DIR, 'daemon.sock')}" if hasattr(socket, "AF_UNIX") else "http://127.0.0.1:8765",
+)
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class DaemonError(Exception):
+    """
+    Raised by DaemonClient when the daemon rejects a request or cannot be reached.
+    """
+
+
+@dataclass
+class DaemonJob:
+    id: str
+    options: ProcessOptions
+    priority: int = 0
+    status: str = "queued"
+    stage: Optional[str] = None
+    completed_stages: List[str] = field(default_factory=list)
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    metrics: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "url": self.options.url,
+            "priority": self.priority,
+            "status": self.status,
+            "stage": self.stage,
+            "completed_stages": list(self.completed_stages),
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+            "metrics": self.metrics,
+            "options": dict(self.options.__dict__),
+        }
+
+
+class Daemon:
+    """
+    Long-running job runner behind `video-summarizer daemon`.
+    Whisper models stay loaded in the process-wide model registry and LLM clients, the artifact
+    cache and the LLM stores are created once and shared by every job, so only the first job
+    pays for start-up. Jobs wait in a priority queue (higher first, FIFO within a priority) and
+    run on `workers` threads; stages that must not overlap too much across jobs are bounded by
+    per-stage slots (one Whisper transcription at a time by default).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        transcribe_slots: int = 1,
+        download_slots: int = 2,
+        embed_slots: int = 1,
+        preload: Iterable[str] = (),
+        client_factory: Callable[..., LLMClient] = create_client,
+        runner_factory: Callable[..., ProcessRunner] = ProcessRunner,
+    ):
+        self.workers = workers
+        self.preload = list(preload)
+        self.client_factory = client_factory
+        self.runner_factory = runner_factory
+        self.limits = {
+            "download": threading.Semaphore(download_slots),
+            "transcribe": threading.Semaphore(transcribe_slots),
+            "embed": threading.Semaphore(embed_slots),
+        }
+        self.jobs: Dict[str, DaemonJob] = {}
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._clients: Dict[tuple, LLMClient] = {}
+        self._caches: Dict[tuple, ArtifactCache] = {}
+        self._stores: Dict[str, tuple] = {}
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self.preload:
+            from src.core.models import default_registry
+
+            for model_size in self.preload:
+                default_registry.get(model_size)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"daemon-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Lets the running jobs finish and stops the workers; queued jobs stay queued.
+        """
+        for _ in self._threads:
+            self._queue.put((float("-inf"), next(self._order), None))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, params: dict, priority: int = 0) -> DaemonJob:
+        """
+        Queues a job. params are ProcessOptions fields; unknown names raise ValueError.
+        """
+        known = {f.name for f in fields(ProcessOptions)}
+        unknown = set(params) - known
+        if unknown:
+            raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+        if not params.get("url"):
+            raise ValueError("A job needs a url")
+        job = DaemonJob(id=uuid.uuid4().hex[:12], options=ProcessOptions(**params), priority=priority)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._queue.put((-priority, next(self._order), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[DaemonJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[DaemonJob]:
+        with self._lock:
+            return sorted(self.jobs.values(), key=lambda job: job.submitted)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a queued job. Running jobs are not interrupted; returns False for them.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished = time.time()
+            self._changed.notify_all()
+            return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[DaemonJob]:
+        """
+        Blocks until the job has finished (or timeout passes) and returns it.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job.status in ("done", "failed", "cancelled"):
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    def status(self) -> dict:
+        from src.core.models import default_registry
+
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "jobs": counts, "models": default_registry.loaded()}
+
+    def _work(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self.jobs[job_id]
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started = time.time()
+                self._changed.notify_all()
+            self._run(job)
+
+    def _run(self, job: DaemonJob):
+        options = job.options
+
+        def on_stage(stage: str, status: str, result: ProcessResult):
+            with self._lock:
+                job.stage = stage
+                job.result = result.to_dict()
+                if status != "started":
+                    job.completed_stages.append(stage)
+                self._changed.notify_all()
+
+        runner = None
+        try:
+            runner = self.runner_factory(
+                options,
+                llm_client=self._llm_client(options),
+                artifact_cache=self._artifact_cache(options),
+                llm_stores=self._llm_stores(options),
+                limits=self.limits,
+                on_stage=on_stage,
+            )
+            result = runner.run()
+        except Exception as e:
+            with self._lock:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+                if runner is not None:
+                    job.stage = runner.current_stage
+                    job.metrics = runner.metrics.report()
+                job.finished = time.time()
+                self._changed.notify_all()
+            return
+        with self._lock:
+            job.status = "done"
+            job.stage = None
+            job.result = result.to_dict()
+            job.metrics = runner.metrics.report()
+            job.finished = time.time()
+            self._changed.notify_all()
+
+    def _llm_client(self, options: ProcessOptions) -> LLMClient:
+        key = (options.llm_provider, options.llm_model, options.llm_timeout, options.llm_max_in_flight)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.client_factory(options.llm_provider, options.llm_model, timeout=options.llm_timeout, max_in_flight=options.llm_max_in_flight)
+            return self._clients[key]
+
+    def _artifact_cache(self, options: ProcessOptions) -> Optional[ArtifactCache]:
+        if not options.cache:
+            return None
+        key = (options.cache_dir, options.cache_max_size)
+        with self._lock:
+            if key not in self._caches:
+                self._caches[key] = ArtifactCache(options.cache_dir, max_size=int(options.cache_max_size * 1024 ** 3))
+            return self._caches[key]
+
+    def _llm_stores(self, options: ProcessOptions) -> Optional[tuple]:
+        if not options.cache:
+            return None
+        with self._lock:
+            if options.cache_dir not in self._stores:
+                self._stores[options.cache_dir] = open_llm_stores(options.cache_dir)
+            return self._stores[options.cache_dir]
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the daemon:
+      POST   /jobs         {"options": {...}, "priority": 0} -> job
+      GET    /jobs         -> [job, ...]
+      GET    /jobs/<id>    -> job
+      DELETE /jobs/<id>    cancels a queued job
+      GET    /health       -> worker, job and model counts
+    """
+
+    server_version = "video-summarizer-daemon"
+
+    @property
+    def daemon(self) -> Daemon:
+        return self.server.daemon
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send(200, self.daemon.status())
+        if self.path == "/jobs":
+            return self._send(200, [job.to_dict() for job in self.daemon.list()])
+        job = self._job()
+        if job is not None:
+            self._send(200, job.to_dict())
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job = self.daemon.submit(body.get("options") or {}, priority=int(body.get("priority", 0)))
+        except (ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(201, job.to_dict())
+
+    def do_DELETE(self):
+        job = self._job()
+        if job is None:
+            return
+        if not self.daemon.cancel(job.id):
+            return self._send(409, {"error": f"job is {job.status}"})
+        self._send(200, job.to_dict())
+
+    def _job(self) -> Optional[DaemonJob]:
+        job_id = self.path[len("/jobs/"):] if self.path.startswith("/jobs/") else None
+        job = self.daemon.get(job_id) if job_id else None
+        if job is None:
+            self._send(404, {"error": "not found"})
+        return job
+
+    def _send(self, code: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(daemon: Daemon, endpoint: str = DEFAULT_ENDPOINT):
+    """
+    Binds the daemon's API to endpoint: "unix:/path/to.sock" or "http://host:port".
+    """
+    if endpoint.startswith("unix:"):
+        path = endpoint[len("unix:"):]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            if DaemonClient(endpoint).available():
+                raise DaemonError(f"A daemon is already listening on {path}")
+            os.remove(path)  # left behind by a daemon that did not shut down cleanly
+        server = UnixHTTPServer(path, DaemonRequestHandler)
+    else:
+        host, _, port = endpoint.split("://", 1)[-1].rstrip("/").rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), DaemonRequestHandler)
+    server.daemon = daemon
+    return server
+
+
+class DaemonClient:
+    """
+    Talks to a daemon at endpoint (see create_server).
+    """
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, timeout: float = 10.0):
+        import httpx
+
+        self.endpoint = endpoint
+        if endpoint.startswith("unix:"):
+            self.socket_path = endpoint[len("unix:"):]
+            transport = httpx.HTTPTransport(uds=self.socket_path)
+            self._session = httpx.Client(transport=transport, base_url="http://daemon", timeout=timeout)
+        else:
+            self.socket_path = None
+            self._session = httpx.Client(base_url=endpoint.rstrip("/"), timeout=timeout)
+
+    def available(self) -> bool:
+        if self.socket_path is not None and not os.path.exists(self.socket_path):
+            return False
+        try:
+            self.health()
+        except DaemonError:
+            return False
+        return True
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def submit(self, options: dict, priority: int = 0) -> dict:
+        return self._request("POST", "/jobs", json={"options": options, "priority": priority})
+
+    def job(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self) -> List[dict]:
+        return self._request("GET", "/jobs")
+
+    def cancel(self, job_id: str) -> dict:
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def _request(self, method: str, path: str, **kwargs):
+        import httpx
+
+        try:
+            response = self._session.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            raise DaemonError(f"Daemon not reachable at {self.endpoint}: {e}") from e
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise DaemonError(f"Unexpected response from {self.endpoint}: HTTP {response.status_code}") from e
+        if response.status_code >= 400:
+            raise DaemonError(body.get("error", f"HTTP {response.status_code}"))
+        return body
@@ -1,27 +1,188 @@
 import os
-from typing import Optional
-import yt_dlp
+import subprocess
+import sys
+from typing import Iterator, List, Optional
+
+from src.core.cache import ArtifactCache
 
 class VideoDownloader:
-    def __init__(self, output_dir: str = "downloads"):
+    FORMAT = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+    # Speech only needs 16 kHz mono, so prefer a modest audio-only stream over the best one.
+    AUDIO_FORMAT = 'bestaudio[abr<=96]/worstaudio/best'
+    # Streaming pipes a single file out of yt-dlp, so it cannot merge separate video and audio streams.
+    STREAM_FORMAT = 'best[ext=mp4]/best'
+
+    def __init__(self, output_dir: str = "downloads", cache: Optional[ArtifactCache] = None, fragment_workers: int = 4):
         self.output_dir = output_dir
+        self.cache = cache
+        self.fragment_workers = fragment_workers
+        # Whether the last download() was served from the artifact cache.
+        self.cache_hit = False
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-    def download(self, url: str) -> str:
+    def download(self, url: str, audio_only: bool = False) -> str:
         """
         Downloads a video from a URL using yt-dlp.
+        With audio_only, fetches just the smallest sufficient audio stream (no video, no merge)
+        for runs that only need a transcript; the file is decoded by ffmpeg like any other.
         Returns the absolute path to the downloaded file.
         """
-        ydl_opts = {
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+        format_spec = self.AUDIO_FORMAT if audio_only else self.FORMAT
+
+        self.cache_hit = False
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key("download", url=url, format=format_spec)
+            cached_path = self.cache.get_file(cache_key, self.output_dir)
+            if cached_path:
+                self.cache_hit = True
+                return cached_path
+
+        ydl_opts = self._options(format_spec)
+
+        import yt_dlp  # slow to import; only needed once a download actually runs
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            filename = os.path.abspath(ydl.prepare_filename(info))
+
+        if cache_key is not None:
+            self.cache.put_file(cache_key, filename)
+        return filename
+
+    def stream(self, url: str, audio_only: bool = True) -> "DownloadStream":
+        """
+        Starts a download that can be consumed while it is still running.
+        The format is resolved first (one metadata request), then yt-dlp writes the file to a
+        pipe; see DownloadStream. A cached download is replayed from disk instead.
+        """
+        format_spec = self.AUDIO_FORMAT if audio_only else self.STREAM_FORMAT
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key("download", url=url, format=format_spec)
+            cached_path = self.cache.get_file(cache_key, self.output_dir)
+            if cached_path:
+                return DownloadStream(cached_path)
+
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL({**self._options(format_spec), 'quiet': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+            filename = os.path.abspath(ydl.prepare_filename(info))
+
+        command = [
+            sys.executable, "-m", "yt_dlp",
+            "--quiet", "--no-warnings", "--no-playlist",
+            "--format", info["format_id"],
+            "--concurrent-fragments", str(self.fragment_workers),
+            "--remote-components", "ejs:github",
+            "--output", "-",
+            info.get("webpage_url") or url,
+        ]
+        return DownloadStream(filename, command=command, cache=self.cache, cache_key=cache_key)
+
+    def list_entries(self, url: str) -> Iterator[dict]:
+        """
+        Lists the videos of a playlist or channel without resolving each one (flat extraction).
+        Entries are yielded as the listing is paged through, so a caller can stop early; a
+        channel's tabs (videos, shorts, live) are listed one after another. A single video
+        URL yields itself.
+        """
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}) as ydl:
+            pending = [url]
+            while pending:
+                # Unprocessed, a listing's entries are fetched page by page as they are iterated.
+                info = ydl.extract_info(pending.pop(0), download=False, process=False)
+                kind = info.get('_type', 'video')
+                if kind in ('url', 'url_transparent') and not info.get('id'):
+                    pending.append(info['url'])  # e.g. a channel URL redirecting to its tabs
+                    continue
+                if kind not in ('playlist', 'multi_video'):
+                    yield info
+                    continue
+                for entry in info.get('entries') or ():
+                    if not entry:
+                        continue
+                    if entry.get('_type') == 'playlist' or str(entry.get('ie_key', '')).endswith('Tab'):
+                        pending.append(entry.get('url') or entry.get('webpage_url'))
+                    else:
+                        yield entry
+
+    def metadata(self, url: str) -> dict:
+        """
+        Fetches the full metadata of one video without downloading it.
+        """
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL({'quiet': True, 'noplaylist': True, 'skip_download': True}) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    def _options(self, format_spec: str) -> dict:
+        return {
+            'format': format_spec,
             'outtmpl': os.path.join(self.output_dir, '%(title)s.%(ext)s'),
             'noplaylist': True,
+            # Fetch DASH/HLS fragments in parallel.
+            'concurrent_fragment_downloads': self.fragment_workers,
             # Allow downloading remote components to solve challenges (e.g. 'n' parameter)
             'remote_components': ['ejs:github'],
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info)
-            return os.path.abspath(filename)
+
+class DownloadStream:
+    """
+    A download read as byte chunks while it is in progress.
+    Iterating runs command (yt-dlp writing the file to stdout) and yields what it writes;
+    every chunk is also appended to path + ".part", which is renamed to path and added to the
+    cache once the download completes. Without a command the finished file at path is read.
+    Iterate only once.
+    """
+
+    def __init__(self, path: str, command: Optional[List[str]] = None, cache: Optional[ArtifactCache] = None, cache_key: Optional[str] = None, chunk_size: int = 256 * 1024):
+        self.path = path
+        self.command = command
+        self.cache = cache
+        self.cache_key = cache_key
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    @property
+    def cache_hit(self) -> bool:
+        # Without a command the file was already on disk (replayed from the cache).
+        return self.command is None
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.command is None:
+            with open(self.path, "rb") as f:
+                for data in iter(lambda: f.read(self.chunk_size), b""):
+                    self.bytes_read += len(data)
+                    yield data
+            return
+
+        part_path = f"{self.path}.part"
+        process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finished = False
+        try:
+            with open(part_path, "wb") as f:
+                for data in iter(lambda: process.stdout.read1(self.chunk_size), b""):
+                    f.write(data)
+                    self.bytes_read += len(data)
+                    yield data
+            finished = True
+        finally:
+            if not finished:
+                process.kill()
+            stderr = process.stderr.read()
+            returncode = process.wait()
+
+        if returncode != 0:
+            from yt_dlp.utils import DownloadError
+
+            raise DownloadError(stderr.decode(errors="replace").strip() or f"yt-dlp exited with code {returncode}")
+        os.replace(part_path, self.path)
+        if self.cache_key is not None:
+            self.cache.put_file(self.cache_key, self.path)
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+JOB_STAGES = ("download", "extract", "transcribe", "translate", "summarize", "embed")
+
+
+def _normalize(params: dict) -> dict:
+    # Round-trip through JSON so tuples and lists compare equal after a reload.
+    return json.loads(json.dumps(params, sort_keys=True))
+
+
+class JobManifest:
+    """
+    Persistent record of one job's progress, kept as JSON in job_dir.
+    Every completed stage stores the parameters it ran with and its outputs; batched stages
+    also store the result of every finished unit of work (see StageCheckpoint). Rerunning
+    the same job skips completed stages and resumes batched ones where they stopped.
+    The file is rewritten atomically after every change, so a killed process leaves a valid manifest.
+    Unit results go to an append-only file per stage instead, so they are written once each.
+    """
+
+    def __init__(self, job_dir: str, key: str):
+        self.key = key
+        self.job_id = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        self.job_dir = job_dir
+        self.path = os.path.join(job_dir, f"{self.job_id}.json")
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self.data = self._load()
+
+    @classmethod
+    def for_url(cls, output_dir: str, url: str) -> "JobManifest":
+        return cls(os.path.join(output_dir, ".jobs"), url)
+
+    def file_path(self, name: str) -> str:
+        """
+        Path for an auxiliary file that belongs to this job, e.g. the raw transcript.
+        """
+        return os.path.join(self.job_dir, f"{self.job_id}.{name}")
+
+    def completed(self, stage: str, **params) -> Optional[Dict[str, Any]]:
+        """
+        Returns the outputs of stage if it completed with the same params and every output
+        file (keys ending in "_path") still exists; otherwise None.
+        """
+        with self._lock:
+            entry = self.data["stages"].get(stage)
+            if entry is None or entry["params"] != _normalize(params):
+                return None
+            outputs = dict(entry["outputs"])
+        for key, value in outputs.items():
+            if key.endswith("_path") and value and not os.path.exists(value):
+                return None
+        return outputs
+
+    def complete(self, stage: str, outputs: Dict[str, Any], **params):
+        """
+        Records stage as done. Later stages ran on the previous outputs, so they are forgotten.
+        """
+        with self._lock:
+            stages = self.data["stages"]
+            stages[stage] = {"params": _normalize(params), "outputs": outputs, "completed": time.time()}
+            if stage in JOB_STAGES:
+                for later in JOB_STAGES[JOB_STAGES.index(stage) + 1:]:
+                    stages.pop(later, None)
+                    self._drop_results(later)
+            self._drop_results(stage)
+            self._save()
+
+    def checkpoint(self, stage: str, **params) -> "StageCheckpoint":
+        """
+        Returns the per-unit results store for a batched stage. Results recorded under
+        different params are discarded.
+        """
+        with self._lock:
+            entry = self.data["batches"].get(stage)
+            if entry is None or entry["params"] != _normalize(params):
+                self._drop_results(stage)
+                self.data["batches"][stage] = {"params": _normalize(params)}
+                self._save()
+        return StageCheckpoint(self, stage)
+
+    def clear(self):
+        with self._lock:
+            for stage in set(JOB_STAGES) | set(self.data["batches"]):
+                self._drop_results(stage)
+            self.data = self._empty()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _results_path(self, stage: str) -> str:
+        return self.file_path(f"{stage}.checkpoint.jsonl")
+
+    def _load_results(self, stage: str) -> Dict[str, Any]:
+        """
+        The unit results of a batched stage, read from its file on first use. Caller holds the lock.
+        """
+        results = self._results.get(stage)
+        if results is not None:
+            return results
+        results = self._results[stage] = {}
+        damaged = False
+        try:
+            with open(self._results_path(stage), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        results.update(json.loads(line))
+                    except ValueError:
+                        # A write cut short by a crash; those units are redone.
+                        damaged = True
+        except OSError:
+            pass
+        if damaged:
+            # Rewritten whole, so later appends do not land on a broken line.
+            tmp_path = f"{self._results_path(stage)}.part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(results, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self._results_path(stage))
+        return results
+
+    def _append_results(self, stage: str, items: Dict[str, Any]):
+        """
+        Records finished units with a single append. Caller holds the lock.
+        """
+        self._load_results(stage).update(items)
+        os.makedirs(self.job_dir, exist_ok=True)
+        with open(self._results_path(stage), "a", encoding="utf-8") as f:
+            f.write(json.dumps(items, ensure_ascii=False) + "\n")
+
+    def _drop_results(self, stage: str):
+        """
+        Forgets a batched stage and its unit results. Caller holds the lock.
+        """
+        self.data["batches"].pop(stage, None)
+        self._results.pop(stage, None)
+        if os.path.exists(self._results_path(stage)):
+            os.remove(self._results_path(stage))
+
+    def _empty(self) -> dict:
+        return {"key": self.key, "created": time.time(), "stages": {}, "batches": {}}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self._empty()
+        if data.get("key") != self.key:
+            return self._empty()
+        data.setdefault("stages", {})
+        data.setdefault("batches", {})
+        return data
+
+    def _save(self):
+        """
+        Writes the manifest atomically. Caller holds the lock.
+        """
+        os.makedirs(self.job_dir, exist_ok=True)
+        tmp_path = f"{self.path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class StageCheckpoint:
+    """
+    Results of the finished units of one batched stage (translated lines, partial summaries),
+    keyed by the caller. Every put is appended to the stage's results file before it returns;
+    the manifest itself only records which params the results belong to.
+    """
+
+    def __init__(self, manifest: JobManifest, stage: str):
+        self.manifest = manifest
+        self.stage = stage
+
+    def _results(self) -> dict:
+        return self.manifest._load_results(self.stage)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.manifest._lock:
+            return self._results().get(key)
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, Any]:
+        with self.manifest._lock:
+            results = self._results()
+            return {key: results[key] for key in keys if key in results}
+
+    def put(self, key: str, value: Any):
+        self.put_many({key: value})
+
+    def put_many(self, items: Dict[str, Any]):
+        if not items:
+            return
+        with self.manifest._lock:
+            self.manifest._append_results(self.stage, items)
+
+    def __len__(self) -> int:
+        with self.manifest._lock:
+            return len(self._results())
@@ -1,47 +1,427 @@
 from abc import ABC, abstractmethod
-import ollama
+import asyncio
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 4
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """
+    Raised when an LLM request fails for good (after any retries).
+    """
+
+
+class LLMRateLimitError(LLMError):
+    """
+    Raised when the provider keeps rate-limiting a request after every retry.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """
+    Raised when a request keeps exceeding its timeout after every retry.
+    """
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (about four characters per token) used for budgeting prompts.
+    """
+    return len(text) // 4 + 1
+
+
+# All async LLM traffic runs on one background event loop, so synchronous callers on any
+# thread share the same pooled connections and in-flight limits.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine on the shared LLM event loop and blocks until it finishes.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+_STREAM_END = object()
+
+
+def stream_sync(stream: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Iterates an async stream on the shared LLM event loop from synchronous code.
+    Items are handed over through a queue as they arrive; errors are re-raised here.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in stream:
+                items.put((item, None))
+            items.put((_STREAM_END, None))
+        except BaseException as e:
+            items.put((_STREAM_END, e))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _background_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
+
+
+class StreamTimer:
+    """
+    Wraps a text stream and measures time-to-first-token and throughput.
+    Tokens are estimated from the streamed text with estimate_tokens().
+    """
+
+    def __init__(self, stream: Iterator[str]):
+        self.stream = stream
+        self.parts = []
+        self.started = None
+        self.first_token_at = None
+        self.finished = None
+
+    def __iter__(self) -> Iterator[str]:
+        self.started = time.perf_counter()
+        for chunk in self.stream:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.parts.append(chunk)
+            yield chunk
+        self.finished = time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def time_to_first_token(self) -> float:
+        return (self.first_token_at or self.finished or self.started) - self.started
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text) if self.parts else 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        if self.first_token_at is None or self.finished is None:
+            return 0.0
+        # Generation rate after the first token; a response delivered in one piece is timed end to end.
+        start = self.first_token_at if len(self.parts) > 1 else self.started
+        return self.tokens / (self.finished - start) if self.finished > start else 0.0
+
 
 class LLMClient(ABC):
-    @abstractmethod
+    """
+    Base class for LLM providers.
+    Subclasses implement agenerate() and, if the provider can stream, agenerate_stream();
+    generate() and generate_stream() are blocking wrappers around them.
+    """
+
     def generate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        return run_sync(self.agenerate(prompt, system_prompt=system_prompt))
+
+    def generate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> Iterator[str]:
+        """
+        Yields the response in pieces as the provider produces them.
+        """
+        return stream_sync(self.agenerate_stream(prompt, system_prompt=system_prompt))
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
         pass
 
-class OllamaClient(LLMClient):
-    def __init__(self, model: str = "llama3"):
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        # Providers without streaming deliver the whole response as one piece.
+        yield await self.agenerate(prompt, system_prompt=system_prompt)
+
+
+class HTTPLLMClient(LLMClient):
+    """
+    LLM client for a JSON-over-HTTP chat API.
+    Requests go through one pooled httpx session per (provider, base URL), at most
+    max_in_flight at a time per client. Timeouts, connection errors, 429s and 5xx
+    responses are retried with exponential backoff (honouring Retry-After).
+    """
+
+    provider = "http"
+    _sessions: Dict[tuple, httpx.AsyncClient] = {}
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        headers: Optional[dict] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = 1.0,
+    ):
+        self.base_url = base_url.rstrip("/")
         self.model = model
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
 
-    def generate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+    def _session(self) -> httpx.AsyncClient:
+        # Sessions are bound to the loop they were created on; normally that is the shared background loop.
+        key = (self.provider, self.base_url, asyncio.get_running_loop())
+        session = self._sessions.get(key)
+        if session is None or session.is_closed:
+            session = httpx.AsyncClient(limits=httpx.Limits(max_connections=32, max_keepalive_connections=16))
+            self._sessions[key] = session
+        return session
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        data = await self._post(self._chat_path(), self._chat_payload(self._messages(prompt, system_prompt)))
+        return self._parse_content(data)
+
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        payload = self._chat_payload(self._messages(prompt, system_prompt), stream=True)
+        async for line in self._post_stream(self._chat_path(), payload):
+            piece = self._parse_stream_line(line)
+            if piece:
+                yield piece
+
+    @staticmethod
+    def _messages(prompt: str, system_prompt: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _slot(self) -> asyncio.Semaphore:
+        return self._semaphores.setdefault(asyncio.get_running_loop(), asyncio.Semaphore(self.max_in_flight))
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        async with self._slot():
+            response = await self._request(path, payload)
+            try:
+                return response.json()
+            except ValueError as e:
+                raise LLMError(f"{self.provider} returned invalid JSON") from e
+
+    async def _post_stream(self, path: str, payload: dict) -> AsyncIterator[str]:
+        """
+        Yields the non-empty lines of a streamed response. Only opening the stream is retried;
+        once data has arrived a failure is raised rather than replayed.
+        """
+        async with self._slot():
+            response = await self._request(path, payload, stream=True)
+            try:
+                async for line in response.aiter_lines():
+                    if line:
+                        yield line
+            except httpx.TimeoutException as e:
+                raise LLMTimeoutError(f"{self.provider} stream stalled for more than {self.timeout}s") from e
+            except httpx.TransportError as e:
+                raise LLMError(f"{self.provider} stream broke off: {e}") from e
+            finally:
+                await response.aclose()
+
+    async def _request(self, path: str, payload: dict, stream: bool = False) -> httpx.Response:
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                session = self._session()
+                request = session.build_request("POST", url, json=payload, headers=self.headers, timeout=self.timeout)
+                response = await session.send(request, stream=stream)
+            except httpx.TimeoutException as e:
+                if last:
+                    raise LLMTimeoutError(f"{self.provider} request timed out after {self.timeout}s") from e
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            except httpx.TransportError as e:
+                if last:
+                    raise LLMError(f"Could not reach {self.provider} at {self.base_url}: {e}") from e
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if response.status_code < 400:
+                return response
+            if stream:
+                await response.aread()
+                await response.aclose()
+
+            retry_after = self._retry_after(response)
+            if response.status_code not in RETRYABLE_STATUS or last:
+                message = f"{self.provider} returned HTTP {response.status_code}: {response.text[:500]}"
+                if response.status_code == 429:
+                    raise LLMRateLimitError(message, retry_after=retry_after)
+                raise LLMError(message)
+            await asyncio.sleep(retry_after if retry_after is not None else self._delay(attempt))
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            return None
+
+    @abstractmethod
+    def _chat_path(self) -> str:
+        pass
+
+    @abstractmethod
+    def _chat_payload(self, messages: list, stream: bool = False) -> dict:
+        pass
+
+    @abstractmethod
+    def _parse_content(self, data: dict) -> str:
+        pass
+
+    @abstractmethod
+    def _parse_stream_line(self, line: str) -> Optional[str]:
+        """
+        Returns the text carried by one line of a streamed response, or None if it carries none.
+        """
+        pass
+
+
+class OllamaClient(HTTPLLMClient):
+    provider = "ollama"
+
+    def __init__(self, model: str = "llama3", host: Optional[str] = None, **kwargs):
+        host = host or os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        if "://" not in host:
+            host = f"http://{host}"
+        super().__init__(host, model, **kwargs)
+
+    def _chat_path(self) -> str:
+        return "/api/chat"
+
+    def _chat_payload(self, messages: list, stream: bool = False) -> dict:
+        return {"model": self.model, "messages": messages, "stream": stream}
+
+    def _parse_content(self, data: dict) -> str:
+        try:
+            return data["message"]["content"]
+        except (KeyError, TypeError) as e:
+            raise LLMError(f"Unexpected response from Ollama: {data}") from e
+
+    def _parse_stream_line(self, line: str) -> Optional[str]:
+        # Ollama streams one JSON object per line; the last one has "done": true.
         try:
-            response = ollama.chat(model=self.model, messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': prompt},
-            ])
-            return response['message']['content']
-        except Exception as e:
-            return f"Error with Ollama: {str(e)}"
-
-class OpenAIClient(LLMClient):
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
+            data = json.loads(line)
+        except ValueError as e:
+            raise LLMError(f"Unexpected stream line from Ollama: {line[:200]}") from e
+        if data.get("error"):
+            raise LLMError(f"Ollama stream failed: {data['error']}")
+        return (data.get("message") or {}).get("content")
+
+
+class OpenAIClient(HTTPLLMClient):
+    provider = "openai"
+
+    def __init__(self, api_key: Optional[str], model: str = "gpt-4o", base_url: Optional[str] = None, **kwargs):
         self.api_key = api_key
-        self.model = model
+        base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        super().__init__(base_url, model, headers={"Authorization": f"Bearer {api_key}"}, **kwargs)
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        self._check_key()
+        return await super().agenerate(prompt, system_prompt=system_prompt)
+
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        self._check_key()
+        async for piece in super().agenerate_stream(prompt, system_prompt=system_prompt):
+            yield piece
+
+    def _check_key(self):
+        if not self.api_key:
+            raise LLMError("OpenAI API key not set. Please set OPENAI_API_KEY.")
+
+    def _chat_path(self) -> str:
+        return "/chat/completions"
+
+    def _chat_payload(self, messages: list, stream: bool = False) -> dict:
+        payload = {"model": self.model, "messages": messages}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _parse_content(self, data: dict) -> str:
         try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=api_key)
-        except ImportError:
-            self.client = None
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Unexpected response from OpenAI: {data}") from e
+
+    def _parse_stream_line(self, line: str) -> Optional[str]:
+        # Server-sent events: "data: {...}" per chunk, terminated by "data: [DONE]".
+        if not line.startswith("data:"):
+            return None
+        body = line[len("data:"):].strip()
+        if body == "[DONE]":
+            return None
+        try:
+            choices = json.loads(body).get("choices") or []
+            # Usage-only chunks arrive with no choices.
+            return choices[0]["delta"].get("content") if choices else None
+        except (ValueError, KeyError, AttributeError, TypeError) as e:
+            raise LLMError(f"Unexpected stream chunk from OpenAI: {body[:200]}") from e
+
+
+def create_client(provider: str, model: str, **kwargs) -> LLMClient:
+    """
+    Builds the LLM client for a provider name ("ollama" or "openai").
+    Extra keyword arguments (timeout, max_in_flight, max_retries) go to the client.
+    """
+    if provider == "openai":
+        return OpenAIClient(api_key=os.getenv("OPENAI_API_KEY"), model=model, **kwargs)
+    return OllamaClient(model=model, **kwargs)
+
+
+async def _close_sessions():
+    loop = asyncio.get_running_loop()
+    for key, session in list(HTTPLLMClient._sessions.items()):
+        if key[2] is loop:
+            await session.aclose()
 
-    def generate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
-        if not self.client:
-            return "OpenAI client not initialized. Please install 'openai' package."
 
+@atexit.register
+def _shutdown():
+    if _loop is not None and _loop.is_running():
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error with OpenAI: {str(e)}"
+            asyncio.run_coroutine_threadsafe(_close_sessions(), _loop).result(timeout=5)
+        except Exception:
+            pass
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from src.core.cache import DEFAULT_CACHE_DIR
+from src.core.llm import LLMClient
+
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "llm.sqlite")
+DEFAULT_MAX_SIZE = 512 * 1024 ** 2  # 512 MB per table
+# Eviction trims a full table to this fraction of max_size, so it does not run on every write.
+LOW_WATER = 0.9
+
+
+class _SQLiteStore(ABC):
+    """
+    Shared plumbing for the SQLite-backed LLM stores: one connection guarded by a lock,
+    hit/miss counters and least-recently-used eviction once a table exceeds max_size bytes.
+    The table's size is kept as a running total, so writes do not scan the table.
+    """
+
+    table = ""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_size: int = DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._create()
+        self._size = self._table_size()
+
+    @abstractmethod
+    def _create(self):
+        """
+        Creates the store's table (with a size and a last_access column) if it does not exist.
+        """
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size": size}
+
+    def _table_size(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict(self, batch: int = 256):
+        """
+        Once the table exceeds max_size, deletes least-recently-used rows (in batches, through
+        the last_access index) until it is down to LOW_WATER of max_size. Caller holds the lock.
+        """
+        if self._size <= self.max_size:
+            return
+        # Other processes may share the file, so the running total is only trusted to trigger this.
+        self._size = self._table_size()
+        target = int(self.max_size * LOW_WATER)
+        while self._size > target:
+            rows = self._conn.execute(f"SELECT rowid, size FROM {self.table} ORDER BY last_access LIMIT ?", (batch,)).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for rowid, size in rows:
+                if self._size <= target:
+                    break
+                doomed.append((rowid,))
+                self._size -= size
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE rowid = ?", doomed)
+            if len(doomed) < len(rows):
+                break
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache(_SQLiteStore):
+    """
+    Persistent cache of LLM responses keyed on provider, model, system prompt and prompt.
+    """
+
+    table = "responses"
+
+    def _create(self):
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, prompt: str) -> str:
+        h = hashlib.sha256()
+        for part in (provider, model, system_prompt, prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def delete(self, key: str):
+        with self._lock:
+            row = self._conn.execute("DELETE FROM responses WHERE key = ? RETURNING size", (key,)).fetchone()
+            if row:
+                self._size -= row[0]
+
+    def put(self, key: str, response: str):
+        size = len(key) + len(response.encode("utf-8"))
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._size += size - (row[0] if row else 0)
+            self._evict()
+
+
+class TranslationMemory(_SQLiteStore):
+    """
+    Persistent segment-level translation memory keyed on (source text, target language).
+    Lets repeated lines such as intros, outros or "[Music]" be filled in without an LLM call.
+    """
+
+    table = "translations"
+
+    def _create(self):
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source TEXT NOT NULL, target_language TEXT NOT NULL, translation TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (source, target_language))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_access ON translations (last_access)")
+
+    def lookup(self, texts: Iterable[str], target_language: str) -> Dict[str, str]:
+        """
+        Returns {source: translation} for every text already in memory.
+        Hits and misses are counted per distinct text.
+        """
+        unique = list(dict.fromkeys(texts))
+        language = target_language.lower()
+        found = {}
+        with self._lock:
+            # Query in slices to stay under SQLite's bound-parameter limit.
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT source, translation FROM translations WHERE target_language = ? AND source IN ({placeholders})",
+                    (language, *chunk),
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translations SET last_access = ? WHERE source = ? AND target_language = ?",
+                    [(now, source, language) for source in found],
+                )
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def store(self, pairs: Iterable[Tuple[str, str]], target_language: str):
+        """
+        Records (source, translation) pairs for target_language.
+        """
+        language = target_language.lower()
+        now = time.time()
+        rows = [
+            (source, language, translation, len(source.encode("utf-8")) + len(translation.encode("utf-8")), now)
+            for source, translation in pairs
+        ]
+        if not rows:
+            return
+        with self._lock:
+            replaced = 0
+            sources = list(dict.fromkeys(row[0] for row in rows))
+            for start in range(0, len(sources), 500):
+                chunk = sources[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM translations WHERE target_language = ? AND source IN ({placeholders})",
+                    (language, *chunk),
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (source, target_language, translation, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            # A source repeated within rows keeps only its last translation.
+            self._size += sum({row[0]: row[3] for row in rows}.values()) - replaced
+            self._evict()
+
+
+class CachedLLMClient(LLMClient):
+    """
+    Wraps an LLMClient and answers repeated prompts from a ResponseCache.
+    Only successful responses are cached; errors propagate uncached.
+    """
+
+    def __init__(self, client: LLMClient, cache: ResponseCache):
+        self.client = client
+        self.cache = cache
+        self.provider = getattr(client, "provider", type(client).__name__)
+        self.model = getattr(client, "model", "")
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        key = self.cache.make_key(self.provider, self.model, system_prompt, prompt)
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        response = await self.client.agenerate(prompt, system_prompt=system_prompt)
+        self.cache.put(key, response)
+        return response
+
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        key = self.cache.make_key(self.provider, self.model, system_prompt, prompt)
+        response = self.cache.get(key)
+        if response is not None:
+            yield response
+            return
+        parts = []
+        async for piece in self.client.agenerate_stream(prompt, system_prompt=system_prompt):
+            parts.append(piece)
+            yield piece
+        # Only a stream that ran to completion is cached.
+        self.cache.put(key, "".join(parts))
+
+    def forget(self, prompt: str, system_prompt: str = "You are a helpful assistant."):
+        """
+        Drops a cached response the caller found unusable, so the next run asks the LLM again.
+        """
+        self.cache.delete(self.cache.make_key(self.provider, self.model, system_prompt, prompt))
+
+
+def open_llm_stores(cache_dir: str = DEFAULT_CACHE_DIR) -> Tuple[ResponseCache, TranslationMemory]:
+    """
+    Opens the response cache and translation memory that live in cache_dir/llm.sqlite.
+    """
+    path = os.path.join(cache_dir, "llm.sqlite")
+    return ResponseCache(path), TranslationMemory(path)
@@ -0,0 +1,229 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from src.core.llm import LLMClient, estimate_tokens
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGE_NAMES = ("download", "extract", "transcribe", "translate", "summarize", "embed")
+
+_RSS_INTERVAL = 0.05
+
+
+def _max_rss() -> int:
+    """
+    Peak resident set size of this process so far, in bytes (0 if unknown).
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _max_rss()
+
+
+def _cpu_seconds() -> float:
+    # Includes waited-for child processes such as ffmpeg.
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class StageRecord:
+    """
+    Measurements for one stage: wall time, CPU time, peak RSS and stage-specific counters
+    (bytes, audio_seconds, requests, prompt_tokens, completion_tokens, ...).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+        self.counters: Dict[str, float] = {}
+        self.profile_path: Optional[str] = None
+
+    def record(self, **counters: float):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def throughput(self) -> Dict[str, float]:
+        """
+        Rates derived from the counters: bytes/sec, Whisper's real-time factor and LLM tokens/sec.
+        """
+        rates = {}
+        if self.wall_seconds <= 0:
+            return rates
+        if "bytes" in self.counters:
+            rates["bytes_per_second"] = self.counters["bytes"] / self.wall_seconds
+        if self.counters.get("audio_seconds"):
+            # Below 1.0 means faster than real time.
+            rates["real_time_factor"] = self.wall_seconds / self.counters["audio_seconds"]
+        if "completion_tokens" in self.counters:
+            rates["tokens_per_second"] = self.counters["completion_tokens"] / self.wall_seconds
+        return rates
+
+    def to_dict(self) -> dict:
+        data = {
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            **self.counters,
+            **self.throughput(),
+        }
+        if self.profile_path:
+            data["profile"] = self.profile_path
+        return data
+
+
+class MeteredLLMClient(LLMClient):
+    """
+    Wraps an LLMClient and counts requests and estimated prompt/completion tokens.
+    Wrap the provider client itself (inside any cache) so cache hits are not counted as requests.
+    """
+
+    def __init__(self, client: LLMClient):
+        self.client = client
+        self.provider = getattr(client, "provider", type(client).__name__)
+        self.model = getattr(client, "model", "")
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        response = await self.client.agenerate(prompt, system_prompt=system_prompt)
+        self._count(prompt, system_prompt, response)
+        return response
+
+    async def agenerate_stream(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> AsyncIterator[str]:
+        parts = []
+        async for piece in self.client.agenerate_stream(prompt, system_prompt=system_prompt):
+            parts.append(piece)
+            yield piece
+        self._count(prompt, system_prompt, "".join(parts))
+
+    def _count(self, prompt: str, system_prompt: str, response: str):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += estimate_tokens(system_prompt) + estimate_tokens(prompt)
+            self.completion_tokens += estimate_tokens(response)
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens}
+
+
+class RunMetrics:
+    """
+    Collects per-stage measurements for one run and writes them as a JSON report or in
+    Prometheus text format. If profile_stage names a stage, that stage also runs under
+    cProfile and the stats are saved to profile_dir. cProfile records every thread of the
+    process, so LLM requests served on the shared event loop are in the profile along with the
+    waits for them; work done in worker processes (parallel transcription) is not.
+    """
+
+    def __init__(self, profile_stage: Optional[str] = None, profile_dir: str = "."):
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.stages: List[StageRecord] = []
+        self.info: Dict[str, object] = {}
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name: str, llm: Optional[MeteredLLMClient] = None) -> Iterator[StageRecord]:
+        """
+        Measures the body of the with-block as stage `name`. Counters can be added with
+        record(); with llm given, the requests and tokens it served meanwhile are added too.
+        """
+        record = StageRecord(name)
+        llm_before = llm.counters() if llm is not None else None
+
+        peak = [_current_rss()]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(_RSS_INTERVAL):
+                peak[0] = max(peak[0], _current_rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Only one profiler can run per process, e.g. when daemon jobs overlap.
+                print(f"Warning: Not profiling {name}: {e}")
+                profiler = None
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.wall_seconds = time.perf_counter() - wall_start
+            record.cpu_seconds = _cpu_seconds() - cpu_start
+            done.set()
+            sampler.join()
+            record.peak_rss_bytes = max(peak[0], _current_rss())
+            if llm_before is not None:
+                after = llm.counters()
+                record.record(**{key: after[key] - llm_before[key] for key in after})
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record.profile_path = os.path.join(self.profile_dir, f"profile_{name}.prof")
+                profiler.dump_stats(record.profile_path)
+            self.stages.append(record)
+
+    def report(self) -> dict:
+        return {
+            **self.info,
+            "started": self.started,
+            "total_seconds": sum(stage.wall_seconds for stage in self.stages),
+            "peak_rss_bytes": _max_rss(),
+            "stages": {stage.name: stage.to_dict() for stage in self.stages},
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_prometheus(self, path: str, prefix: str = "video_summarizer"):
+        """
+        Writes one gauge per stage measurement in the Prometheus text exposition format,
+        e.g. for node_exporter's textfile collector.
+        """
+        series: Dict[str, List[str]] = {}
+        for stage in self.stages:
+            for key, value in stage.to_dict().items():
+                if isinstance(value, (int, float)):
+                    series.setdefault(key, []).append(f'{prefix}_stage_{key}{{stage="{stage.name}"}} {value}')
+        lines = []
+        for key, samples in series.items():
+            lines.append(f"# TYPE {prefix}_stage_{key} gauge")
+            lines.extend(samples)
+        lines.append(f"# TYPE {prefix}_peak_rss_bytes gauge")
+        lines.append(f"{prefix}_peak_rss_bytes {_max_rss()}")
+        # Write atomically so a scraper never sees a half-written file.
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
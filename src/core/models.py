@@ -0,0 +1,200 @@
+import dataclasses
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# Rough fp32 footprint of each Whisper checkpoint, used to make room before a load.
+# The real size is measured from the parameters once the model is in memory.
+ESTIMATED_MODEL_BYTES = {
+    "tiny": 151 * 1024 ** 2,
+    "base": 290 * 1024 ** 2,
+    "small": 967 * 1024 ** 2,
+    "medium": 3 * 1024 ** 3,
+    "large": 6 * 1024 ** 3,
+    "turbo": 3 * 1024 ** 3,
+}
+DEFAULT_MAX_MEMORY = int(float(os.getenv("VIDEO_SUMMARIZER_MODEL_MEMORY_GB", "8")) * 1024 ** 3)
+
+
+@dataclass(frozen=True)
+class WhisperProfile:
+    """
+    How Whisper runs on the CPU, traded between throughput and accuracy.
+    quantize converts the linear layers to dynamic int8; threads sets torch's intra-op threads
+    for the process (0 leaves it alone, or lets a worker pool split the CPU evenly). The thread
+    count is process-wide, so in a shared process (the daemon) the first profile to set it wins;
+    a Whisper worker pool sets it in each of its workers. The other fields are Whisper's decode
+    options: beam_size/best_of (None: greedy), the temperatures to fall back through when a
+    window decodes badly (one value: no fallback), and whether each window is prompted with
+    the previous window's text.
+    The defaults are Whisper's own defaults.
+    """
+    name: str = "accurate"
+    quantize: bool = False
+    threads: int = 0
+    beam_size: Optional[int] = None
+    best_of: Optional[int] = None
+    temperature: Tuple[float, ...] = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+    condition_on_previous_text: bool = True
+
+    def decode_options(self) -> Dict[str, Any]:
+        """
+        Keyword arguments for model.transcribe(); only settings that differ from Whisper's defaults.
+        """
+        options = self.cache_params()
+        options.pop("quantize", None)
+        if "temperature" in options:
+            options["temperature"] = self.temperature if len(self.temperature) > 1 else self.temperature[0]
+        if self.quantize:
+            options["fp16"] = False  # quantized models only run on the CPU, in fp32
+        return options
+
+    def cache_params(self) -> Dict[str, Any]:
+        """
+        The settings that change Whisper's output and differ from the defaults, for cache and
+        checkpoint keys. Empty for the default profile, so its keys match earlier runs.
+        """
+        default = WhisperProfile()
+        return {
+            field.name: getattr(self, field.name)
+            for field in dataclasses.fields(self)
+            if field.name not in ("name", "threads") and getattr(self, field.name) != getattr(default, field.name)
+        }
+
+
+WHISPER_PROFILES = {
+    # Whisper's defaults: fp32, greedy decoding with the full temperature fallback.
+    "accurate": WhisperProfile(),
+    # Beam search for the last bit of accuracy, at several times the decoding cost.
+    "beam": WhisperProfile(name="beam", beam_size=5, best_of=5),
+    # int8 linear layers and a shorter fallback ladder.
+    "balanced": WhisperProfile(name="balanced", quantize=True, temperature=(0.0, 0.4, 0.8)),
+    # int8, no fallback and no cross-window prompting: the most throughput per core.
+    "fast": WhisperProfile(name="fast", quantize=True, temperature=(0.0,), condition_on_previous_text=False),
+}
+
+
+def resolve_profile(name: str = "accurate", **overrides) -> WhisperProfile:
+    """
+    Returns the named profile with overrides applied; None values are ignored.
+    temperature may be a number, a sequence or a comma-separated string such as "0,0.2,0.4".
+    """
+    if name not in WHISPER_PROFILES:
+        raise ValueError(f"Unknown Whisper profile: {name} (expected one of {', '.join(WHISPER_PROFILES)})")
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    unknown = set(overrides) - {field.name for field in dataclasses.fields(WhisperProfile)} - {"name"}
+    if unknown:
+        raise ValueError(f"Unknown Whisper profile settings: {', '.join(sorted(unknown))}")
+    temperature = overrides.get("temperature")
+    if isinstance(temperature, str):
+        temperature = [part for part in temperature.split(",") if part.strip()]
+    if temperature is not None:
+        try:
+            overrides["temperature"] = tuple(float(value) for value in (temperature if isinstance(temperature, (list, tuple)) else [temperature]))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid temperature: {overrides['temperature']} (expected numbers such as 0 or 0,0.4,0.8)")
+    return dataclasses.replace(WHISPER_PROFILES[name], **overrides)
+
+
+def quantize_model(model):
+    """
+    Converts the model's linear layers to dynamically quantized int8 in place: weights are
+    stored as int8 and activations are quantized on the fly, so the layers take a quarter of
+    the memory and run faster on CPUs with int8 matrix instructions.
+    """
+    import torch
+    import whisper.model
+
+    # Whisper's Linear subclass only casts weights to the input dtype (for fp16), which is a
+    # no-op on the CPU; torch only quantizes plain nn.Linear modules.
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _model_bytes(model) -> int:
+    size = sum(p.numel() * p.element_size() for p in model.parameters())
+    # Dynamically quantized layers keep their int8 weights outside model.parameters().
+    for module in model.modules():
+        weight = getattr(module, "weight", None)
+        if callable(weight):
+            size += weight().numel()
+    return size
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded Whisper models.
+    Each model size is loaded on first use and shared by every caller afterwards.
+    When loading a model would exceed max_memory bytes, the least-recently-used
+    models are dropped first.
+    """
+
+    def __init__(self, max_memory: int = DEFAULT_MAX_MEMORY):
+        self.max_memory = max_memory
+        self._models = OrderedDict()  # model_size -> (model, bytes), oldest first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, model_size: str, quantize: bool = False):
+        """
+        Returns the Whisper model for model_size, loading it if needed.
+        With quantize, returns an int8 CPU copy (see quantize_model), held as "<size>-int8".
+        """
+        key = f"{model_size}-int8" if quantize else model_size
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Serialize loads of the same size so concurrent callers don't load it twice.
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+                self._make_room(ESTIMATED_MODEL_BYTES.get(model_size, 0) // (4 if quantize else 1))
+
+            print(f"Loading Whisper model: {key}...")
+            # Imported here so that loading this module does not pull in whisper and torch.
+            import whisper
+
+            if quantize:
+                model = quantize_model(whisper.load_model(model_size, device="cpu"))
+            else:
+                model = whisper.load_model(model_size)
+            size = _model_bytes(model)
+
+            with self._lock:
+                self._models[key] = (model, size)
+                self._make_room(0)
+            return model
+
+    def evict(self, model_size: str, quantize: bool = False):
+        """
+        Drops a model from the registry. Callers still holding it keep it alive.
+        """
+        with self._lock:
+            self._models.pop(f"{model_size}-int8" if quantize else model_size, None)
+
+    def loaded(self) -> dict:
+        """
+        Returns {model_size: bytes} for the models currently held, oldest first.
+        """
+        with self._lock:
+            return {name: size for name, (_, size) in self._models.items()}
+
+    def _make_room(self, incoming: int):
+        total = sum(size for _, size in self._models.values())
+        # Always keep the most recently used model; a single model larger than
+        # the budget is still allowed.
+        while self._models and total + incoming > self.max_memory and len(self._models) > (0 if incoming else 1):
+            _, (_, size) = self._models.popitem(last=False)
+            total -= size
+
+
+default_registry = ModelRegistry()
@@ -0,0 +1,315 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from src.core.cache import ArtifactCache
+from src.core.jobs import JobManifest
+from src.core.downloader import VideoDownloader
+from src.core.audio import AudioProcessor
+from src.core.transcriber import create_worker_pool, transcription_cache_key, worker_transcribe
+from src.core.transcript import Transcript
+from src.core.llm import LLMClient
+from src.core.llm_cache import CachedLLMClient, ResponseCache, TranslationMemory
+from src.core.metrics import MeteredLLMClient, RunMetrics
+from src.core.models import WhisperProfile
+from src.core.search import SearchIndex
+from src.core import stages
+
+STAGES = ("download", "extract", "transcribe", "summarize")
+
+_SENTINEL = object()
+
+
+@dataclass
+class BatchItem:
+    url: str
+    video_path: Optional[str] = None
+    audio_path: Optional[str] = None
+    srt_path: Optional[str] = None
+    translation_path: Optional[str] = None
+    translated_srt_path: Optional[str] = None
+    summary_path: Optional[str] = None
+    transcript: Optional[Transcript] = None
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+    job: Optional[JobManifest] = None
+    metrics: RunMetrics = field(default_factory=RunMetrics)
+    metrics_path: Optional[str] = None
+
+
+class BatchPipeline:
+    """
+    Runs several videos through download -> extract -> transcribe -> summarize as a
+    staged pipeline. Every stage has its own worker pool and hands items to the next
+    stage through a bounded queue, so video N+1 downloads while video N transcribes.
+    Download, extract and LLM work run on threads; Whisper runs in worker processes.
+    Each video has a job manifest, so rerunning a batch skips the stages (and the translated
+    lines and partial summaries) that an interrupted run already finished, unless resume is off.
+    Each video also gets a run report like the one `process` writes. Stages of different videos
+    overlap, so a stage's CPU time and peak RSS are those of the whole process while it ran.
+    LLM requests are metered per video, inside response_cache so its hits are not counted.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        output_dir: str = "output",
+        model_size: str = "base",
+        task: str = "transcribe",
+        target_language: Optional[str] = None,
+        cache: Optional[ArtifactCache] = None,
+        download_workers: int = 2,
+        extract_workers: int = 2,
+        transcribe_workers: int = 1,
+        llm_workers: int = 2,
+        queue_size: int = 2,
+        summary_chunk_tokens: int = 3000,
+        summary_fan_out: int = 4,
+        in_memory_audio: bool = False,
+        audio_only: bool = True,
+        resume: bool = True,
+        search_index: Optional[SearchIndex] = None,
+        translation_memory: Optional[TranslationMemory] = None,
+        response_cache: Optional[ResponseCache] = None,
+        whisper_profile: Optional[WhisperProfile] = None,
+        on_event: Optional[Callable[[str, str, BatchItem], None]] = None,
+    ):
+        self.llm_client = llm_client
+        self.output_dir = output_dir
+        self.model_size = model_size
+        self.task = task
+        self.target_language = target_language
+        self.cache = cache
+        self.workers = {
+            "download": download_workers,
+            "extract": extract_workers,
+            "transcribe": transcribe_workers,
+            "summarize": llm_workers,
+        }
+        self.queue_size = queue_size
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.summary_fan_out = summary_fan_out
+        self.in_memory_audio = in_memory_audio
+        self.audio_only = audio_only
+        self.resume = resume
+        self.search_index = search_index
+        self.translation_memory = translation_memory
+        self.response_cache = response_cache
+        self.whisper_profile = whisper_profile or WhisperProfile()
+        self.on_event = on_event or (lambda stage, status, item: None)
+
+    def run(self, urls: List[str]) -> List[BatchItem]:
+        """
+        Processes every URL and returns one BatchItem per URL, in input order.
+        Failures are recorded on the item and do not stop the rest of the batch.
+        """
+        items = [BatchItem(url=url, job=JobManifest.for_url(self.output_dir, url)) for url in urls]
+        if not self.resume:
+            for item in items:
+                item.job.clear()
+        queues = {stage: queue.Queue(maxsize=self.queue_size) for stage in STAGES}
+
+        whisper_pool = create_worker_pool(self.model_size, self.workers["transcribe"], self.whisper_profile)
+
+        handlers = {
+            "download": self._download,
+            "extract": self._extract,
+            "transcribe": lambda item: self._transcribe(item, whisper_pool),
+            "summarize": self._summarize,
+        }
+
+        threads = []
+        for index, stage in enumerate(STAGES):
+            next_queue = queues[STAGES[index + 1]] if index + 1 < len(STAGES) else None
+            remaining = [self.workers[stage]]
+            lock = threading.Lock()
+            for _ in range(self.workers[stage]):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, handlers[stage], queues[stage], next_queue, remaining, lock),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                queues["download"].put(item)
+            queues["download"].put(_SENTINEL)
+            for thread in threads:
+                thread.join()
+        finally:
+            whisper_pool.shutdown(cancel_futures=True)
+
+        for item in items:
+            self._write_report(item)
+        return items
+
+    def _write_report(self, item: BatchItem):
+        metrics = item.metrics
+        metrics.info.update(
+            url=item.url,
+            model_size=self.model_size,
+            llm_provider=getattr(self.llm_client, "provider", type(self.llm_client).__name__),
+            llm_model=getattr(self.llm_client, "model", ""),
+        )
+        if item.error is not None:
+            metrics.info.update(error=item.error, failed_stage=item.failed_stage)
+        path = stages.metrics_path(item.job, item.video_path)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            metrics.write_json(path)
+            item.metrics_path = path
+        except OSError as e:
+            print(f"Warning: Could not write the run report for {item.url}: {e}")
+
+    def _stage_worker(self, stage: str, handler, in_queue: queue.Queue, out_queue: Optional[queue.Queue], remaining: list, lock: threading.Lock):
+        while True:
+            item = in_queue.get()
+            if item is _SENTINEL:
+                # Let sibling workers see the sentinel too; the last one out closes the next stage.
+                in_queue.put(_SENTINEL)
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and out_queue is not None:
+                    out_queue.put(_SENTINEL)
+                return
+
+            if item.error is None:
+                self.on_event(stage, "started", item)
+                try:
+                    handler(item)
+                    self.on_event(stage, "done", item)
+                except Exception as e:
+                    item.error = str(e)
+                    item.failed_stage = stage
+                    self.on_event(stage, "failed", item)
+            else:
+                self.on_event(stage, "skipped", item)
+
+            if out_queue is not None:
+                out_queue.put(item)
+
+    def _download(self, item: BatchItem):
+        done = item.job.completed("download", audio_only=self.audio_only)
+        if done:
+            item.video_path = done["video_path"]
+            return
+        downloader = VideoDownloader(self.output_dir, cache=self.cache)
+        with item.metrics.stage("download") as record:
+            item.video_path = downloader.download(item.url, audio_only=self.audio_only)
+            # A cached file was only copied, so counting its bytes would inflate the download rate.
+            if downloader.cache_hit:
+                record.record(cache_hits=1)
+            else:
+                record.record(bytes=os.path.getsize(item.video_path))
+        item.job.complete("download", {"video_path": item.video_path}, audio_only=self.audio_only)
+
+    def _extract(self, item: BatchItem):
+        if self.in_memory_audio:
+            # The Whisper worker decodes the video itself; no WAV is written.
+            return
+        done = item.job.completed("extract")
+        if done:
+            item.audio_path = done["audio_path"]
+            return
+        audio_processor = AudioProcessor(cache=self.cache)
+        with item.metrics.stage("extract") as record:
+            item.audio_path = audio_processor.extract_audio(item.video_path)
+            record.record(bytes=os.path.getsize(item.video_path))
+        item.job.complete("extract", {"audio_path": item.audio_path})
+
+    def _transcribe(self, item: BatchItem, whisper_pool: ProcessPoolExecutor):
+        params = stages.transcribe_params(self.model_size, self.task, self.whisper_profile)
+        done = item.job.completed("transcribe", **params)
+        if done:
+            item.transcript, subtitle_paths = stages.load_transcript(done)
+            item.srt_path = subtitle_paths["srt"]
+            self._index(item, item.srt_path)
+            return
+
+        source_path = item.video_path if self.in_memory_audio else item.audio_path
+        with item.metrics.stage("transcribe") as record:
+            result = None
+            cache_key = None
+            if self.cache is not None:
+                cache_key = transcription_cache_key(self.cache, source_path, self.model_size, self.task, **self.whisper_profile.cache_params())
+                result = self.cache.get_json(cache_key)
+
+            if result is None:
+                method = "transcribe_media" if self.in_memory_audio else "transcribe"
+                result = whisper_pool.submit(worker_transcribe, method, source_path, task=self.task).result()
+                if cache_key is not None:
+                    self.cache.put_json(cache_key, result)
+            else:
+                record.record(cache_hits=1)
+
+            base, _ = os.path.splitext(item.video_path)
+            item.transcript = Transcript.from_result(result)
+            subtitle_paths = item.transcript.export(base, ["srt"])
+            item.srt_path = subtitle_paths["srt"]
+            record.record(audio_seconds=AudioProcessor().probe_duration(source_path), segments=len(item.transcript))
+        stages.save_transcript(item.job, item.transcript, subtitle_paths, **params)
+        self._index(item, item.srt_path)
+
+    def _index(self, item: BatchItem, path: str, language: Optional[str] = None):
+        """
+        Adds the item's current transcript to the search index, unless it is already indexed unchanged.
+        """
+        if self.search_index is None or self.search_index.is_current(path):
+            return
+        if language is None and self.task == "translate":
+            language = "en"
+        title = os.path.splitext(os.path.basename(item.video_path))[0]
+        self.search_index.add(item.url, item.transcript, language=language, title=title, path=path)
+
+    def _llm_clients(self) -> Tuple[LLMClient, MeteredLLMClient]:
+        """
+        The client for one video's LLM stages and its meter, which sits inside the response cache.
+        """
+        metered = MeteredLLMClient(self.llm_client)
+        if self.response_cache is None:
+            return metered, metered
+        return CachedLLMClient(metered, self.response_cache), metered
+
+    def _summarize(self, item: BatchItem):
+        client, metered = self._llm_clients()
+        llm_params = {
+            "llm_provider": getattr(self.llm_client, "provider", type(self.llm_client).__name__),
+            "llm_model": getattr(self.llm_client, "model", ""),
+        }
+
+        if self.target_language:
+            params = stages.translate_params(self.target_language, llm_params)
+            done = item.job.completed("translate", **params)
+            if done:
+                item.transcript = stages.load_translation(done)
+            else:
+                # Segments are translated in batches; the full text and the summary come from the same pass.
+                with item.metrics.stage("translate", llm=metered) as record:
+                    item.transcript, done = stages.translate(item.job, item.transcript, item.video_path, client, memory=self.translation_memory, **params)
+                    record.record(segments=len(item.transcript))
+            item.translation_path = done["translation_path"]
+            item.translated_srt_path = done["srt_path"]
+            self._index(item, item.translated_srt_path, self.target_language)
+
+        summary_params = stages.summarize_params(self.target_language, self.summary_chunk_tokens, llm_params)
+        done = item.job.completed("summarize", **summary_params)
+        if done:
+            item.summary_path = done["summary_path"]
+            item.transcript = None
+            return
+
+        summarizer = stages.summarizer(item.job, client, self.summary_fan_out, **summary_params)
+        with item.metrics.stage("summarize", llm=metered):
+            summary = summarizer.summarize_segments(item.transcript)
+        item.summary_path = stages.summary_path(item.video_path)
+        with open(item.summary_path, "w") as f:
+            f.write(summary)
+        item.job.complete("summarize", {"summary_path": item.summary_path}, **summary_params)
+        # The transcript is no longer needed once the summary is written.
+        item.transcript = None
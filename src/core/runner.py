@@ -0,0 +1,469 @@
+import contextlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.cache import ArtifactCache, DEFAULT_CACHE_DIR
+from src.core.jobs import JobManifest
+from src.core.llm import DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, LLMClient, create_client
+from src.core.llm_cache import CachedLLMClient, ResponseCache, TranslationMemory, open_llm_stores
+from src.core.metrics import MeteredLLMClient, RunMetrics
+from src.core.models import WhisperProfile, resolve_profile
+from src.core.search import SearchIndex, default_index_path
+from src.core import stages
+
+if TYPE_CHECKING:
+    from src.core.transcript import Transcript  # imports NumPy
+
+
+# With --stream, each window is cut at its quietest point within this many seconds of its end,
+# so window_seconds has to be longer.
+STREAM_SEARCH_SECONDS = 5.0
+
+
+@dataclass
+class ProcessOptions:
+    """
+    Everything that determines how one video is processed; mirrors the options of `process`.
+    """
+    url: str
+    output_dir: str = "output"
+    model_size: str = "base"
+    # CPU profile for Whisper (see models.WHISPER_PROFILES) and overrides of its settings, e.g. {"beam_size": 5}.
+    whisper_profile: str = "accurate"
+    whisper_options: Dict[str, Any] = field(default_factory=dict)
+    llm_provider: str = "ollama"
+    llm_model: str = "llama3"
+    translate: bool = False
+    target_language: Optional[str] = None
+    embed_subs: bool = False
+    burn_subs: bool = False
+    encoder_preset: str = "veryfast"
+    encoder_threads: int = 0
+    in_memory_audio: bool = False
+    parallel_workers: int = 1
+    chunk_seconds: float = 300.0
+    stream: bool = False
+    window_seconds: float = 30.0
+    # Transcript files written next to the video; SRT is always written (subtitle embedding uses it).
+    formats: List[str] = field(default_factory=lambda: ["srt"])
+    summary_chunk_tokens: int = 3000
+    summary_fan_out: int = 4
+    llm_timeout: float = DEFAULT_TIMEOUT
+    llm_max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+    cache: bool = True
+    cache_dir: str = DEFAULT_CACHE_DIR
+    cache_max_size: float = 20.0
+    resume: bool = True
+    # Add finished transcripts to the full-text search index in output_dir.
+    search_index: bool = True
+    metrics_file: Optional[str] = None
+    prometheus_file: Optional[str] = None
+    profile: Optional[str] = None
+
+    @property
+    def whisper_task(self) -> str:
+        # Whisper's own translation (to English) is only used when no LLM target language is set.
+        return "translate" if self.translate and not self.target_language else "transcribe"
+
+    @property
+    def whisper(self) -> WhisperProfile:
+        return resolve_profile(self.whisper_profile, **self.whisper_options)
+
+
+@dataclass
+class ProcessResult:
+    video_path: Optional[str] = None
+    audio_path: Optional[str] = None
+    srt_path: Optional[str] = None
+    translation_path: Optional[str] = None
+    translated_srt_path: Optional[str] = None
+    summary_path: Optional[str] = None
+    output_video_path: Optional[str] = None
+    metrics_path: Optional[str] = None
+    subtitle_paths: Dict[str, str] = field(default_factory=dict)
+    resumed: list = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def write_stream(stream: Iterator[str], path: str, description: str) -> str:
+    """
+    Default stream renderer: appends the chunks to path as they arrive and returns the text.
+    """
+    parts = []
+    with open(path, "w") as f:
+        for chunk in stream:
+            parts.append(chunk)
+            f.write(chunk)
+            f.flush()
+    return "".join(parts)
+
+
+class ProcessRunner:
+    """
+    Runs one video through download -> extract -> transcribe -> translate -> summarize -> embed.
+    Used by the `process` command and by the daemon. Progress is checkpointed in a job manifest,
+    so a rerun of the same URL resumes after the last completed stage.
+
+    on_stage(stage, status, result) is called with "started", "done" or "resumed"; render(stream,
+    path, description) writes streamed LLM output and returns the text. With options.stream,
+    download and transcription overlap and on_segments receives subtitles as they are made.
+    Long-lived callers pass in shared caches, LLM clients and per-stage limits (semaphores
+    keyed by stage name).
+    """
+
+    def __init__(
+        self,
+        options: ProcessOptions,
+        llm_client: Optional[LLMClient] = None,
+        artifact_cache: Optional[ArtifactCache] = None,
+        llm_stores: Optional[Tuple[ResponseCache, TranslationMemory]] = None,
+        limits: Optional[Dict[str, threading.Semaphore]] = None,
+        on_stage: Optional[Callable[[str, str, ProcessResult], None]] = None,
+        on_segments: Optional[Callable[[List[dict]], None]] = None,
+        render: Callable[[Iterator[str], str, str], str] = write_stream,
+        search_index: Optional[SearchIndex] = None,
+    ):
+        self.options = options
+        if artifact_cache is None and options.cache:
+            artifact_cache = ArtifactCache(options.cache_dir, max_size=int(options.cache_max_size * 1024 ** 3))
+        self.artifact_cache = artifact_cache
+        if llm_stores is None and options.cache:
+            llm_stores = open_llm_stores(options.cache_dir)
+        self.response_cache, self.translation_memory = llm_stores or (None, None)
+
+        # Metered inside the cache, so cache hits are not counted as requests.
+        self.metered_client = MeteredLLMClient(
+            llm_client or create_client(options.llm_provider, options.llm_model, timeout=options.llm_timeout, max_in_flight=options.llm_max_in_flight)
+        )
+        self.llm_client = self.metered_client
+        if self.response_cache is not None:
+            self.llm_client = CachedLLMClient(self.llm_client, self.response_cache)
+
+        self.limits = limits or {}
+        self.on_stage = on_stage or (lambda stage, status, result: None)
+        self.on_segments = on_segments
+        self.render = render
+        self.search_index = search_index
+        self.metrics = RunMetrics(profile_stage=options.profile, profile_dir=options.output_dir)
+        self.metrics.info.update(
+            url=options.url, model_size=options.model_size, whisper_profile=options.whisper_profile, llm_provider=options.llm_provider, llm_model=options.llm_model
+        )
+        self.job = JobManifest.for_url(options.output_dir, options.url)
+        self.current_stage: Optional[str] = None
+        self.metrics_path: Optional[str] = None
+
+    def run(self) -> ProcessResult:
+        options = self.options
+        result = ProcessResult()
+        if not options.resume:
+            self.job.clear()
+
+        try:
+            if options.stream:
+                transcript = self._run_stage("transcribe", result, self._transcribe_stream)
+            else:
+                self._run_stage("download", result, self._download)
+                if not options.in_memory_audio:
+                    self._run_stage("extract", result, self._extract)
+                transcript = self._run_stage("transcribe", result, self._transcribe)
+            self._index(result, transcript, "en" if options.whisper_task == "translate" else transcript.language, result.srt_path)
+            if options.target_language:
+                # One segment-level pass gives the translated subtitles, text and summary input.
+                transcript = self._run_stage("translate", result, self._translate, transcript)
+                self._index(result, transcript, options.target_language, result.translated_srt_path)
+            self._run_stage("summarize", result, self._summarize, transcript)
+            if options.embed_subs:
+                self._run_stage("embed", result, self._embed)
+            self.current_stage = None
+        except Exception as e:
+            self.metrics.info.update(error=f"{type(e).__name__}: {e}", failed_stage=self.current_stage)
+            raise
+        finally:
+            self._write_reports(result)
+        return result
+
+    def _write_reports(self, result: ProcessResult):
+        """
+        Writes the run report, and the Prometheus metrics if requested, for finished and failed
+        runs alike. A run that failed before its download has finished reports to its job directory.
+        """
+        options = self.options
+        path = options.metrics_file or stages.metrics_path(self.job, result.video_path)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.metrics.write_json(path)
+            result.metrics_path = self.metrics_path = path
+            if options.prometheus_file:
+                self.metrics.write_prometheus(options.prometheus_file)
+        except OSError as e:
+            # Never hide the error that ended the run.
+            print(f"Warning: Could not write the run report: {e}")
+
+    def _run_stage(self, stage: str, result: ProcessResult, method: Callable, *args):
+        self.current_stage = stage
+        value = method(result, *args)
+        self.on_stage(stage, "resumed" if stage in result.resumed else "done", result)
+        return value
+
+    @property
+    def _llm_params(self) -> dict:
+        return {"llm_provider": self.options.llm_provider, "llm_model": self.options.llm_model}
+
+    def _resumed(self, result: ProcessResult, stage: str, **params) -> Optional[dict]:
+        outputs = self.job.completed(stage, **params)
+        if outputs is not None:
+            result.resumed.append(stage)
+        return outputs
+
+    @contextlib.contextmanager
+    def _stage(self, stage: str, result: ProcessResult, **kwargs):
+        """
+        Runs a stage under its concurrency limit (if any) and records its metrics.
+        """
+        limit = self.limits.get(stage)
+        with limit if limit is not None else contextlib.nullcontext():
+            self.on_stage(stage, "started", result)
+            with self.metrics.stage(stage, **kwargs) as record:
+                yield record
+
+    def _index(self, result: ProcessResult, transcript: "Transcript", language: Optional[str], path: str):
+        """
+        Adds a finished transcript to the search index, unless it is already indexed unchanged.
+        """
+        if not self.options.search_index:
+            return
+        if self.search_index is None:
+            self.search_index = SearchIndex(default_index_path(self.options.output_dir))
+        if os.path.exists(path) and self.search_index.is_current(path):
+            return
+        title = os.path.splitext(os.path.basename(result.video_path))[0]
+        self.search_index.add(self.options.url, transcript, language=language, title=title, path=path)
+
+    def _download(self, result: ProcessResult):
+        audio_only = not self.options.embed_subs
+        done = self._resumed(result, "download", audio_only=audio_only)
+        if done:
+            result.video_path = done["video_path"]
+            return
+        from src.core.downloader import VideoDownloader
+
+        with self._stage("download", result) as record:
+            downloader = VideoDownloader(self.options.output_dir, cache=self.artifact_cache)
+            result.video_path = downloader.download(self.options.url, audio_only=audio_only)
+            # A cached file was only copied, so counting its bytes would inflate the download rate.
+            if downloader.cache_hit:
+                record.record(cache_hits=1)
+            else:
+                record.record(bytes=os.path.getsize(result.video_path))
+        self.job.complete("download", {"video_path": result.video_path}, audio_only=audio_only)
+
+    def _extract(self, result: ProcessResult):
+        done = self._resumed(result, "extract")
+        if done:
+            result.audio_path = done["audio_path"]
+            return
+        from src.core.audio import AudioProcessor
+
+        with self._stage("extract", result) as record:
+            result.audio_path = AudioProcessor(cache=self.artifact_cache).extract_audio(result.video_path)
+            record.record(bytes=os.path.getsize(result.video_path))
+        self.job.complete("extract", {"audio_path": result.audio_path})
+
+    def _transcribe(self, result: ProcessResult) -> "Transcript":
+        options = self.options
+        task = options.whisper_task
+        params = stages.transcribe_params(options.model_size, task, options.whisper)
+        done = self._resumed(result, "transcribe", **params)
+        if done:
+            return self._load_transcript(result, done)
+        from src.core.audio import AudioProcessor
+        from src.core.transcriber import Transcriber
+        from src.core.transcript import Transcript
+
+        source_path = result.video_path if options.in_memory_audio else result.audio_path
+        with self._stage("transcribe", result) as record:
+            transcriber = Transcriber(model_size=options.model_size, cache=self.artifact_cache, profile=options.whisper)
+            if options.parallel_workers > 1:
+                whisper_result = transcriber.transcribe_parallel(source_path, task=task, workers=options.parallel_workers, chunk_seconds=options.chunk_seconds)
+            elif options.in_memory_audio:
+                whisper_result = transcriber.transcribe_media(source_path, task=task)
+            else:
+                whisper_result = transcriber.transcribe(source_path, task=task)
+            # Only times and text are kept; Whisper's tokens and decoding statistics are dropped here.
+            transcript = Transcript.from_result(whisper_result)
+            del whisper_result
+            record.record(audio_seconds=AudioProcessor().probe_duration(source_path), segments=len(transcript))
+            self._export(result, transcript, self.options.formats)
+
+        self._save_transcript(result, transcript, **params)
+        return transcript
+
+    def _transcribe_stream(self, result: ProcessResult) -> "Transcript":
+        """
+        Downloads and transcribes at the same time: yt-dlp's output is decoded as it arrives and
+        Whisper works through it in windows, writing SRT cues as each window finishes.
+        """
+        options = self.options
+        audio_only = not options.embed_subs
+        params = stages.transcribe_params(options.model_size, options.whisper_task, options.whisper, window_seconds=options.window_seconds)
+        downloaded = self.job.completed("download", audio_only=audio_only, stream=True)
+        done = self._resumed(result, "transcribe", **params) if downloaded else None
+        if done:
+            result.resumed.insert(result.resumed.index("transcribe"), "download")
+            result.video_path = downloaded["video_path"]
+            self.on_stage("download", "resumed", result)
+            return self._load_transcript(result, done)
+        import ffmpeg
+
+        from src.core.audio import AudioProcessor
+        from src.core.downloader import VideoDownloader
+        from src.core.subtitles import SrtWriter
+        from src.core.transcriber import SAMPLE_RATE, Transcriber
+        from src.core.transcript import Transcript
+
+        with self._stage("transcribe", result) as record:
+            download = VideoDownloader(options.output_dir, cache=self.artifact_cache).stream(options.url, audio_only=audio_only)
+            result.video_path = download.path
+            base, _ = os.path.splitext(result.video_path)
+            result.srt_path = f"{base}.srt"
+
+            started = time.perf_counter()
+            first_segment = []
+            samples = [0]
+
+            def counted(blocks):
+                for block in blocks:
+                    samples[0] += len(block)
+                    yield block
+
+            with SrtWriter(result.srt_path) as writer:
+                def on_segments(segments: List[dict]):
+                    if not first_segment:
+                        first_segment.append(time.perf_counter() - started)
+                    writer.write(segments)
+                    if self.on_segments:
+                        self.on_segments(segments)
+
+                transcriber = Transcriber(model_size=options.model_size, cache=self.artifact_cache, profile=options.whisper)
+                try:
+                    transcript = transcriber.transcribe_stream(
+                        counted(AudioProcessor().stream_audio(download, finish_source=True)),
+                        task=params["task"],
+                        window_seconds=options.window_seconds,
+                        search_seconds=STREAM_SEARCH_SECONDS,
+                        on_segments=on_segments,
+                    )
+                except ffmpeg.Error:
+                    if samples[0]:
+                        raise
+                if not samples[0]:
+                    # Some containers (MP4 with the index at the end) cannot be decoded from a pipe.
+                    # ffmpeg then fails or decodes nothing, but the download was still read to the
+                    # end, so transcribe the finished file instead.
+                    print("Audio could not be decoded while downloading; transcribing the finished file...")
+                    audio = AudioProcessor().load_audio(download.path)
+                    samples[0] = len(audio)
+                    transcript = transcriber.transcribe_stream(
+                        [audio], task=params["task"], window_seconds=options.window_seconds, search_seconds=STREAM_SEARCH_SECONDS, on_segments=on_segments
+                    )
+            transcript = Transcript.from_result(transcript)
+            if download.cache_hit:
+                record.record(cache_hits=1)
+            else:
+                record.record(bytes=download.bytes_read)
+            record.record(
+                audio_seconds=samples[0] / SAMPLE_RATE,
+                segments=len(transcript),
+                first_segment_seconds=first_segment[0] if first_segment else 0.0,
+            )
+            # The SRT file was written cue by cue; the other formats are written from the finished transcript.
+            result.subtitle_paths["srt"] = result.srt_path
+            self._export(result, transcript, [fmt for fmt in options.formats if fmt != "srt"])
+
+        self.job.complete("download", {"video_path": result.video_path}, audio_only=audio_only, stream=True)
+        self.on_stage("download", "done", result)
+        self._save_transcript(result, transcript, **params)
+        return transcript
+
+    def _export(self, result: ProcessResult, transcript: "Transcript", formats: List[str]):
+        base, _ = os.path.splitext(result.video_path)
+        formats = list(dict.fromkeys(formats))
+        if "srt" not in formats and "srt" not in result.subtitle_paths:
+            formats.insert(0, "srt")
+        result.subtitle_paths.update(transcript.export(base, formats))
+        result.srt_path = result.subtitle_paths["srt"]
+
+    def _save_transcript(self, result: ProcessResult, transcript: "Transcript", **params):
+        stages.save_transcript(self.job, transcript, result.subtitle_paths, **params)
+
+    def _load_transcript(self, result: ProcessResult, done: dict) -> "Transcript":
+        transcript, result.subtitle_paths = stages.load_transcript(done)
+        result.srt_path = result.subtitle_paths["srt"]
+        # Formats asked for now that the earlier run did not write.
+        missing = [fmt for fmt in self.options.formats if fmt not in result.subtitle_paths]
+        if missing:
+            self._export(result, transcript, missing)
+        return transcript
+
+    def _translate(self, result: ProcessResult, transcript: "Transcript") -> "Transcript":
+        """
+        Translates the transcript segment by segment, in concurrent batches, and writes the
+        translated subtitles and full text from that one pass.
+        """
+        params = stages.translate_params(self.options.target_language, self._llm_params)
+        done = self._resumed(result, "translate", **params)
+        if done:
+            translated = stages.load_translation(done)
+        else:
+            with self._stage("translate", result, llm=self.metered_client) as record:
+                translated, done = stages.translate(self.job, transcript, result.video_path, self.llm_client, memory=self.translation_memory, **params)
+                record.record(segments=len(translated))
+        result.translation_path = done["translation_path"]
+        result.translated_srt_path = done["srt_path"]
+        return translated
+
+    def _summarize(self, result: ProcessResult, transcript: "Transcript"):
+        options = self.options
+        params = stages.summarize_params(options.target_language, options.summary_chunk_tokens, self._llm_params)
+        done = self._resumed(result, "summarize", **params)
+        if done:
+            result.summary_path = done["summary_path"]
+            return
+
+        result.summary_path = stages.summary_path(result.video_path)
+        summarizer = stages.summarizer(self.job, self.llm_client, options.summary_fan_out, **params)
+        with self._stage("summarize", result, llm=self.metered_client):
+            self.render(summarizer.summarize_segments_stream(transcript), result.summary_path, "Summarizing transcript...")
+        self.job.complete("summarize", {"summary_path": result.summary_path}, **params)
+
+    def _embed(self, result: ProcessResult):
+        options = self.options
+        # Soft subtitles get one track per language; burn-in uses the translation if there is one.
+        tracks = [(path, title) for path, title in ((result.translated_srt_path, options.target_language), (result.srt_path, "Original")) if path]
+        params = {
+            "burn_in": options.burn_subs,
+            "preset": options.encoder_preset if options.burn_subs else None,
+            "tracks": [title for _, title in tracks],
+        }
+        done = self._resumed(result, "embed", **params)
+        if done:
+            result.output_video_path = done["video_path"]
+            return
+        from src.core.audio import AudioProcessor
+
+        with self._stage("embed", result) as record:
+            result.output_video_path = AudioProcessor().embed_subtitles(
+                result.video_path,
+                [path for path, _ in tracks],
+                titles=[title for _, title in tracks],
+                burn_in=options.burn_subs,
+                preset=options.encoder_preset,
+                threads=options.encoder_threads,
+            )
+            record.record(bytes=os.path.getsize(result.output_video_path))
+        self.job.complete("embed", {"video_path": result.output_video_path}, **params)
@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.core.transcript import Transcript  # imports NumPy
+
+# Segment rowids are document_id << SEGMENT_BITS | segment index, so a document's segments
+# form one rowid range and can be replaced without scanning the full-text table.
+SEGMENT_BITS = 20
+
+
+def default_index_path(output_dir: str) -> str:
+    return os.path.join(output_dir, ".search.sqlite")
+
+
+def build_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query matching segments that contain every word (in any
+    order), so punctuation in the input cannot break the query syntax.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+
+@dataclass
+class SearchHit:
+    video: str
+    title: Optional[str]
+    path: Optional[str]
+    language: str
+    start_ms: int
+    end_ms: int
+    text: str  # the segment, with the matched words marked
+    score: float
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over transcript segments.
+    Each indexed transcript is a document, keyed on its video (URL, or the file path for
+    transcripts without one) and language, so the original and a translation of the same
+    video are separate documents. Segments carry their start/end time in milliseconds.
+    Indexing a document again replaces its segments.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, video TEXT NOT NULL, language TEXT NOT NULL, title TEXT, path TEXT, "
+            "mtime REAL, size INTEGER, indexed_at REAL NOT NULL, UNIQUE (video, language))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_path ON documents (path)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+            "text, start_ms UNINDEXED, end_ms UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def add(self, video: str, transcript: "Transcript", language: Optional[str] = None, title: Optional[str] = None, path: Optional[str] = None) -> int:
+        """
+        Indexes (or re-indexes) a transcript and returns the number of segments indexed.
+        path is the file the transcript came from; it is shown in hits and lets backfill()
+        skip files that have not changed since.
+        """
+        language = language or transcript.language or ""
+        stat = os.stat(path) if path and os.path.exists(path) else None
+        rows = [
+            (start_ms, end_ms, text.strip())
+            for start_ms, end_ms, text in zip(
+                (transcript.starts * 1000).round().astype("int64").tolist(),
+                (transcript.ends * 1000).round().astype("int64").tolist(),
+                transcript.texts,
+            )
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                document_id = self._conn.execute(
+                    "INSERT INTO documents (video, language, title, path, mtime, size, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (video, language) DO UPDATE SET title = excluded.title, path = excluded.path, "
+                    "mtime = excluded.mtime, size = excluded.size, indexed_at = excluded.indexed_at RETURNING id",
+                    (video, language, title, path, stat.st_mtime if stat else None, stat.st_size if stat else None, time.time()),
+                ).fetchone()[0]
+                self._delete_segments(document_id)
+                first = document_id << SEGMENT_BITS
+                self._conn.executemany(
+                    "INSERT INTO segments (rowid, text, start_ms, end_ms) VALUES (?, ?, ?, ?)",
+                    [(first + i, text, start_ms, end_ms) for i, (start_ms, end_ms, text) in enumerate(rows[:1 << SEGMENT_BITS])],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def remove(self, video: str, language: Optional[str] = None):
+        """
+        Removes a video's documents (only the one in language, if given).
+        """
+        with self._lock:
+            query = "SELECT id FROM documents WHERE video = ?" + (" AND language = ?" if language is not None else "")
+            params = (video, language) if language is not None else (video,)
+            self._conn.execute("BEGIN")
+            for (document_id,) in self._conn.execute(query, params).fetchall():
+                self._delete_segments(document_id)
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+            self._conn.execute("COMMIT")
+
+    def prune(self, root: str) -> int:
+        """
+        Removes the documents of files under root that no longer exist. Returns how many.
+        """
+        root = os.path.join(os.path.abspath(root), "")
+        with self._lock:
+            rows = self._conn.execute("SELECT id, path FROM documents WHERE substr(path, 1, ?) = ?", (len(root), root)).fetchall()
+            missing = [document_id for document_id, path in rows if not os.path.exists(path)]
+            self._conn.execute("BEGIN")
+            for document_id in missing:
+                self._delete_segments(document_id)
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+            self._conn.execute("COMMIT")
+        return len(missing)
+
+    def is_current(self, path: str) -> bool:
+        """
+        Whether the file at path is indexed and has not changed since.
+        """
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT mtime, size FROM documents WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size
+
+    def search(self, query: str, limit: int = 20, language: Optional[str] = None, raw: bool = False, marks: Tuple[str, str] = ("[", "]")) -> List[SearchHit]:
+        """
+        Returns the best-matching segments, best (highest BM25 score) first.
+        query is free text (every word must appear) or, with raw, FTS5 query syntax.
+        Matched words in the hit texts are wrapped in marks.
+        """
+        match = query if raw else build_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT d.video, d.title, d.path, d.language, s.start_ms, s.end_ms, "
+            "highlight(segments, 0, ?, ?), -bm25(segments) AS score "
+            f"FROM segments s JOIN documents d ON d.id = s.rowid >> {SEGMENT_BITS} "
+            "WHERE segments MATCH ?"
+        )
+        params = [*marks, match]
+        if language:
+            sql += " AND d.language = ?"
+            params.append(language)
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            segments = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"documents": documents, "segments": segments}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _delete_segments(self, document_id: int):
+        # Caller holds the lock.
+        first = document_id << SEGMENT_BITS
+        self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?", (first, first + (1 << SEGMENT_BITS) - 1))
+
+
+def _job_transcripts(root: str) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Maps the subtitle files recorded in the job manifests under root to
+    (video URL, language, saved transcript path).
+    """
+    known = {}
+    jobs_dir = os.path.join(root, ".jobs")
+    if not os.path.isdir(jobs_dir):
+        return known
+    for name in os.listdir(jobs_dir):
+        if not name.endswith(".json") or name.count(".") > 1:
+            continue
+        try:
+            with open(os.path.join(jobs_dir, name), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        stages = data.get("stages", {})
+        for stage, language in (("transcribe", None), ("translate", stages.get("translate", {}).get("params", {}).get("target_language"))):
+            outputs = stages.get(stage, {}).get("outputs", {})
+            if outputs.get("srt_path"):
+                known[os.path.abspath(outputs["srt_path"])] = (data.get("key"), language, outputs.get("transcript_path"))
+    return known
+
+
+def backfill(index: SearchIndex, root: str, force: bool = False, on_file: Optional[Callable[[str, int], None]] = None) -> Tuple[int, int]:
+    """
+    Indexes the SRT files under root that are new or changed since they were last indexed
+    (all of them with force). Files written by a job are indexed under the job's URL and
+    with the language of its saved transcript; other files are keyed on their path, and
+    <name>_<language>.srt next to <name>.srt counts as a translation of it.
+    Documents of files that have been deleted are dropped.
+    Returns (files indexed, files skipped).
+    """
+    from src.core.transcript import Transcript
+
+    jobs = _job_transcripts(root)
+    indexed = skipped = 0
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+        for name in sorted(files):
+            if not name.endswith(".srt"):
+                continue
+            path = os.path.abspath(os.path.join(directory, name))
+            if not force and index.is_current(path):
+                skipped += 1
+                continue
+
+            base = path[:-len(".srt")]
+            video, language, transcript_path = jobs.get(path, (None, None, None))
+            if video is None:
+                video = base
+                original, _, suffix = base.rpartition("_")
+                if original and os.path.exists(f"{original}.srt"):
+                    video, language = original, suffix
+            if transcript_path and os.path.exists(transcript_path):
+                transcript = Transcript.load(transcript_path)
+            else:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    transcript = Transcript.from_srt(f.read())
+            title = os.path.basename(base[:-len(language) - 1] if language and base.endswith(f"_{language}") else base)
+            count = index.add(video, transcript, language=language, title=title, path=path)
+            indexed += 1
+            if on_file:
+                on_file(path, count)
+    index.prune(root)
+    return indexed, skipped
@@ -0,0 +1,108 @@
+"""
+Stage steps shared by ProcessRunner (one video) and BatchPipeline (a batch of them).
+Both record their progress in the same job manifest, so the parameters a stage is keyed by,
+the files it writes and the outputs it stores are defined once here. The callers keep their
+own lookups (for metrics and events) and decide how a stage's work is scheduled.
+"""
+import os
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from src.core.jobs import JobManifest
+from src.core.llm import LLMClient
+from src.core.llm_cache import TranslationMemory
+from src.core.models import WhisperProfile
+from src.core.summarizer import Summarizer
+from src.core.translator import Translator
+
+if TYPE_CHECKING:
+    from src.core.transcript import Transcript  # imports NumPy
+
+
+def transcribe_params(model_size: str, task: str, profile: WhisperProfile, **extra) -> dict:
+    return {"model_size": model_size, "task": task, **extra, **profile.cache_params()}
+
+
+def translate_params(target_language: str, llm_params: dict) -> dict:
+    return {"target_language": target_language, **llm_params}
+
+
+def summarize_params(target_language: Optional[str], chunk_tokens: int, llm_params: dict) -> dict:
+    return {"target_language": target_language, "chunk_tokens": chunk_tokens, **llm_params}
+
+
+def save_transcript(job: JobManifest, transcript: "Transcript", subtitle_paths: Dict[str, str], **params):
+    """
+    Keeps the transcript with the job and completes the transcribe stage with its subtitle files.
+    """
+    transcript_path = job.file_path("transcript.json")
+    os.makedirs(os.path.dirname(transcript_path), exist_ok=True)
+    transcript.save(transcript_path)
+    outputs = {"srt_path": subtitle_paths["srt"], "transcript_path": transcript_path}
+    outputs.update({f"{fmt}_path": path for fmt, path in subtitle_paths.items()})
+    job.complete("transcribe", outputs, **params)
+
+
+def load_transcript(done: dict) -> Tuple["Transcript", Dict[str, str]]:
+    """
+    The transcript and subtitle files (by format) of a completed transcribe stage.
+    """
+    from src.core.transcript import Transcript
+
+    subtitle_paths = {key[:-len("_path")]: path for key, path in done.items() if key != "transcript_path"}
+    return Transcript.load(done["transcript_path"]), subtitle_paths
+
+
+def load_translation(done: dict) -> "Transcript":
+    from src.core.transcript import Transcript
+
+    return Transcript.load(done["transcript_path"])
+
+
+def translate(
+    job: JobManifest,
+    transcript: "Transcript",
+    video_path: str,
+    llm_client: LLMClient,
+    memory: Optional[TranslationMemory] = None,
+    **params,
+) -> Tuple["Transcript", dict]:
+    """
+    Translates the transcript in batches, writes the translated subtitles and full text next to
+    the video and completes the translate stage. Returns the translation and the stage's outputs.
+    Finished batches are checkpointed, so an interrupted run resumes with the remaining lines.
+    """
+    language = params["target_language"]
+    base, _ = os.path.splitext(video_path)
+    translator = Translator(llm_client, memory=memory, checkpoint=job.checkpoint("translate", **params))
+    translated = translator.translate_transcript(transcript, language)
+    srt_path = f"{base}_{language}.srt"
+    translated.write(srt_path, "srt")
+    translation_path = f"{base}_{language}.txt"
+    with open(translation_path, "w", encoding="utf-8") as f:
+        f.write(translated.text.strip() + "\n")
+
+    transcript_path = job.file_path("translation.json")
+    translated.save(transcript_path)
+    outputs = {"translation_path": translation_path, "srt_path": srt_path, "transcript_path": transcript_path}
+    job.complete("translate", outputs, **params)
+    return translated, outputs
+
+
+def metrics_path(job: JobManifest, video_path: Optional[str]) -> str:
+    """
+    Where a run report goes by default: next to the video, or with the job if there is none yet.
+    """
+    if video_path:
+        return f"{os.path.splitext(video_path)[0]}_metrics.json"
+    return job.file_path("metrics.json")
+
+
+def summary_path(video_path: str) -> str:
+    return f"{os.path.splitext(video_path)[0]}_summary.txt"
+
+
+def summarizer(job: JobManifest, llm_client: LLMClient, fan_out: int, **params) -> Summarizer:
+    """
+    A Summarizer whose partial summaries are checkpointed in the summarize stage as they finish.
+    """
+    return Summarizer(llm_client, chunk_tokens=params["chunk_tokens"], fan_out=fan_out, checkpoint=job.checkpoint("summarize", **params))
@@ -0,0 +1,57 @@
+from typing import TYPE_CHECKING, Iterable, Union
+
+if TYPE_CHECKING:
+    from src.core.transcript import Transcript
+
+# Formats Transcript.export can write.
+EXPORT_FORMATS = ("srt", "vtt", "jsonl", "txt")
+
+
+def save_srt(result: Union[dict, "Transcript"], output_path: str):
+    """
+    Saves a transcription result (Whisper-style dict with "segments", or a Transcript) as an SRT file.
+    """
+    from src.core.transcript import Transcript  # NumPy is only loaded once subtitles are written
+
+    transcript = result if isinstance(result, Transcript) else Transcript.from_result(result)
+    transcript.write(output_path, "srt")
+
+
+class SrtWriter:
+    """
+    Writes SRT cues as segments become available, numbering them across calls.
+    The file is flushed after every write, so players and tailing readers see new cues at once.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.count = 0
+        self._file = open(output_path, "w", encoding="utf-8")
+
+    def write(self, segments: Iterable[dict]):
+        from src.core.transcript import Transcript
+
+        cues = Transcript.from_result({"segments": list(segments)})
+        self._file.write(cues.srt(first_index=self.count + 1))
+        self.count += len(cues)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "SrtWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def format_timestamp(seconds: float) -> str:
+    """
+    Formats seconds into SRT timestamp format (HH:MM:SS,mmm).
+    """
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds - int(seconds)) * 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
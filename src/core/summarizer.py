@@ -1,15 +1,184 @@
-from src.core.llm import LLMClient
+import asyncio
+import hashlib
+import re
+from typing import AsyncIterator, Iterator, List, Optional
+
+from src.core.jobs import StageCheckpoint
+from src.core.llm import LLMClient, estimate_tokens, run_sync, stream_sync
+
+SYSTEM_PROMPT = "You are a helpful assistant that summarizes videos."
 
 class Summarizer:
-    def __init__(self, client: LLMClient):
+    """
+    Summarizes transcripts with an LLM.
+    Transcripts that fit in chunk_tokens are summarized in one request. Longer ones are
+    split into chunks that are summarized concurrently (map), and the partial summaries
+    are then combined group_size at a time until one summary is left (reduce).
+    With a job checkpoint, partial summaries are recorded as they finish so an interrupted
+    run only repeats the requests that had not completed.
+    """
+
+    def __init__(self, client: LLMClient, chunk_tokens: int = 3000, fan_out: int = 4, group_size: int = 4, checkpoint: Optional[StageCheckpoint] = None):
         self.client = client
+        self.chunk_tokens = chunk_tokens
+        self.fan_out = fan_out
+        self.group_size = group_size
+        self.checkpoint = checkpoint
 
     def summarize(self, text: str) -> str:
+        """
+        Summarizes a plain-text transcript, chunking at sentence boundaries if it is too long.
+        """
+        return run_sync(self.asummarize(text))
+
+    def summarize_segments(self, segments: list) -> str:
+        """
+        Summarizes a Whisper transcript, chunking along segment boundaries if it is too long.
+        """
+        return run_sync(self.asummarize_segments(segments))
+
+    def summarize_stream(self, text: str) -> Iterator[str]:
+        """
+        Like summarize(), but yields the final summary in pieces as the LLM produces it.
+        Partial summaries of long transcripts are still generated up front.
+        """
+        return stream_sync(self.asummarize_stream(text))
+
+    def summarize_segments_stream(self, segments: list) -> Iterator[str]:
+        """
+        Like summarize_segments(), but yields the final summary in pieces as the LLM produces it.
+        """
+        return stream_sync(self.asummarize_segments_stream(segments))
+
+    async def asummarize(self, text: str) -> str:
+        prompt = await self._final_prompt(self._sentences(text))
+        return await self.client.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
+
+    async def asummarize_segments(self, segments: list) -> str:
+        prompt = await self._final_prompt(self._segment_texts(segments))
+        return await self.client.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
+
+    async def asummarize_stream(self, text: str) -> AsyncIterator[str]:
+        prompt = await self._final_prompt(self._sentences(text))
+        async for piece in self.client.agenerate_stream(prompt, system_prompt=SYSTEM_PROMPT):
+            yield piece
+
+    async def asummarize_segments_stream(self, segments: list) -> AsyncIterator[str]:
+        prompt = await self._final_prompt(self._segment_texts(segments))
+        async for piece in self.client.agenerate_stream(prompt, system_prompt=SYSTEM_PROMPT):
+            yield piece
+
+    @staticmethod
+    def _sentences(text: str) -> List[str]:
+        return re.split(r"(?<=[.!?。！？])\s+", text.strip())
+
+    @staticmethod
+    def _segment_texts(segments) -> List[str]:
+        # segments: Whisper-style segment dicts, or a Transcript (which keeps its texts in a column).
+        texts = segments.texts if hasattr(segments, "texts") else [segment["text"] for segment in segments]
+        return [text.strip() for text in texts]
+
+    async def _final_prompt(self, pieces: List[str]) -> str:
+        """
+        Runs the map and reduce rounds and returns the prompt for the final summary request.
+        """
+        chunks = self._group(pieces, self.chunk_tokens)
+        if len(chunks) <= 1:
+            return self._final(" ".join(pieces))
+
+        partials = await self._map(self._summarize_chunk, [(i, len(chunks), chunk) for i, chunk in enumerate(chunks, start=1)])
+        # Reduce until the remaining partial summaries fit into one final request.
+        while True:
+            groups = self._group(partials, self.chunk_tokens, self.group_size)
+            if len(groups) <= 1:
+                return self._final("\n\n".join(partials), partial=True)
+            if len(groups) == len(partials):
+                # Every partial is over budget on its own; combine them in fixed groups so the reduction still converges.
+                size = max(2, self.group_size)
+                groups = ["\n\n".join(partials[i:i + size]) for i in range(0, len(partials), size)]
+            partials = await self._map(self._combine, [(group,) for group in groups])
+
+    async def _map(self, func, args_list: list) -> List[str]:
+        """
+        Runs func over args_list concurrently, with at most fan_out requests in flight.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.fan_out))
+
+        async def run(args):
+            async with semaphore:
+                return await func(*args)
+
+        return list(await asyncio.gather(*(run(args) for args in args_list)))
+
+    async def _summarize_chunk(self, index: int, total: int, chunk: str) -> str:
+        prompt = f"""
+        The following is part {index} of {total} of a video transcript.
+        Summarize this part concisely and list its key points.
+
+        Transcript part:
+        {chunk}
+        """
+        return await self._generate_partial(prompt)
+
+    async def _combine(self, partials: str) -> str:
         prompt = f"""
+        The following are summaries of consecutive parts of a video transcript.
+        Combine them into one concise summary with a single list of key points, removing repetition.
+
+        Partial summaries:
+        {partials}
+        """
+        return await self._generate_partial(prompt)
+
+    async def _generate_partial(self, prompt: str) -> str:
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        if self.checkpoint is not None:
+            done = self.checkpoint.get(key)
+            if done is not None:
+                return done
+        response = await self.client.agenerate(prompt, system_prompt=SYSTEM_PROMPT)
+        if self.checkpoint is not None:
+            self.checkpoint.put(key, response)
+        return response
+
+    @staticmethod
+    def _final(text: str, partial: bool = False) -> str:
+        if partial:
+            prompt = (
+                "The following are summaries of consecutive parts of a video transcript.\n"
+                "Please provide a concise summary of the whole video.\n"
+                "Also provide a list of key points.\n\n"
+                f"Partial summaries:\n{text}"
+            )
+        else:
+            prompt = f"""
         Please provide a concise summary of the following video transcript.
         Also provide a list of key points.
 
         Transcript:
         {text}
         """
-        return self.client.generate(prompt, system_prompt="You are a helpful assistant that summarizes videos.")
+        return prompt
+
+    @staticmethod
+    def _group(texts: List[str], max_tokens: int, max_items: int = 0) -> List[str]:
+        """
+        Packs consecutive texts into chunks of at most max_tokens (and max_items texts, if set).
+        A single text longer than max_tokens becomes its own chunk.
+        """
+        chunks = []
+        current = []
+        current_tokens = 0
+        for text in texts:
+            if not text:
+                continue
+            tokens = estimate_tokens(text)
+            if current and (current_tokens + tokens > max_tokens or (max_items and len(current) >= max_items)):
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        separator = "\n\n" if max_items else " "
+        return [separator.join(chunk) for chunk in chunks]
@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.core.cache import ArtifactCache
+from src.core.downloader import VideoDownloader
+from src.core.jobs import JobManifest
+
+# Live streams and premieres have no finished recording to process yet.
+UNFINISHED_LIVE_STATUSES = ("is_live", "is_upcoming", "post_live")
+
+
+def default_index_path(output_dir: str) -> str:
+    return os.path.join(output_dir, ".sync.sqlite")
+
+
+def fingerprint(entry: dict) -> Optional[str]:
+    """
+    What makes a video count as changed: its duration, rounded to the second.
+    Titles and thumbnails are edited often and do not change the transcript.
+    Returns None when the listing does not report a duration.
+    """
+    duration = entry.get("duration")
+    return None if duration is None else str(round(float(duration)))
+
+
+def forget_run(output_dir: str, url: str, cache: Optional[ArtifactCache] = None):
+    """
+    Makes the next run of url start from scratch, for a video that changed since it was
+    processed: drops its job manifest, the file its download stage recorded and its cached
+    downloads, so the new version is fetched again.
+    """
+    job = JobManifest.for_url(output_dir, url)
+    download = job.data["stages"].get("download")
+    video_path = download["outputs"].get("video_path") if download else None
+    if video_path and os.path.exists(video_path):
+        os.remove(video_path)
+    job.clear()
+    if cache is not None:
+        for format_spec in (VideoDownloader.FORMAT, VideoDownloader.AUDIO_FORMAT, VideoDownloader.STREAM_FORMAT):
+            cache.delete(cache.make_key("download", url=url, format=format_spec))
+
+
+@dataclass
+class SyncEntry:
+    id: str
+    url: str
+    title: Optional[str] = None
+    fingerprint: Optional[str] = None
+    changed: bool = False
+
+
+@dataclass
+class SyncPlan:
+    """
+    The outcome of comparing a listing with the index: what to process and what was passed over.
+    """
+    scanned: int = 0
+    entries: List[SyncEntry] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)  # id -> reason
+    stopped_early: bool = False
+
+    @property
+    def new(self) -> List[SyncEntry]:
+        return [entry for entry in self.entries if not entry.changed]
+
+    @property
+    def changed(self) -> List[SyncEntry]:
+        return [entry for entry in self.entries if entry.changed]
+
+
+class SyncIndex:
+    """
+    Persistent index of the videos a sync has already processed, keyed on the source URL
+    and the video ID, in SQLite next to the outputs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "source TEXT NOT NULL, video_id TEXT NOT NULL, url TEXT NOT NULL, title TEXT, "
+            "fingerprint TEXT, processed_at REAL NOT NULL, PRIMARY KEY (source, video_id))"
+        )
+
+    def lookup(self, source: str, video_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns {video_id: fingerprint} for the given IDs that have been processed.
+        """
+        video_ids = list(video_ids)
+        found = {}
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement.
+            for start in range(0, len(video_ids), 500):
+                chunk = video_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT video_id, fingerprint FROM processed WHERE source = ? AND video_id IN ({', '.join('?' * len(chunk))})",
+                    [source, *chunk],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def mark_processed(self, source: str, entries: Iterable[SyncEntry]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO processed (source, video_id, url, title, fingerprint, processed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(source, entry.id, entry.url, entry.title, entry.fingerprint, now) for entry in entries],
+            )
+
+    def count(self, source: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM processed WHERE source = ?", (source,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ChannelSync:
+    """
+    Works out which videos of a playlist or channel still need processing.
+    The listing is read with flat extraction (one request per page, not per video) and
+    compared with the index; only the candidates, new IDs or known IDs whose duration
+    changed, have their full metadata fetched, metadata_workers at a time. Listings are
+    newest first, so once stop_after_known consecutive entries are already processed the
+    rest of the listing is not read at all (0 reads everything).
+    """
+
+    def __init__(
+        self,
+        downloader,
+        index: SyncIndex,
+        metadata_workers: int = 4,
+        stop_after_known: int = 20,
+        on_progress: Optional[Callable[[str, int], None]] = None,
+    ):
+        self.downloader = downloader
+        self.index = index
+        self.metadata_workers = metadata_workers
+        self.stop_after_known = stop_after_known
+        self.on_progress = on_progress or (lambda phase, count: None)
+
+    def plan(self, source: str, limit: Optional[int] = None) -> SyncPlan:
+        """
+        Lists source and returns the entries to process, in listing order, at most limit of them.
+        """
+        plan = SyncPlan()
+        candidates = []  # (flat entry, whether it was processed before, its indexed fingerprint)
+        seen = set()
+        known_streak = 0
+        page = []
+
+        def check(page: List[dict]):
+            nonlocal known_streak
+            known = self.index.lookup(source, [entry["id"] for entry in page])
+            for entry in page:
+                if entry["id"] in known and fingerprint(entry) in (None, known[entry["id"]]):
+                    known_streak += 1
+                    continue
+                known_streak = 0
+                candidates.append((entry, entry["id"] in known, known.get(entry["id"])))
+
+        for entry in self.downloader.list_entries(source):
+            # A video can be listed on more than one channel tab.
+            if not entry.get("id") or entry["id"] in seen:
+                continue
+            seen.add(entry["id"])
+            plan.scanned += 1
+            page.append(entry)
+            # IDs are looked up a page at a time, so stopping early reads at most one page too many.
+            if len(page) >= 50:
+                check(page)
+                page = []
+                self.on_progress("list", plan.scanned)
+                if self.stop_after_known and known_streak >= self.stop_after_known:
+                    plan.stopped_early = True
+                    break
+                if limit and len(candidates) >= limit:
+                    break
+        if page:
+            check(page)
+        self.on_progress("list", plan.scanned)
+
+        plan.entries = self._resolve(candidates, plan, limit)
+        return plan
+
+    def _resolve(self, candidates: list, plan: SyncPlan, limit: Optional[int]) -> List[SyncEntry]:
+        """
+        Fetches full metadata for the candidates concurrently and drops the ones that cannot
+        be processed (unavailable, live or upcoming) or turn out to be unchanged.
+        """
+
+        def fetch(entry: dict):
+            try:
+                return self.downloader.metadata(entry.get("webpage_url") or entry.get("url") or entry["id"]), None
+            except Exception as e:
+                return None, (str(e).strip().splitlines() or [type(e).__name__])[0]
+
+        resolved = []
+        done = 0
+        # With a limit, metadata is fetched a limit's worth at a time rather than for every candidate.
+        step = limit or len(candidates) or 1
+        with ThreadPoolExecutor(max_workers=max(1, self.metadata_workers)) as pool:
+            for start in range(0, len(candidates), step):
+                batch = candidates[start:start + step]
+                for (entry, is_known, previous), (info, error) in zip(batch, pool.map(fetch, [entry for entry, _, _ in batch])):
+                    done += 1
+                    self.on_progress("metadata", done)
+                    if info is None:
+                        plan.skipped[entry["id"]] = f"metadata unavailable: {error}"
+                    elif info.get("live_status") in UNFINISHED_LIVE_STATUSES:
+                        plan.skipped[entry["id"]] = info["live_status"].replace("_", " ")
+                    elif not (is_known and fingerprint(info) == previous):
+                        resolved.append(
+                            SyncEntry(
+                                id=entry["id"],
+                                url=info.get("webpage_url") or entry.get("url"),
+                                title=info.get("title") or entry.get("title"),
+                                fingerprint=fingerprint(info),
+                                changed=is_known,
+                            )
+                        )
+                if limit and len(resolved) >= limit:
+                    break
+        return resolved[:limit] if limit else resolved
@@ -1,42 +1,267 @@
-import whisper
+import hashlib
+import multiprocessing
 import os
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Union
+
+import numpy as np
+
+from src.core.audio import AudioProcessor
+from src.core.cache import ArtifactCache
+from src.core.chunking import find_quiet_cut, find_split_points, shift_segment, split_audio, stitch_results
+from src.core.models import ModelRegistry, WhisperProfile, default_registry
+
+SAMPLE_RATE = 16000
+# Per-segment fields kept from Whisper's output; token ids and decoding statistics are dropped.
+SEGMENT_KEYS = ("id", "seek", "start", "end", "text", "words")
+
+def compact_result(result: dict) -> dict:
+    """
+    Returns a Whisper result without the per-segment token lists and decoding statistics,
+    which nothing downstream uses but which make up most of its size.
+    """
+    segments = [{key: segment[key] for key in SEGMENT_KEYS if key in segment} for segment in result["segments"]]
+    return {"text": result["text"], "segments": segments, "language": result.get("language")}
+
+def transcription_cache_key(cache: ArtifactCache, audio: Union[str, np.ndarray], model_size: str, task: str, **params) -> str:
+    """
+    Builds the artifact cache key for a Whisper pass over audio.
+    audio is either a file path (keyed on its contents) or a decoded sample array.
+    """
+    if isinstance(audio, np.ndarray):
+        source = hashlib.sha256(memoryview(np.ascontiguousarray(audio))).hexdigest()
+    else:
+        source = cache.file_digest(audio)
+    return cache.make_key(
+        "transcribe",
+        source=source,
+        model_size=model_size,
+        task=task,
+        **params,
+    )
+
+# Transcriber owned by a Whisper pool worker process (see init_worker).
+_worker_transcriber = None
+# torch's thread count once this process has set it (see set_threads).
+_process_threads = None
+_ignored_threads = set()
+_threads_lock = threading.Lock()
+
+def set_threads(threads: int):
+    """
+    Sets torch's intra-op thread count, which applies to the whole process, once: transcriptions
+    sharing a process (the daemon, a batch) would otherwise keep changing it under each other.
+    Later requests for a different count are ignored with a warning.
+    """
+    global _process_threads
+    with _threads_lock:
+        if _process_threads is None:
+            import torch
+
+            torch.set_num_threads(threads)
+            _process_threads = threads
+        elif threads not in _ignored_threads and threads != _process_threads:
+            _ignored_threads.add(threads)
+            print(f"Warning: Whisper already runs on {_process_threads} threads in this process; ignoring a request for {threads}.")
+
+def init_worker(model_size: str, threads: int, profile: Optional[WhisperProfile] = None):
+    """
+    Process pool initializer for Whisper workers.
+    Splits the CPU between workers and binds a per-process Transcriber.
+    """
+    global _worker_transcriber
+    set_threads(threads)
+    _worker_transcriber = Transcriber(model_size=model_size, profile=profile)
+
+def worker_transcribe(method: str, *args, **kwargs) -> dict:
+    """
+    Runs a Transcriber method in a worker set up by init_worker.
+    """
+    return getattr(_worker_transcriber, method)(*args, **kwargs)
+
+def create_worker_pool(model_size: str, workers: int, profile: Optional[WhisperProfile] = None) -> ProcessPoolExecutor:
+    """
+    Starts a pool of Whisper worker processes, each with an equal share of the CPU threads
+    (or the profile's thread count, if it sets one).
+    """
+    threads = profile.threads if profile and profile.threads else max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(model_size, threads, profile),
+    )
 
 class Transcriber:
-    def __init__(self, model_size: str = "base"):
-        print(f"Loading Whisper model: {model_size}...")
-        self.model = whisper.load_model(model_size)
+    def __init__(self, model_size: str = "base", cache: Optional[ArtifactCache] = None, registry: Optional[ModelRegistry] = None, profile: Optional[WhisperProfile] = None):
+        self.model_size = model_size
+        self.cache = cache
+        self.registry = registry or default_registry
+        self.profile = profile or WhisperProfile()
+
+    @property
+    def model(self):
+        """
+        The Whisper model, loaded through the shared registry on first use.
+        """
+        if self.profile.quantize:
+            return self.registry.get(self.model_size, quantize=True)
+        return self.registry.get(self.model_size)
+
+    def _run(self, audio: Union[str, np.ndarray], task: str, **options) -> dict:
+        """
+        One Whisper pass with the profile's decode options; returns the compacted result.
+        The profile's thread count is applied to the process on the first pass (see set_threads).
+        """
+        if self.profile.threads:
+            set_threads(self.profile.threads)
+        return compact_result(self.model.transcribe(audio, task=task, **self.profile.decode_options(), **options))
 
-    def transcribe(self, audio_path: str, task: str = "transcribe") -> dict:
+    def transcribe(self, audio: Union[str, np.ndarray], task: str = "transcribe") -> dict:
         """
-        Transcribes or translates audio file.
+        Transcribes or translates audio.
+        audio: path to an audio file, or 16 kHz mono float32 samples
         task: "transcribe" or "translate"
         Returns the result dictionary from Whisper.
         """
-        print(f"Starting {task} for {audio_path}...")
-        result = self.model.transcribe(audio_path, task=task)
-        return result
+        return self._transcribe_cached(audio, task, lambda: audio)
+
+    def transcribe_media(self, media_path: str, task: str = "transcribe") -> dict:
+        """
+        Transcribes or translates the audio track of any media file without writing a WAV.
+        The audio is decoded once into memory and handed directly to Whisper; on a cache
+        hit it is not decoded at all.
+        """
+        return self._transcribe_cached(media_path, task, lambda: AudioProcessor().load_audio(media_path))
 
-    def save_srt(self, result: dict, output_path: str):
+    def transcribe_parallel(
+        self,
+        audio: Union[str, np.ndarray],
+        task: str = "transcribe",
+        workers: int = 2,
+        chunk_seconds: float = 300.0,
+        overlap_seconds: float = 1.0,
+    ) -> dict:
         """
-        Saves transcription result as SRT file.
+        Transcribes long audio by cutting it at quiet points into ~chunk_seconds chunks
+        and running them concurrently in a pool of worker processes.
+        The chunk results are stitched back into a single Whisper-style result.
+        Audio shorter than 1.5 chunks is transcribed in one pass.
+        A file is looked up in the cache by its contents before it is decoded.
         """
-        with open(output_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(result["segments"], start=1):
-                start = self._format_timestamp(segment["start"])
-                end = self._format_timestamp(segment["end"])
-                text = segment["text"].strip()
+        if isinstance(audio, str):
+            if workers < 2:
+                return self.transcribe_media(audio, task=task)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = transcription_cache_key(
+                    self.cache, audio, self.model_size, task, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds, **self.profile.cache_params()
+                )
+                cached_result = self.cache.get_json(cache_key)
+                if cached_result is not None:
+                    print(f"Using cached {task} for {audio}")
+                    return cached_result
+            samples = AudioProcessor().load_audio(audio, sample_rate=SAMPLE_RATE)
+            result = self.transcribe_parallel(samples, task=task, workers=workers, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds)
+            if cache_key is not None:
+                self.cache.put_json(cache_key, result)
+            return result
 
-                f.write(f"{i}\n")
-                f.write(f"{start} --> {end}\n")
-                f.write(f"{text}\n\n")
+        split_points = find_split_points(audio, SAMPLE_RATE, chunk_seconds=chunk_seconds)
+        if not split_points or workers < 2:
+            return self.transcribe(audio, task=task)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = transcription_cache_key(
+                self.cache, audio, self.model_size, task, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds, **self.profile.cache_params()
+            )
+            cached_result = self.cache.get_json(cache_key)
+            if cached_result is not None:
+                print(f"Using cached {task} for in-memory audio")
+                return cached_result
+
+        chunks = split_audio(audio, split_points, overlap_samples=int(overlap_seconds * SAMPLE_RATE))
+        print(f"Starting {task} of {len(chunks)} chunks on {workers} workers...")
+        with create_worker_pool(self.model_size, min(workers, len(chunks)), self.profile) as pool:
+            futures = [pool.submit(worker_transcribe, "transcribe", chunk, task=task) for chunk, _, _, _ in chunks]
+            results = [future.result() for future in futures]
+        result = stitch_results(results, chunks, SAMPLE_RATE)
+
+        if cache_key is not None:
+            self.cache.put_json(cache_key, result)
+        return result
 
-    def _format_timestamp(self, seconds: float) -> str:
+    def transcribe_stream(
+        self,
+        blocks: Iterable[np.ndarray],
+        task: str = "transcribe",
+        window_seconds: float = 30.0,
+        search_seconds: float = 5.0,
+        on_segments: Optional[Callable[[List[dict]], None]] = None,
+    ) -> dict:
         """
-        Formats seconds into SRT timestamp format (HH:MM:SS,mmm).
+        Transcribes audio that arrives in blocks (see AudioProcessor.stream_audio), e.g. from a
+        download that is still running. Whenever window_seconds of audio are buffered, the
+        window is cut at its quietest point within the last search_seconds, transcribed and
+        its segments passed to on_segments with timestamps relative to the whole stream.
+        The tail of each window's text is the prompt for the next one (unless the profile turns
+        off condition_on_previous_text), so wording and punctuation stay consistent across cuts.
+        Returns the combined Whisper-style result.
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds - int(seconds)) * 1000)
-        return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+        if not 0 < search_seconds < window_seconds:
+            raise ValueError(f"search_seconds ({search_seconds}) must be positive and shorter than window_seconds ({window_seconds})")
+        segments = []
+        languages = []
+        offset = 0  # samples consumed by earlier windows
+        buffer = np.zeros(0, dtype=np.float32)
+        window = int(window_seconds * SAMPLE_RATE)
+
+        def flush(audio: np.ndarray):
+            prompt = None
+            if self.profile.condition_on_previous_text:
+                prompt = "".join(segment["text"] for segment in segments[-8:])[-200:] or None
+            result = self._run(audio, task, initial_prompt=prompt)
+            languages.append(result.get("language"))
+            shift = offset / SAMPLE_RATE
+            new = [shift_segment(segment, shift, len(segments) + i) for i, segment in enumerate(result["segments"])]
+            segments.extend(new)
+            if on_segments and new:
+                on_segments(new)
+
+        print(f"Starting streaming {task} in {window_seconds:.0f}s windows...")
+        for block in blocks:
+            buffer = np.concatenate((buffer, block))
+            while len(buffer) >= window:
+                cut = find_quiet_cut(buffer, SAMPLE_RATE, min_seconds=window_seconds - search_seconds, max_seconds=window_seconds)
+                flush(buffer[:cut])
+                offset += cut
+                buffer = buffer[cut:]
+        if len(buffer) >= SAMPLE_RATE * 0.1:
+            flush(buffer)
+
+        known = [language for language in languages if language]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": max(set(known), key=known.count) if known else None,
+        }
+
+    def _transcribe_cached(self, source: Union[str, np.ndarray], task: str, load_audio: Callable[[], Union[str, np.ndarray]]) -> dict:
+        label = source if isinstance(source, str) else "in-memory audio"
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = transcription_cache_key(self.cache, source, self.model_size, task, **self.profile.cache_params())
+            cached_result = self.cache.get_json(cache_key)
+            if cached_result is not None:
+                print(f"Using cached {task} for {label}")
+                return cached_result
+
+        print(f"Starting {task} for {label}...")
+        result = self._run(load_audio(), task)
+
+        if cache_key is not None:
+            self.cache.put_json(cache_key, result)
+        return result
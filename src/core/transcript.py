@@ -0,0 +1,181 @@
+import json
+import os
+import re
+from json.encoder import encode_basestring
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.subtitles import EXPORT_FORMATS
+
+
+def format_timestamps(seconds: np.ndarray, decimal: str = ",") -> List[str]:
+    """
+    Formats an array of second offsets as HH:MM:SS,mmm (SRT) or, with decimal=".", as WebVTT
+    timestamps. The arithmetic runs on whole arrays; only the final string assembly is per item.
+    Milliseconds are truncated, like subtitles.format_timestamp.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    whole = np.floor(seconds)
+    millis = ((seconds - whole) * 1000).astype(np.int64)
+    whole = whole.astype(np.int64)
+    hours, rest = np.divmod(whole, 3600)
+    minutes, secs = np.divmod(rest, 60)
+    template = f"%02d:%02d:%02d{decimal}%03d"
+    return [template % parts for parts in zip(hours.tolist(), minutes.tolist(), secs.tolist(), millis.tolist())]
+
+
+_SRT_CUE = re.compile(
+    r"(\d+):(\d\d):(\d\d)[,.](\d{1,3})\s*-->\s*(\d+):(\d\d):(\d\d)[,.](\d{1,3})[^\n]*\n(.*?)(?:\n\s*\n|\Z)",
+    re.DOTALL,
+)
+
+
+class Transcript:
+    """
+    Compact, column-oriented transcript.
+    Segment start/end times are float64 arrays and all segment texts live in one string with
+    an offsets array, so a transcript costs a few dozen bytes per segment instead of a dict per
+    segment with Whisper's token lists and decoding statistics. The full text is the buffer
+    itself. Exporters format every timestamp in one vectorized pass and write each file with
+    a single call.
+    """
+
+    def __init__(self, starts: Sequence[float], ends: Sequence[float], texts: Iterable[str], language: Optional[str] = None):
+        texts = list(texts)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        if not len(self.starts) == len(self.ends) == len(texts):
+            raise ValueError("starts, ends and texts must have the same length")
+        self.language = language
+        self._buffer = "".join(texts)
+        self._offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=self._offsets[1:])
+        self._timestamps = None
+
+    @classmethod
+    def from_result(cls, result: dict) -> "Transcript":
+        """
+        Builds a transcript from a Whisper-style result, dropping everything but times and text.
+        """
+        segments = result["segments"]
+        return cls(
+            [segment["start"] for segment in segments],
+            [segment["end"] for segment in segments],
+            [segment["text"] for segment in segments],
+            language=result.get("language"),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Transcript":
+        """
+        Reads a transcript written by save(), or a Whisper-style result saved as JSON.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "segments" in data:
+            return cls.from_result(data)
+        return cls(data["start"], data["end"], data["text"], language=data.get("language"))
+
+    @classmethod
+    def from_srt(cls, text: str, language: Optional[str] = None) -> "Transcript":
+        """
+        Parses SRT (or WebVTT) cues; multi-line cues are joined with spaces.
+        """
+        starts, ends, texts = [], [], []
+        for match in _SRT_CUE.finditer(text.replace("\r\n", "\n")):
+            h1, m1, s1, ms1, h2, m2, s2, ms2, body = match.groups()
+            starts.append(int(h1) * 3600 + int(m1) * 60 + int(s1) + int(ms1.ljust(3, "0")) / 1000)
+            ends.append(int(h2) * 3600 + int(m2) * 60 + int(s2) + int(ms2.ljust(3, "0")) / 1000)
+            texts.append(" " + " ".join(line.strip() for line in body.strip().splitlines()))
+        return cls(starts, ends, texts, language=language)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"language": self.language, "start": self.starts.tolist(), "end": self.ends.tolist(), "text": self.texts}, f, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    @property
+    def texts(self) -> List[str]:
+        offsets = self._offsets.tolist()
+        return [self._buffer[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def duration(self) -> float:
+        return float(self.ends[-1]) if len(self) else 0.0
+
+    def segments(self) -> List[dict]:
+        """
+        Whisper-style segment dicts (id, start, end, text), built on demand.
+        """
+        return [
+            {"id": i, "start": start, "end": end, "text": text}
+            for i, (start, end, text) in enumerate(zip(self.starts.tolist(), self.ends.tolist(), self.texts))
+        ]
+
+    def to_result(self) -> dict:
+        return {"text": self.text, "segments": self.segments(), "language": self.language}
+
+    def with_texts(self, texts: Iterable[str]) -> "Transcript":
+        """
+        Returns a transcript with the same timing and new texts, e.g. a translation.
+        """
+        return Transcript(self.starts, self.ends, texts, language=self.language)
+
+    def _formatted(self):
+        # Formatted once per transcript; the WebVTT exporter only swaps the decimal separator.
+        if self._timestamps is None:
+            both = format_timestamps(np.concatenate((self.starts, self.ends)))
+            self._timestamps = (both[:len(self)], both[len(self):])
+        return self._timestamps
+
+    def srt(self, first_index: int = 1) -> str:
+        starts, ends = self._formatted()
+        cues = [
+            f"{index}\n{start} --> {end}\n{text.strip()}\n\n"
+            for index, start, end, text in zip(range(first_index, first_index + len(self)), starts, ends, self.texts)
+        ]
+        return "".join(cues)
+
+    def vtt(self) -> str:
+        starts, ends = self._formatted()
+        cues = [f"{start.replace(',', '.')} --> {end.replace(',', '.')}\n{text.strip()}\n\n" for start, end, text in zip(starts, ends, self.texts)]
+        return "WEBVTT\n\n" + "".join(cues)
+
+    def jsonl(self) -> str:
+        # Only the text needs JSON escaping; a float's repr is already valid JSON.
+        lines = [
+            f'{{"start": {start!r}, "end": {end!r}, "text": {encode_basestring(text.strip())}}}\n'
+            for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+        ]
+        return "".join(lines)
+
+    def txt(self) -> str:
+        return "".join(text.strip() + "\n" for text in self.texts)
+
+    def write(self, path: str, fmt: Optional[str] = None):
+        """
+        Writes the transcript as fmt (srt, vtt, jsonl or txt; default: from the extension).
+        """
+        fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown transcript format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(getattr(self, fmt)())
+
+    def export(self, base_path: str, formats: Iterable[str] = ("srt",)) -> Dict[str, str]:
+        """
+        Writes base_path.<format> for each format and returns {format: path}.
+        Timestamps are formatted once and shared by the SRT and WebVTT files.
+        """
+        paths = {}
+        for fmt in formats:
+            paths[fmt] = f"{base_path}.{fmt}"
+            self.write(paths[fmt], fmt)
+        return paths
@@ -1,72 +1,208 @@
-from src.core.llm import LLMClient
-import math
+from src.core.llm import LLMClient, LLMError, estimate_tokens, run_sync
+from src.core.llm_cache import TranslationMemory
+from src.core.jobs import StageCheckpoint
+from typing import TYPE_CHECKING, Dict, List, Optional
+import asyncio
+import json
+
+if TYPE_CHECKING:
+    from src.core.transcript import Transcript  # imports NumPy
+
+class BatchBudget:
+    """
+    Token budget for translation batches sent to one model.
+    Grows while batches keep succeeding and shrinks when the model starts
+    returning unusable answers, based on an exponential moving success rate.
+    """
+
+    def __init__(self, tokens: int = 800, minimum: int = 100, maximum: int = 4000):
+        self.tokens = tokens
+        self.minimum = minimum
+        self.maximum = maximum
+        self.success_rate = 1.0
+
+    def record(self, ok: bool, batch_tokens: int):
+        self.success_rate = 0.8 * self.success_rate + 0.2 * (1.0 if ok else 0.0)
+        if not ok:
+            # Aim below the size that just failed.
+            self.tokens = max(self.minimum, min(self.tokens, int(batch_tokens * 0.75)))
+        elif self.success_rate >= 0.9 and batch_tokens >= self.tokens * 0.5:
+            self.tokens = min(self.maximum, int(self.tokens * 1.2))
+
+# Budgets are shared by every Translator in the process, keyed on "provider:model".
+_budgets: Dict[str, BatchBudget] = {}
 
 class Translator:
-    def __init__(self, client: LLMClient):
+    def __init__(self, client: LLMClient, max_concurrency: int = 4, memory: Optional[TranslationMemory] = None, checkpoint: Optional[StageCheckpoint] = None):
         self.client = client
+        self.max_concurrency = max_concurrency
+        self.memory = memory
+        self.checkpoint = checkpoint
 
-    def translate_segments(self, segments: list, target_language: str, batch_size: int = 20) -> list:
+    def translate_segments(self, segments: list, target_language: str, token_budget: Optional[int] = None) -> list:
         """
         Translates the text of each segment to the target language.
         Uses batching and JSON formatting to ensure strict 1-to-1 mapping.
+        Batches are filled up to a token budget (adapted per model unless token_budget is given),
+        up to max_concurrency of them are in flight at once, and a batch the model answers
+        badly is split in half and retried so only the misbehaving lines fall back.
+        Each distinct line is translated once; lines found in the translation memory are
+        filled in without an LLM call. With a job checkpoint, every finished batch is recorded
+        so an interrupted run resumes with the lines that were still missing.
         """
-        import json
+        return run_sync(self.atranslate_segments(segments, target_language, token_budget))
+
+    async def atranslate_segments(self, segments: list, target_language: str, token_budget: Optional[int] = None) -> list:
+        texts = [seg['text'].strip() for seg in segments]
+        translated = await self.atranslate_lines(texts, target_language, token_budget)
+
+        # Update segments with translated text
         translated_segments = []
+        for segment, text in zip(segments, translated):
+            new_segment = segment.copy()
+            new_segment['text'] = text
+            translated_segments.append(new_segment)
 
-        # Process in batches
-        num_batches = math.ceil(len(segments) / batch_size)
-
-        for i in range(num_batches):
-            batch = segments[i * batch_size : (i + 1) * batch_size]
-
-            # Prepare input as a list of strings
-            texts_to_translate = [seg['text'].strip() for seg in batch]
-            json_input = json.dumps(texts_to_translate, ensure_ascii=False, indent=2)
-
-            prompt = (
-                f"You are a precise translator. Translate the following JSON list of strings to {target_language}.\n"
-                "Rules:\n"
-                "1. Return a valid JSON list of strings.\n"
-                "2. The output list MUST have exactly the same number of elements as the input list.\n"
-                "3. Translate each string independently. DO NOT merge content from multiple strings into one.\n"
-                "4. DO NOT split one string into multiple strings.\n"
-                "5. Maintain the tone and context of the original text.\n\n"
-                f"Input JSON:\n{json_input}\n\n"
-                "Output JSON:"
-            )
+        return translated_segments
+
+    def translate_transcript(self, transcript: "Transcript", target_language: str, token_budget: Optional[int] = None) -> "Transcript":
+        """
+        Like translate_segments(), for a Transcript: returns a Transcript with the same timing
+        and translated texts, without building a dict per segment.
+        Each translation keeps its source segment's leading whitespace, so the result's text is
+        the full translated transcript; no separate whole-text request is needed.
+        """
+        sources = transcript.texts
+        texts = [text.strip() for text in sources]
+        translated = run_sync(self.atranslate_lines(texts, target_language, token_budget))
+        return transcript.with_texts(source[:len(source) - len(source.lstrip())] + text for source, text in zip(sources, translated))
+
+    async def atranslate_lines(self, texts: List[str], target_language: str, token_budget: Optional[int] = None) -> List[str]:
+        """
+        Translates a list of lines (see translate_segments); untranslatable lines are kept as they are.
+        """
+        translations = self.memory.lookup(texts, target_language) if self.memory else {}
+        if self.checkpoint is not None:
+            translations.update(self.checkpoint.lookup(texts))
+
+        pending = [text for text in dict.fromkeys(texts) if text and text not in translations]
+        budget = self._budget()
+        position = 0
+        batch_index = 0
 
-            response = self.client.generate(
-                prompt,
-                system_prompt=f"You are a professional translator. Translate to {target_language} preserving the exact structure."
+        async def worker():
+            nonlocal position, batch_index
+            while position < len(pending):
+                # Take the next batch under the current budget; there is no await between
+                # reading and advancing position, so workers never take the same lines.
+                limit = token_budget or budget.tokens
+                batch = []
+                used = 0
+                while position < len(pending):
+                    cost = self._line_tokens(pending[position])
+                    if batch and used + cost > limit:
+                        break
+                    batch.append(pending[position])
+                    used += cost
+                    position += 1
+                i = batch_index
+                batch_index += 1
+                translations.update(await self._translate_bisecting(i, batch, target_language, budget))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.max_concurrency))))
+
+        return [translations.get(text, text) for text in texts]
+
+    async def _translate_bisecting(self, i, batch: list, target_language: str, budget: "BatchBudget") -> dict:
+        """
+        Translates a batch, splitting it in half and retrying each half whenever the model's
+        answer is unusable. Returns {source: translation}; lines that still fail on their
+        own, and the lines of failed requests, are left out so the caller keeps the original text.
+        """
+        tokens = sum(self._line_tokens(text) for text in batch)
+        try:
+            translated_texts = await self._translate_batch(batch, target_language)
+        except LLMError as e:
+            # Failed requests (timeouts, rate limits) say nothing about the batch size.
+            print(f"Warning: Request failed for batch {i}: {e}. Keeping the original text of its {len(batch)} lines.")
+            return {}
+        except ValueError as e:
+            budget.record(False, tokens)
+            if len(batch) == 1:
+                print(f"Warning: Could not translate line {batch[0][:60]!r} ({e}). Keeping the original text.")
+                return {}
+            middle = len(batch) // 2
+            first, second = await asyncio.gather(
+                self._translate_bisecting(f"{i}a", batch[:middle], target_language, budget),
+                self._translate_bisecting(f"{i}b", batch[middle:], target_language, budget),
             )
+            return {**first, **second}
 
-            # Parse response
-            try:
-                # Find the JSON list in the response (in case of extra text)
-                start_idx = response.find('[')
-                end_idx = response.rfind(']') + 1
-                if start_idx != -1 and end_idx != -1:
-                    json_str = response[start_idx:end_idx]
-                    translated_texts = json.loads(json_str)
-
-                    if len(translated_texts) != len(batch):
-                        print(f"Warning: Batch {i} size mismatch. Expected {len(batch)}, got {len(translated_texts)}. Fallback to original.")
-                        translated_texts = texts_to_translate # Fallback
-                else:
-                    print(f"Warning: Could not find JSON in response for batch {i}. Fallback to original.")
-                    print(f"DEBUG: Raw response:\n{response}")
-                    translated_texts = texts_to_translate
-
-            except json.JSONDecodeError as e:
-                print(f"Warning: JSON decode error for batch {i}: {e}. Fallback to original.")
-                print(f"DEBUG: Raw response:\n{response}")
-                translated_texts = texts_to_translate
-
-            # Update segments with translated text
-            for j, segment in enumerate(batch):
-                new_segment = segment.copy()
-                if j < len(translated_texts):
-                    new_segment['text'] = translated_texts[j]
-                translated_segments.append(new_segment)
+        budget.record(True, tokens)
+        if self.memory:
+            self.memory.store(zip(batch, translated_texts), target_language)
+        if self.checkpoint is not None:
+            self.checkpoint.put_many(dict(zip(batch, translated_texts)))
+        return dict(zip(batch, translated_texts))
 
-        return translated_segments
+    def _budget(self) -> "BatchBudget":
+        key = f"{getattr(self.client, 'provider', type(self.client).__name__)}:{getattr(self.client, 'model', '')}"
+        return _budgets.setdefault(key, BatchBudget())
+
+    @staticmethod
+    def _line_tokens(text: str) -> int:
+        # Quotes, comma and indentation of the JSON list add a few tokens per line.
+        return estimate_tokens(text) + 3
+
+    async def _translate_batch(self, texts_to_translate: list, target_language: str) -> list:
+        """
+        Translates one batch of lines. Raises LLMError if the request fails and ValueError if
+        the answer is unusable.
+        """
+        json_input = json.dumps(texts_to_translate, ensure_ascii=False, indent=2)
+
+        prompt = (
+            f"You are a precise translator. Translate the following JSON list of strings to {target_language}.\n"
+            "Rules:\n"
+            "1. Return a valid JSON list of strings.\n"
+            "2. The output list MUST have exactly the same number of elements as the input list.\n"
+            "3. Translate each string independently. DO NOT merge content from multiple strings into one.\n"
+            "4. DO NOT split one string into multiple strings.\n"
+            "5. Maintain the tone and context of the original text.\n\n"
+            f"Input JSON:\n{json_input}\n\n"
+            "Output JSON:"
+        )
+
+        system_prompt = f"You are a professional translator. Translate to {target_language} preserving the exact structure."
+        response = await self.client.agenerate(prompt, system_prompt=system_prompt)
+        try:
+            return self._parse_batch(response, len(texts_to_translate))
+        except ValueError:
+            # Don't let a response cache replay the unusable answer on the next run.
+            forget = getattr(self.client, "forget", None)
+            if forget:
+                forget(prompt, system_prompt=system_prompt)
+            raise
+
+    @staticmethod
+    def _parse_batch(response: str, count: int) -> list:
+        """
+        Extracts the list of count translated strings from a response (which may have text
+        around the JSON). Raises ValueError if there is no such list.
+        """
+        start = response.find("[")
+        end = response.rfind("]") + 1
+        if start == -1 or end <= start:
+            raise ValueError("no JSON list in the answer")
+        try:
+            translated_texts = json.loads(response[start:end])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from e
+        if not isinstance(translated_texts, list):
+            raise ValueError("the answer is not a JSON list")
+        if len(translated_texts) != count:
+            raise ValueError(f"expected {count} lines, got {len(translated_texts)}")
+        # null, numbers or nested lists are not translations; storing them would replay them on every run.
+        if not all(isinstance(text, str) for text in translated_texts):
+            raise ValueError("the answer has elements that are not strings")
+        return translated_texts
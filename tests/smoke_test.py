@@ -1,14 +1,16 @@
 from src.core.downloader import VideoDownloader
 from src.core.audio import AudioProcessor
 from src.core.transcriber import Transcriber
-from src.core.summarizer import OllamaSummarizer
+from src.core.summarizer import Summarizer
+from src.bench.stub_llm import StubLLMClient
 
 print("Imports successful")
 try:
     d = VideoDownloader()
     a = AudioProcessor()
     # t = Transcriber() # Might load model, skip for smoke test
-    s = OllamaSummarizer()
+    s = Summarizer(StubLLMClient())
     print("Instantiation successful")
+    print(s.summarize("Smoke test transcript."))
 except Exception as e:
     print(f"Error: {e}")
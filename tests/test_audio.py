@@ -0,0 +1,69 @@
+import ffmpeg._run
+import pytest
+
+from src.core.audio import AudioProcessor
+
+
+class FakeProcess:
+    returncode = 0
+
+    def communicate(self, input=None):
+        return b"", b""
+
+    def poll(self):
+        return 0
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """
+    The ffmpeg command lines a test runs, recorded instead of run.
+    """
+    calls = []
+
+    def popen(args, **kwargs):
+        calls.append(args)
+        return FakeProcess()
+
+    monkeypatch.setattr(ffmpeg._run.subprocess, "Popen", popen)
+    return calls
+
+
+def option(args, name):
+    return args[args.index(name) + 1]
+
+
+def test_soft_subtitles_are_copied_as_titled_tracks(commands):
+    output = AudioProcessor().embed_subtitles("talk.webm", ["talk_French.srt", "talk.srt"], titles=["French", "Original"])
+
+    # WebM cannot hold SRT tracks, so the output becomes Matroska.
+    assert output == "talk_subbed.mkv"
+    args = commands[0]
+    assert [args[i + 1] for i, arg in enumerate(args) if arg == "-i"] == ["talk.webm", "talk_French.srt", "talk.srt"]
+    assert (option(args, "-c"), option(args, "-c:s")) == ("copy", "srt")
+    assert (option(args, "-metadata:s:s:0"), option(args, "-metadata:s:s:1")) == ("title=French", "title=Original")
+    assert "-filter_complex" not in args and "libx264" not in args
+
+    # MP4 keeps its container and labels mov_text tracks by handler name.
+    AudioProcessor().embed_subtitles("talk.mp4", "talk.srt", titles=["Original"])
+    args = commands[1]
+    assert "talk_subbed.mp4" in args
+    assert option(args, "-c:s") == "mov_text"
+    assert option(args, "-metadata:s:s:0") == "handler_name=Original"
+
+
+def test_burned_subtitles_reencode_the_video(commands):
+    output = AudioProcessor().embed_subtitles("talk.webm", ["talk_French.srt", "talk.srt"], burn_in=True, preset="ultrafast", threads=2)
+
+    # Burned in, the first track is drawn into the picture and the container is kept.
+    assert output == "talk_subbed.webm"
+    args = commands[0]
+    assert [args[i + 1] for i, arg in enumerate(args) if arg == "-i"] == ["talk.webm"]
+    assert "subtitles=talk_French.srt" in option(args, "-filter_complex")
+    assert (option(args, "-vcodec"), option(args, "-preset"), option(args, "-threads"), option(args, "-acodec")) == ("libx264", "ultrafast", "2", "copy")
+
+
+def test_no_subtitles_is_an_error(commands):
+    with pytest.raises(ValueError):
+        AudioProcessor().embed_subtitles("talk.mp4", [])
+    assert commands == []
@@ -0,0 +1,53 @@
+import json
+import sys
+
+import pytest
+
+from src.bench.media import make_segments
+from src.bench.stub_llm import StubLLMClient
+from src.bench.suite import BenchConfig, find_regressions, load_baseline, run_benchmarks, save_baseline
+from src.core.llm import LLMError
+from src.core.translator import Translator
+
+
+def test_stub_failures_are_deterministic():
+    segments = make_segments(50)
+    outputs = []
+    for _ in range(2):
+        client = StubLLMClient(failure_rate=0.5, failure_mode="short", seed=3)
+        outputs.append(Translator(client, max_concurrency=4).translate_segments(segments, "French", token_budget=100))
+    assert outputs[0] == outputs[1]
+    assert any(segment["text"].startswith("[stub]") for segment in outputs[0])
+
+
+def test_stub_raises_in_error_mode():
+    client = StubLLMClient(failure_rate=1.0, failure_mode="error")
+    with pytest.raises(LLMError):
+        client.generate("hello")
+
+
+def test_llm_benchmarks_run_offline(tmp_path):
+    config = BenchConfig(work_dir=str(tmp_path), repeat=1, segments=40, llm_latency=0.0)
+    results = run_benchmarks(config, ["translate_segments", "summarize", "save_srt"])
+    assert all(result["seconds"] >= 0 for result in results.values())
+    assert results["translate_segments"]["requests_per_run"] >= 1
+
+
+def test_regressions_are_flagged_against_baseline(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline({"save_srt": {"seconds": 1.0}, "transcribe_tiny": {"skipped": "no whisper"}}, path)
+    baseline = load_baseline(path)
+    assert "transcribe_tiny" not in baseline
+
+    results = {"save_srt": {"seconds": 1.5}, "summarize": {"seconds": 9.0}}
+    assert find_regressions(results, baseline, threshold=0.2) == [("save_srt", 1.0, 1.5)]
+    assert find_regressions(results, baseline, threshold=0.6) == []
+    assert json.load(open(path))["results"]["save_srt"]["seconds"] == 1.0
+
+
+@pytest.mark.parametrize("name", ["transcribe_tiny", "whisper_profiles"])
+def test_whisper_benchmarks_are_skipped_without_whisper(tmp_path, monkeypatch, name):
+    # None in sys.modules makes `import whisper` fail as if it were not installed.
+    monkeypatch.setitem(sys.modules, "whisper", None)
+    results = run_benchmarks(BenchConfig(work_dir=str(tmp_path), repeat=1), [name])
+    assert "Whisper not installed" in results[name]["skipped"]
@@ -0,0 +1,116 @@
+import itertools
+import json
+import os
+
+from src.core import cache as cache_module
+from src.core.cache import ArtifactCache
+
+
+def document(char: str) -> dict:
+    # Serializes to exactly 100 bytes.
+    return {"text": char * 88}
+
+
+def test_least_recently_used_entries_are_evicted_to_fit(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    cache = ArtifactCache(str(tmp_path), max_size=250)
+    keys = {name: ArtifactCache.make_key("transcribe", name=name) for name in "abc"}
+
+    cache.put_json(keys["a"], document("a"))
+    cache.put_json(keys["b"], document("b"))
+    assert cache.total_size() == 200
+    # Reading "a" makes "b" the least recently used.
+    assert cache.get_json(keys["a"]) == document("a")
+    cache.put_json(keys["c"], document("c"))
+
+    assert cache.get_json(keys["b"]) is None
+    assert not os.path.exists(os.path.join(cache.objects_dir, f"{keys['b']}.json"))
+    assert cache.total_size() == 200 <= cache.max_size
+
+    # The index survives a restart, with the recency it had.
+    reopened = ArtifactCache(str(tmp_path), max_size=250)
+    assert reopened.get_json(keys["c"]) == document("c")
+    reopened.put_json(keys["b"], document("b"))
+    assert reopened.get_json(keys["a"]) is None
+    assert reopened.get_json(keys["c"]) == document("c")
+
+
+def test_files_are_replaced_and_counted_once(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"), max_size=1000)
+    source = tmp_path / "video.mp4"
+    key = ArtifactCache.make_key("download", url="https://example.com/v")
+
+    source.write_bytes(b"x" * 600)
+    cache.put_file(key, str(source))
+    source.write_bytes(b"y" * 700)
+    cache.put_file(key, str(source))
+    assert cache.total_size() == 700
+
+    restored = cache.get_file(key, str(tmp_path / "out"))
+    assert open(restored, "rb").read() == b"y" * 700
+    # An entry larger than the whole budget pushes everything out, itself included.
+    cache.put_json(ArtifactCache.make_key("transcribe", name="big"), {"text": "z" * 2000})
+    assert cache.total_size() == 0
+
+
+def test_caches_sharing_a_directory_keep_each_others_entries(tmp_path):
+    first = ArtifactCache(str(tmp_path), max_size=250)
+    second = ArtifactCache(str(tmp_path), max_size=250)
+    keys = [ArtifactCache.make_key("transcribe", name=name) for name in "abc"]
+
+    first.put_json(keys[0], document("a"))
+    second.put_json(keys[1], document("b"))
+    assert first.get_json(keys[1]) == document("b")
+    assert second.total_size() == first.total_size() == 200
+    # Either process's write counts everything towards the limit.
+    second.put_json(keys[2], document("c"))
+    assert first.get_json(keys[0]) is None
+    assert ArtifactCache(str(tmp_path)).total_size() == 200
+
+
+def test_hits_are_recorded_in_batches(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    monkeypatch.setattr(cache_module, "TOUCH_BATCH", 2)
+    cache = ArtifactCache(str(tmp_path))
+    keys = [ArtifactCache.make_key("transcribe", name=name) for name in "ab"]
+    for key, char in zip(keys, "ab"):
+        cache.put_json(key, document(char))
+
+    def last_access(cache):
+        return dict(cache._conn.execute("SELECT key, last_access FROM entries").fetchall())
+
+    stored = last_access(cache)
+    cache.get_json(keys[0])
+    cache.get_json(keys[0])
+    assert last_access(cache) == stored
+    # The second distinct key fills the batch.
+    cache.get_json(keys[1])
+    touched = last_access(cache)
+    assert touched[keys[0]] > stored[keys[0]] and touched[keys[1]] > stored[keys[1]]
+
+    # Pending hits are written when the cache is closed.
+    cache.get_json(keys[0])
+    cache.close()
+    assert last_access(ArtifactCache(str(tmp_path)))[keys[0]] > touched[keys[0]]
+
+
+def test_digests_of_missing_files_are_pruned_and_old_indexes_imported(tmp_path):
+    cache_dir = tmp_path / "cache"
+    source = tmp_path / "audio.wav"
+    source.write_bytes(b"data")
+    ArtifactCache(str(cache_dir)).file_digest(str(source))
+    source.unlink()
+    assert ArtifactCache(str(cache_dir))._conn.execute("SELECT COUNT(*) FROM digests").fetchone()[0] == 0
+
+    # An index.json from before the SQLite index.
+    key = ArtifactCache.make_key("transcribe", name="old")
+    (cache_dir / "objects" / f"{key}.json").write_text(json.dumps(document("o")))
+    (cache_dir / "index.json").write_text(json.dumps({
+        "entries": {key: {"kind": "json", "object": f"{key}.json", "size": 100, "last_access": 1.0}},
+        "digests": {},
+    }))
+    cache = ArtifactCache(str(cache_dir))
+    assert cache.get_json(key) == document("o") and cache.total_size() == 100
+    assert not (cache_dir / "index.json").exists()
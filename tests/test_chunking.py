@@ -0,0 +1,96 @@
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from src.core.audio import AudioProcessor
+from src.core.cache import ArtifactCache
+from src.core.chunking import find_split_points, split_audio, stitch_results
+from src.core.transcriber import SAMPLE_RATE, Transcriber
+
+
+def tone_with_gaps(seconds: float, gaps):
+    """
+    A 440 Hz tone with a second of silence starting at each of gaps (in seconds).
+    """
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.3 * np.sin(2 * np.pi * 440 * t)
+    for start in gaps:
+        audio[int(start * SAMPLE_RATE):int((start + 1) * SAMPLE_RATE)] = 0.0
+    return audio.astype(np.float32)
+
+
+def test_split_points_fall_in_the_silences():
+    audio = tone_with_gaps(30, [9.5, 21.0])
+    points = find_split_points(audio, SAMPLE_RATE, chunk_seconds=10, search_seconds=2)
+
+    assert len(points) == 2
+    assert 9.5 * SAMPLE_RATE <= points[0] <= 10.5 * SAMPLE_RATE
+    assert 21.0 * SAMPLE_RATE <= points[1] <= 22.0 * SAMPLE_RATE
+    # Audio up to 1.5 chunks long is not split.
+    assert find_split_points(audio[:15 * SAMPLE_RATE], SAMPLE_RATE, chunk_seconds=10) == []
+
+
+def test_chunks_overlap_their_neighbours_within_bounds():
+    audio = np.arange(100, dtype=np.float32)
+    chunks = split_audio(audio, [30, 60], overlap_samples=5)
+
+    assert [(offset, owned_start, owned_end) for _, offset, owned_start, owned_end in chunks] == [(0, 0, 30), (25, 30, 60), (55, 60, 100)]
+    assert [(chunk[0], chunk[-1]) for chunk, _, _, _ in chunks] == [(0, 34), (25, 64), (55, 99)]
+
+
+def test_stitched_segments_are_shifted_and_deduplicated():
+    sample_rate = 10
+    chunks = split_audio(np.zeros(100, dtype=np.float32), [30, 60], overlap_samples=5)
+    results = [
+        # The second segment's midpoint (3.05 s) lies in the next chunk's region, which repeats it.
+        {"segments": [{"start": 0.0, "end": 2.6, "text": " a"}, {"start": 2.6, "end": 3.5, "text": " b"}], "language": "en"},
+        {"segments": [{"start": 0.1, "end": 1.0, "text": " b"}, {"start": 1.0, "end": 3.4, "text": " c"}], "language": "en"},
+        # Starts in the overlap before 6 s with its midpoint there too: already covered by chunk 2.
+        {"segments": [{"start": 0.0, "end": 0.8, "text": " c"}, {"start": 0.8, "end": 4.5, "text": " d"}], "language": "fr"},
+    ]
+    result = stitch_results(results, chunks, sample_rate)
+
+    assert result["text"] == " a b c d"
+    assert [(segment["start"], segment["end"]) for segment in result["segments"]] == pytest.approx([(0.0, 2.6), (2.6, 3.5), (3.5, 5.9), (6.3, 10.0)])
+    assert [segment["id"] for segment in result["segments"]] == [0, 1, 2, 3]
+    assert result["language"] == "en"
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, task="transcribe", **options):
+        self.calls += 1
+        return {"text": " hello", "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": len(audio) / SAMPLE_RATE, "text": " hello"}], "language": "en"}
+
+
+class FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, model_size):
+        return self.model
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not found")
+def test_parallel_cache_hit_skips_decoding(tmp_path, monkeypatch):
+    path = str(tmp_path / "speech.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((tone_with_gaps(3, []) * 32767).astype(np.int16).tobytes())
+    model = FakeModel()
+    transcriber = Transcriber(cache=ArtifactCache(str(tmp_path / "cache")), registry=FakeRegistry(model))
+
+    first = transcriber.transcribe_parallel(path, workers=2)
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("decoded on a cache hit")
+
+    monkeypatch.setattr(AudioProcessor, "load_audio", no_decoding)
+    assert transcriber.transcribe_parallel(path, workers=2) == first
+    assert model.calls == 1
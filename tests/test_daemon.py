@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from src.bench.stub_llm import StubLLMClient
+from src.core.daemon import Daemon, DaemonClient, DaemonError, create_server
+from src.core.runner import ProcessResult
+
+
+class FakeRunner:
+    """
+    Stands in for ProcessRunner: records the order jobs ran in and which client they got.
+    """
+
+    ran = []
+
+    def __init__(self, options, llm_client=None, artifact_cache=None, llm_stores=None, limits=None, on_stage=None):
+        self.options = options
+        self.llm_client = llm_client
+        self.on_stage = on_stage
+        self.current_stage = None
+        self.metrics = type("Metrics", (), {"report": lambda self: {"stages": []}})()
+
+    def run(self) -> ProcessResult:
+        FakeRunner.ran.append((self.options.url, self.llm_client))
+        if self.options.url == "fail":
+            self.current_stage = "download"
+            raise RuntimeError("no such video")
+        result = ProcessResult(video_path="video.m4a", summary_path="summary.txt")
+        self.on_stage("download", "done", result)
+        return result
+
+
+def make_daemon(**kwargs) -> Daemon:
+    FakeRunner.ran = []
+    return Daemon(client_factory=lambda provider, model, **_: StubLLMClient(model=model), runner_factory=FakeRunner, **kwargs)
+
+
+def test_jobs_run_by_priority_and_share_clients():
+    daemon = make_daemon(workers=1)
+    low = daemon.submit({"url": "low", "cache": False})
+    high = daemon.submit({"url": "high", "cache": False}, priority=5)
+    also_low = daemon.submit({"url": "also-low", "cache": False})
+    daemon.start()
+    for job in (low, high, also_low):
+        assert daemon.wait(job.id, timeout=5).status == "done"
+    daemon.stop()
+
+    assert [url for url, _ in FakeRunner.ran] == ["high", "low", "also-low"]
+    assert len({id(client) for _, client in FakeRunner.ran}) == 1
+    assert daemon.get(high.id).completed_stages == ["download"]
+
+
+def test_failed_and_cancelled_jobs():
+    daemon = make_daemon(workers=1)
+    failing = daemon.submit({"url": "fail", "cache": False})
+    cancelled = daemon.submit({"url": "skipped", "cache": False})
+    assert daemon.cancel(cancelled.id)
+    daemon.start()
+    job = daemon.wait(failing.id, timeout=5)
+    daemon.stop()
+
+    assert job.status == "failed" and job.stage == "download" and "no such video" in job.error
+    assert daemon.get(cancelled.id).status == "cancelled"
+    assert [url for url, _ in FakeRunner.ran] == ["fail"]
+
+
+def test_http_api(tmp_path):
+    daemon = make_daemon(workers=2)
+    server = create_server(daemon, "http://127.0.0.1:0")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    daemon.start()
+    try:
+        client = DaemonClient(f"http://127.0.0.1:{server.server_address[1]}")
+        assert client.available()
+        job = client.submit({"url": "https://example.com/v", "cache": False}, priority=1)
+        assert daemon.wait(job["id"], timeout=5).status == "done"
+
+        status = client.job(job["id"])
+        assert status["status"] == "done"
+        assert status["result"]["summary_path"] == "summary.txt"
+        assert [listed["id"] for listed in client.jobs()] == [job["id"]]
+        assert client.health()["jobs"]["done"] == 1
+        with pytest.raises(DaemonError):
+            client.submit({"url": "x", "no_such_option": True})
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.stop()
+
+
+def test_client_reports_missing_daemon(tmp_path):
+    assert not DaemonClient(f"unix:{tmp_path / 'missing.sock'}").available()
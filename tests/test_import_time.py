@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that cost seconds to import and are only needed by individual stages.
+HEAVY_MODULES = ("whisper", "torch", "yt_dlp", "InquirerPy", "numpy", "ffmpeg")
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def run_python(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_cli_import_defers_heavy_dependencies():
+    loaded = run_python(
+        "import sys; import src.cli.main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert loaded == ""
+
+
+def test_cli_import_fits_time_budget():
+    # Best of three runs, so a busy machine does not fail the check.
+    timings = [
+        float(run_python("import time; start = time.perf_counter(); import src.cli.main; print(time.perf_counter() - start)"))
+        for _ in range(3)
+    ]
+    assert min(timings) < IMPORT_BUDGET_SECONDS
+
+
+def test_help_does_not_load_heavy_dependencies():
+    loaded = run_python(
+        "import sys\n"
+        "from typer.testing import CliRunner\n"
+        "from src.cli.main import app\n"
+        "for args in (['--help'], ['process', '--help'], ['batch', '--help'], ['bench', '--help']):\n"
+        "    assert CliRunner().invoke(app, args).exit_code == 0, args\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert loaded == ""
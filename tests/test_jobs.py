@@ -0,0 +1,85 @@
+from src.bench.media import make_segments
+from src.bench.stub_llm import StubLLMClient
+from src.core.jobs import JobManifest
+from src.core.summarizer import Summarizer
+from src.core.translator import Translator
+
+
+def test_completed_stage_requires_same_params_and_files(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+    job = JobManifest.for_url(str(tmp_path), "https://example.com/v")
+    job.complete("download", {"video_path": str(video)}, audio_only=True)
+
+    reloaded = JobManifest.for_url(str(tmp_path), "https://example.com/v")
+    assert reloaded.completed("download", audio_only=True) == {"video_path": str(video)}
+    assert reloaded.completed("download", audio_only=False) is None
+
+    video.unlink()
+    assert reloaded.completed("download", audio_only=True) is None
+
+
+def test_rerunning_a_stage_forgets_later_ones(tmp_path):
+    job = JobManifest.for_url(str(tmp_path), "url")
+    job.complete("transcribe", {"language": "en"}, model_size="base")
+    job.complete("summarize", {"summary": "done"})
+    job.checkpoint("summarize").put("chunk", "partial")
+
+    job.complete("transcribe", {"language": "en"}, model_size="small")
+    assert job.completed("summarize") is None
+    assert job.checkpoint("summarize").get("chunk") is None
+
+
+def test_translation_resumes_from_finished_batches(tmp_path):
+    segments = make_segments(60)
+    job = JobManifest.for_url(str(tmp_path), "url")
+
+    flaky = StubLLMClient(failure_rate=0.5, failure_mode="error", seed=1)
+    Translator(flaky, checkpoint=job.checkpoint("translate", target_language="French")).translate_segments(segments, "French", token_budget=60)
+    finished = len(job.checkpoint("translate", target_language="French"))
+    assert 0 < finished < len({segment["text"] for segment in segments})
+
+    client = StubLLMClient()
+    resumed = JobManifest.for_url(str(tmp_path), "url")
+    translated = Translator(client, checkpoint=resumed.checkpoint("translate", target_language="French")).translate_segments(segments, "French", token_budget=60)
+    assert all(segment["text"].startswith("[stub]") for segment in translated)
+    assert client.requests < flaky.requests
+
+
+def test_summary_resumes_from_partial_summaries(tmp_path):
+    segments = make_segments(200)
+    job = JobManifest.for_url(str(tmp_path), "url")
+    first = StubLLMClient()
+    summary = Summarizer(first, chunk_tokens=400, checkpoint=job.checkpoint("summarize")).summarize_segments(segments)
+    assert first.requests > 2
+
+    second = StubLLMClient()
+    resumed = JobManifest.for_url(str(tmp_path), "url")
+    assert Summarizer(second, chunk_tokens=400, checkpoint=resumed.checkpoint("summarize")).summarize_segments(segments) == summary
+    assert second.requests == 1
+
+
+def test_checkpoint_results_are_appended_outside_the_manifest(tmp_path):
+    job = JobManifest.for_url(str(tmp_path), "url")
+    checkpoint = job.checkpoint("translate", target_language="French")
+    manifest = open(job.path).read()
+    for i in range(3):
+        checkpoint.put_many({f"line{i}": f"ligne {i}"})
+    # The manifest is not rewritten per batch; each batch is one appended line.
+    assert open(job.path).read() == manifest
+    results_path = job.file_path("translate.checkpoint.jsonl")
+    assert len(open(results_path).readlines()) == 3
+
+    # A batch cut short by a crash is dropped; the ones before it survive and later appends stay readable.
+    with open(results_path, "a") as f:
+        f.write('{"line3": "lig')
+    resumed = JobManifest.for_url(str(tmp_path), "url").checkpoint("translate", target_language="French")
+    assert resumed.lookup(["line0", "line2", "line3"]) == {"line0": "ligne 0", "line2": "ligne 2"}
+    resumed.put("line3", "ligne 3")
+    assert len(JobManifest.for_url(str(tmp_path), "url").checkpoint("translate", target_language="French")) == 4
+
+    # New params and a cleared job start from nothing.
+    assert len(job.checkpoint("translate", target_language="German")) == 0
+    job.checkpoint("translate", target_language="German").put("line0", "Zeile 0")
+    job.clear()
+    assert list((tmp_path / ".jobs").iterdir()) == []
@@ -0,0 +1,331 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.llm import LLMClient, LLMError, LLMRateLimitError, LLMTimeoutError, OllamaClient, OpenAIClient, StreamTimer
+from src.core.llm_cache import CachedLLMClient, ResponseCache, TranslationMemory
+from src.core.translator import Translator
+
+
+class StubServer:
+    """
+    Local HTTP server that speaks just enough of the Ollama and OpenAI chat APIs.
+    responses is a list of (status, headers, delay) consumed one per request; when it
+    runs out every request succeeds by echoing the prompt.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+        self.stream_delay = 0.0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append((self.path, dict(self.headers), body))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status, headers, delay = stub.responses.pop(0) if stub.responses else (200, {}, stub.delay)
+                try:
+                    time.sleep(delay)
+                    prompt = body["messages"][-1]["content"]
+                    if status == 200 and body.get("stream"):
+                        self._stream(f"echo: {prompt}")
+                        return
+                    if self.path == "/api/chat":
+                        payload = {"message": {"role": "assistant", "content": f"echo: {prompt}"}}
+                    else:
+                        payload = {"choices": [{"message": {"role": "assistant", "content": f"echo: {prompt}"}}]}
+                    data = json.dumps(payload).encode() if status == 200 else b'{"error": "stub"}'
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def _stream(self, text):
+                self.send_response(200)
+                self.end_headers()
+                for word in text.split(" "):
+                    piece = word + " "
+                    if self.path == "/api/chat":
+                        line = json.dumps({"message": {"role": "assistant", "content": piece}, "done": False})
+                    else:
+                        line = "data: " + json.dumps({"choices": [{"delta": {"content": piece}}]}) + "\n"
+                    self.wfile.write(line.encode() + b"\n")
+                    self.wfile.flush()
+                    time.sleep(stub.stream_delay)
+                if self.path == "/api/chat":
+                    self.wfile.write(json.dumps({"message": {"role": "assistant", "content": ""}, "done": True}).encode() + b"\n")
+                else:
+                    self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def test_ollama_generate(stub):
+    client = OllamaClient(model="llama3", host=stub.url)
+    assert client.generate("hello") == "echo: hello"
+    path, _, body = stub.requests[0]
+    assert path == "/api/chat"
+    assert body["model"] == "llama3"
+    assert body["stream"] is False
+
+
+def test_openai_generate_sends_key(stub):
+    client = OpenAIClient(api_key="sk-test", model="gpt-4o", base_url=stub.url)
+    assert client.generate("hello") == "echo: hello"
+    path, headers, _ = stub.requests[0]
+    assert path == "/chat/completions"
+    assert headers["Authorization"] == "Bearer sk-test"
+
+
+def test_openai_without_key_raises():
+    with pytest.raises(LLMError):
+        OpenAIClient(api_key=None).generate("hello")
+
+
+def test_retries_rate_limit_then_succeeds(stub):
+    stub.responses = [(429, {"Retry-After": "0"}, 0), (503, {}, 0)]
+    client = OllamaClient(host=stub.url, backoff=0.01)
+    assert client.generate("hello") == "echo: hello"
+    assert len(stub.requests) == 3
+
+
+def test_rate_limit_exhausts_retries(stub):
+    stub.responses = [(429, {"Retry-After": "0"}, 0)] * 3
+    client = OllamaClient(host=stub.url, max_retries=2, backoff=0.01)
+    with pytest.raises(LLMRateLimitError):
+        client.generate("hello")
+    assert len(stub.requests) == 3
+
+
+def test_client_error_is_not_retried(stub):
+    stub.responses = [(400, {}, 0)]
+    client = OllamaClient(host=stub.url, backoff=0.01)
+    with pytest.raises(LLMError) as excinfo:
+        client.generate("hello")
+    assert not isinstance(excinfo.value, LLMRateLimitError)
+    assert len(stub.requests) == 1
+
+
+def test_timeout_raises(stub):
+    stub.delay = 0.5
+    client = OllamaClient(host=stub.url, timeout=0.1, max_retries=1, backoff=0.01)
+    with pytest.raises(LLMTimeoutError):
+        client.generate("hello")
+
+
+def test_max_in_flight_is_respected(stub):
+    stub.delay = 0.05
+    client = OllamaClient(host=stub.url, max_in_flight=2)
+    translator = Translator(client, max_concurrency=8)
+    segments = [{"text": f"line {i}"} for i in range(8)]
+    translator.translate_segments(segments, "French", token_budget=1)
+    assert len(stub.requests) == 8
+    assert stub.max_in_flight == 2
+
+
+def test_translator_batches_run_concurrently(stub):
+    stub.delay = 0.2
+    client = OllamaClient(host=stub.url, max_in_flight=4)
+    translator = Translator(client, max_concurrency=4)
+    segments = [{"text": f"line {i}"} for i in range(4)]
+
+    start = time.perf_counter()
+    translated = translator.translate_segments(segments, "French", token_budget=1)
+    elapsed = time.perf_counter() - start
+
+    assert len(translated) == 4
+    assert elapsed < 0.6
+
+
+def test_ollama_stream(stub):
+    stub.stream_delay = 0.05
+    client = OllamaClient(host=stub.url)
+    timer = StreamTimer(client.generate_stream("hello there"))
+    pieces = list(timer)
+    assert pieces == ["echo: ", "hello ", "there "]
+    assert stub.requests[0][2]["stream"] is True
+    assert timer.time_to_first_token < 0.1
+    assert timer.tokens_per_second > 0
+
+
+def test_openai_stream(stub):
+    client = OpenAIClient(api_key="sk-test", base_url=stub.url)
+    assert "".join(client.generate_stream("hello there")) == "echo: hello there "
+
+
+def test_stream_retries_before_first_token(stub):
+    stub.responses = [(503, {}, 0)]
+    client = OllamaClient(host=stub.url, backoff=0.01)
+    assert "".join(client.generate_stream("hello")) == "echo: hello "
+    assert len(stub.requests) == 2
+
+
+def test_cached_stream_is_replayed(stub, tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"))
+    client = CachedLLMClient(OllamaClient(host=stub.url), cache)
+    first = "".join(client.generate_stream("hello"))
+    second = list(client.generate_stream("hello"))
+    assert second == [first]
+    assert len(stub.requests) == 1
+
+
+class ScriptedClient(LLMClient):
+    """
+    Offline client that answers translation batches by upper-casing each line.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    async def agenerate(self, prompt, system_prompt="You are a helpful assistant."):
+        self.prompts.append(prompt)
+        lines = json.loads(prompt[prompt.index("Input JSON:\n") + len("Input JSON:\n"):prompt.rindex("\n\nOutput JSON:")])
+        return json.dumps([line.upper() for line in lines])
+
+
+def test_response_cache_answers_repeated_prompts(tmp_path):
+    inner = ScriptedClient()
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"))
+    client = CachedLLMClient(inner, cache)
+    segments = [{"text": "hello"}, {"text": "world"}]
+
+    first = Translator(client).translate_segments(segments, "French")
+    second = Translator(client).translate_segments(segments, "French")
+
+    assert first == second == [{"text": "HELLO"}, {"text": "WORLD"}]
+    assert len(inner.prompts) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_translation_memory_sends_only_unknown_lines(tmp_path):
+    inner = ScriptedClient()
+    memory = TranslationMemory(str(tmp_path / "llm.sqlite"))
+    translator = Translator(inner, memory=memory)
+
+    translator.translate_segments([{"text": "[Music]"}, {"text": "intro"}, {"text": "[Music]"}], "French")
+    translated = translator.translate_segments([{"text": "[Music]"}, {"text": "new line"}, {"text": "intro"}], "French")
+
+    assert [segment["text"] for segment in translated] == ["[MUSIC]", "NEW LINE", "INTRO"]
+    assert '"new line"' in inner.prompts[-1] and "[Music]" not in inner.prompts[-1]
+    assert memory.hits == 2
+
+
+def test_stores_evict_least_recently_used_down_to_low_water(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"), max_size=1000)
+    for i in range(10):
+        cache.put(f"key{i:02d}", "x" * 95)  # 100 bytes each
+    cache.get("key00")
+    cache.put("key00", "y" * 95)  # replacing a row does not grow the table
+    assert cache.stats()["size"] == 1000
+
+    cache.put("key10", "x" * 95)
+    # Trimmed to 90% of max_size, oldest first; key00 was used recently and stays.
+    stats = cache.stats()
+    assert stats["size"] == 900 and stats["entries"] == 9
+    assert cache.get("key01") is None and cache.get("key02") is None and cache.get("key00") == "y" * 95
+    cache.delete("key00")
+    assert cache._size == cache.stats()["size"] == 800
+
+    memory = TranslationMemory(str(tmp_path / "llm.sqlite"), max_size=100)
+    memory.store([(f"line {i}", "ligne") for i in range(20)], "French")
+    memory.store([("line 19", "ligne")], "French")
+    assert memory._size == memory.stats()["size"] <= 90
+
+
+class MisbehavingClient(ScriptedClient):
+    """
+    Drops one element from its answer whenever the batch contains a line with "bad" in it.
+    """
+
+    async def agenerate(self, prompt, system_prompt="You are a helpful assistant."):
+        answer = json.loads(await super().agenerate(prompt, system_prompt))
+        if any("BAD" in line for line in answer):
+            answer = answer[:-1]
+        return json.dumps(answer)
+
+
+def test_failed_batch_is_bisected(tmp_path):
+    client = MisbehavingClient()
+    translator = Translator(client, max_concurrency=1)
+    segments = [{"text": f"line {i}"} for i in range(7)] + [{"text": "bad line"}]
+
+    translated = translator.translate_segments(segments, "French", token_budget=10_000)
+
+    assert [segment["text"] for segment in translated] == [f"LINE {i}" for i in range(7)] + ["bad line"]
+    # 1 full batch + halves of 4 + quarters of 2 + the two last single lines
+    assert len(client.prompts) == 7
+
+
+def test_failed_requests_do_not_shrink_the_batch_budget():
+    from src.bench.stub_llm import StubLLMClient
+
+    translator = Translator(StubLLMClient(failure_rate=1.0, failure_mode="error"), max_concurrency=1)
+    budget = translator._budget()
+    before = (budget.tokens, budget.success_rate)
+    segments = [{"text": f"line {i}"} for i in range(50)]
+
+    assert translator.translate_segments(segments, "French") == segments
+    assert (budget.tokens, budget.success_rate) == before
+
+
+class NullAnsweringClient(ScriptedClient):
+    """
+    Answers null in place of any line with "bad" in it.
+    """
+
+    async def agenerate(self, prompt, system_prompt="You are a helpful assistant."):
+        answer = json.loads(await super().agenerate(prompt, system_prompt))
+        return json.dumps([None if "BAD" in line else line for line in answer])
+
+
+def test_non_string_answers_are_not_stored(tmp_path, capsys):
+    from src.core.jobs import JobManifest
+
+    memory = TranslationMemory(str(tmp_path / "llm.sqlite"))
+    checkpoint = JobManifest.for_url(str(tmp_path), "url").checkpoint("translate", target_language="French")
+    translator = Translator(NullAnsweringClient(), max_concurrency=1, memory=memory, checkpoint=checkpoint)
+    segments = [{"text": f"line {i}"} for i in range(3)] + [{"text": "bad line"}]
+
+    translated = translator.translate_segments(segments, "French", token_budget=10_000)
+
+    assert [segment["text"] for segment in translated] == ["LINE 0", "LINE 1", "LINE 2", "bad line"]
+    assert memory.lookup(["bad line"], "French") == {} and checkpoint.get("bad line") is None
+    # Only the line that finally failed is reported, once, without the raw answer.
+    output = capsys.readouterr().out
+    assert output.count("Warning") == 1 and "'bad line'" in output and "not strings" in output
+    assert "DEBUG" not in output
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from src.core.llm import LLMClient
+from src.core.metrics import MeteredLLMClient, RunMetrics
+
+
+class EchoClient(LLMClient):
+    async def agenerate(self, prompt, system_prompt="You are a helpful assistant."):
+        return prompt * 2
+
+
+def test_stage_records_time_counters_and_throughput(tmp_path):
+    metrics = RunMetrics()
+    with metrics.stage("download") as stage:
+        sum(range(200_000))
+        stage.record(bytes=4096)
+    with metrics.stage("transcribe") as stage:
+        stage.record(audio_seconds=60.0)
+
+    download, transcribe = metrics.stages
+    assert download.wall_seconds > 0 and download.cpu_seconds >= 0
+    assert download.peak_rss_bytes > 0
+    assert download.throughput()["bytes_per_second"] == 4096 / download.wall_seconds
+    assert transcribe.throughput()["real_time_factor"] == transcribe.wall_seconds / 60.0
+
+    path = tmp_path / "metrics.json"
+    metrics.write_json(str(path))
+    report = json.loads(path.read_text())
+    assert set(report["stages"]) == {"download", "transcribe"}
+    assert report["stages"]["download"]["bytes"] == 4096
+
+
+def test_llm_stage_counts_requests_and_tokens(tmp_path):
+    client = MeteredLLMClient(EchoClient())
+    metrics = RunMetrics()
+    client.generate("before the stage")
+    with metrics.stage("summarize", llm=client):
+        client.generate("abcd" * 10)
+        "".join(client.generate_stream("abcd" * 10))
+
+    stage = metrics.stages[0]
+    assert stage.counters["requests"] == 2
+    assert stage.counters["completion_tokens"] == 2 * 21
+    assert stage.throughput()["tokens_per_second"] > 0
+
+    path = tmp_path / "metrics.prom"
+    metrics.write_prometheus(str(path))
+    text = path.read_text()
+    assert "# TYPE video_summarizer_stage_requests gauge" in text
+    assert 'video_summarizer_stage_requests{stage="summarize"} 2' in text
+
+
+def test_profiled_stage_writes_stats(tmp_path):
+    metrics = RunMetrics(profile_stage="extract", profile_dir=str(tmp_path))
+    with metrics.stage("download"):
+        pass
+    with metrics.stage("extract"):
+        sorted(range(10_000), reverse=True)
+
+    assert metrics.stages[0].profile_path is None
+    assert (tmp_path / "profile_extract.prof").exists()
+
+
+def test_profile_includes_requests_on_the_llm_event_loop(tmp_path):
+    import pstats
+
+    from src.bench.media import make_segments
+    from src.bench.stub_llm import StubLLMClient
+    from src.core.summarizer import Summarizer
+
+    metrics = RunMetrics(profile_stage="summarize", profile_dir=str(tmp_path))
+    with metrics.stage("summarize") as stage:
+        Summarizer(StubLLMClient(), chunk_tokens=400).summarize_segments(make_segments(200))
+    # The requests run on the llm-event-loop thread, not the one that entered the stage.
+    functions = {function for _, _, function in pstats.Stats(stage.profile_path).stats}
+    assert {"_generate_partial", "agenerate"} <= functions
+
+
+def test_overlapping_profiles_do_not_fail_the_stage(tmp_path):
+    metrics = RunMetrics(profile_stage="extract", profile_dir=str(tmp_path))
+    with metrics.stage("extract") as outer:
+        with metrics.stage("extract") as inner:
+            pass
+    assert inner.profile_path is None and outer.profile_path is not None
+
+
+def test_failed_run_still_writes_its_report(tmp_path, monkeypatch):
+    from src.bench.stub_llm import StubLLMClient
+    from src.core.cache import ArtifactCache
+    from src.core.downloader import VideoDownloader
+    from src.core.runner import ProcessOptions, ProcessRunner
+
+    url = "https://example.com/watch?v=1"
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    video = tmp_path / "Talk.m4a"
+    video.write_bytes(b"\0" * 1000)
+    cache.put_file(cache.make_key("download", url=url, format=VideoDownloader.AUDIO_FORMAT), str(video))
+
+    def fail(self, result):
+        raise RuntimeError("whisper crashed")
+
+    monkeypatch.setattr(ProcessRunner, "_transcribe", fail)
+    options = ProcessOptions(url=url, output_dir=str(tmp_path / "output"), in_memory_audio=True, prometheus_file=str(tmp_path / "run.prom"), search_index=False)
+    runner = ProcessRunner(options, llm_client=StubLLMClient(), artifact_cache=cache, llm_stores=(None, None))
+    with pytest.raises(RuntimeError):
+        runner.run()
+
+    report = json.loads(open(runner.metrics_path).read())
+    assert runner.metrics_path == str(tmp_path / "output" / "Talk_metrics.json")
+    assert report["error"] == "RuntimeError: whisper crashed" and report["failed_stage"] == "transcribe"
+    # The download came from the cache: no bytes, so no inflated download rate.
+    assert report["stages"]["download"]["cache_hits"] == 1 and "bytes_per_second" not in report["stages"]["download"]
+    assert (tmp_path / "run.prom").exists()
@@ -0,0 +1,64 @@
+import sys
+import types
+
+from src.core import models
+from src.core.models import ModelRegistry
+
+
+class FakeParameter:
+    def __init__(self, size):
+        self.size = size
+
+    def numel(self):
+        return self.size
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def parameters(self):
+        return [FakeParameter(self.size)]
+
+    def modules(self):
+        return []
+
+
+SIZES = {"a": 100, "b": 100, "c": 100, "d": 200, "e": 1000}
+
+
+def fake_whisper(loads):
+    def load_model(name, **kwargs):
+        loads.append(name)
+        return FakeModel(name, SIZES[name])
+
+    return types.SimpleNamespace(load_model=load_model)
+
+
+def test_least_recently_used_models_make_room_under_the_budget(monkeypatch):
+    loads = []
+    monkeypatch.setitem(sys.modules, "whisper", fake_whisper(loads))
+    # "d" and "e" have no estimate, so they only make room once their real size is known.
+    monkeypatch.setattr(models, "ESTIMATED_MODEL_BYTES", {"a": 100, "b": 100, "c": 100})
+    registry = ModelRegistry(max_memory=250)
+
+    a = registry.get("a")
+    registry.get("b")
+    assert registry.get("a") is a and loads == ["a", "b"]
+    # Room for "c" is made before loading it, by dropping "b", the least recently used.
+    registry.get("c")
+    assert registry.loaded() == {"a": 100, "c": 100}
+
+    registry.get("d")
+    assert registry.loaded() == {"d": 200}
+    # A model over the whole budget still loads, on its own.
+    registry.get("e")
+    assert registry.loaded() == {"e": 1000}
+
+    registry.evict("e")
+    assert registry.loaded() == {}
+    assert registry.get("a") is not a and loads == ["a", "b", "c", "d", "e", "a"]
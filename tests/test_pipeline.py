@@ -0,0 +1,95 @@
+import json
+import threading
+
+from src.bench.media import make_segments
+from src.bench.stub_llm import StubLLMClient
+from src.core.jobs import JobManifest
+from src.core.llm_cache import ResponseCache, TranslationMemory
+from src.core.pipeline import STAGES, BatchItem, BatchPipeline
+from src.core.transcript import Transcript
+
+
+def test_translation_memory_is_shared_across_videos(tmp_path):
+    client = StubLLMClient()
+    memory = TranslationMemory(str(tmp_path / "llm.sqlite"))
+    pipeline = BatchPipeline(client, output_dir=str(tmp_path), target_language="French", translation_memory=memory)
+    transcript = Transcript.from_result({"segments": make_segments(20)})
+
+    requests = []
+    for name in ("a", "b"):
+        url = f"https://example.com/{name}"
+        item = BatchItem(url=url, video_path=str(tmp_path / f"{name}.mp4"), transcript=transcript, job=JobManifest.for_url(str(tmp_path), url))
+        pipeline._summarize(item)
+        assert open(item.translated_srt_path).read().count("[stub]") == 20
+        requests.append(client.requests)
+
+    # The second video's lines all come from the memory; only its summary goes to the LLM.
+    assert requests[1] - requests[0] == 1
+    assert memory.hits == 19  # distinct lines; the "[Music]" marker repeats
+
+
+def test_failed_item_skips_its_later_stages_and_the_batch_finishes(tmp_path, monkeypatch):
+    def handler(stage):
+        def run(self, item, *args):
+            if stage == "extract" and item.url.endswith("bad"):
+                raise RuntimeError("no audio stream")
+        return run
+
+    for stage in STAGES:
+        monkeypatch.setattr(BatchPipeline, f"_{stage}", handler(stage))
+    events = []
+    pipeline = BatchPipeline(
+        StubLLMClient(),
+        output_dir=str(tmp_path),
+        download_workers=2,
+        extract_workers=3,
+        llm_workers=2,
+        on_event=lambda stage, status, item: events.append((item.url, stage, status)),
+    )
+    urls = [f"https://example.com/{name}" for name in ("a", "bad", "c", "d")]
+
+    items = []
+    # Every stage's workers must pass the end-of-batch sentinel on, or run() never returns.
+    thread = threading.Thread(target=lambda: items.extend(pipeline.run(urls)), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+
+    assert [item.url for item in items] == urls
+    bad = items[1]
+    assert (bad.failed_stage, bad.error) == ("extract", "no audio stream")
+    assert [(stage, status) for url, stage, status in events if url == bad.url] == [
+        ("download", "started"),
+        ("download", "done"),
+        ("extract", "started"),
+        ("extract", "failed"),
+        ("transcribe", "skipped"),
+        ("summarize", "skipped"),
+    ]
+    for item in items[:1] + items[2:]:
+        assert item.error is None
+        assert (item.url, "summarize", "done") in events
+
+
+def test_each_video_gets_a_report_with_its_own_llm_requests(tmp_path):
+    client = StubLLMClient()
+    pipeline = BatchPipeline(client, output_dir=str(tmp_path), target_language="French", response_cache=ResponseCache(str(tmp_path / "llm.sqlite")))
+    transcript = Transcript.from_result({"segments": make_segments(20)})
+
+    reports = []
+    # The same transcript twice: the second video's summary is a response-cache hit.
+    for name in ("a", "b"):
+        url = f"https://example.com/{name}"
+        item = BatchItem(url=url, video_path=str(tmp_path / f"{name}.mp4"), transcript=transcript, job=JobManifest.for_url(str(tmp_path), url))
+        pipeline._summarize(item)
+        pipeline._write_report(item)
+        assert item.metrics_path == str(tmp_path / f"{name}_metrics.json")
+        reports.append(json.load(open(item.metrics_path)))
+
+    first, second = (report["stages"] for report in reports)
+    assert set(first) == {"translate", "summarize"}
+    assert first["translate"]["segments"] == 20
+    # Each request is counted once, for the video that made it; cache hits are not counted.
+    assert sum(stages[stage]["requests"] for stages in (first, second) for stage in stages) == client.requests
+    assert first["summarize"]["requests"] == 1 and second["summarize"]["requests"] == 0
+    assert reports[1]["url"] == "https://example.com/b"
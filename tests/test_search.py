@@ -0,0 +1,45 @@
+import os
+
+from src.bench.media import make_segments
+from src.core.search import SearchIndex, backfill
+from src.core.transcript import Transcript
+
+
+def test_hits_are_ranked_with_millisecond_times(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite"))
+    first = Transcript([0.0, 2.5, 5.0], [2.5, 5.0, 7.25], [" Welcome back.", " Today: caching, caching and more caching!", " Résumé of caching."], language="en")
+    second = Transcript([10.0], [12.0], [" A note on caching."], language="en")
+    index.add("https://example.com/a", first, title="A")
+    index.add("https://example.com/b", second, title="B")
+    index.add("https://example.com/a", first.with_texts([" Bienvenue.", " Aujourd'hui : le cache.", " Résumé."]), language="fr")
+
+    hits = index.search("caching?")
+    assert [(hit.video, hit.start_ms, hit.end_ms) for hit in hits][0] == ("https://example.com/a", 2500, 5000)
+    assert hits[0].text == "Today: [caching], [caching] and more [caching]!"
+    assert hits[0].score >= hits[-1].score and len(hits) == 3
+    assert [hit.start_ms for hit in index.search("resume", language="fr")] == [5000]
+    assert index.search("nothing like this") == []
+
+    # Re-indexing replaces the document's segments instead of adding to them.
+    index.add("https://example.com/a", first.with_texts([" Welcome.", " No match here.", " None."]), title="A")
+    assert [hit.video for hit in index.search("caching")] == ["https://example.com/b"]
+    assert index.stats() == {"documents": 3, "segments": 7}
+
+
+def test_backfill_indexes_new_and_changed_srt_files(tmp_path):
+    library = tmp_path / "output"
+    library.mkdir()
+    transcript = Transcript.from_result({"segments": make_segments(30)})
+    transcript.write(str(library / "Talk.srt"))
+    transcript.with_texts(" Ligne traduite" for _ in range(30)).write(str(library / "Talk_French.srt"))
+    index = SearchIndex(str(library / ".search.sqlite"))
+
+    assert backfill(index, str(library)) == (2, 0)
+    hit = index.search("traduite", limit=1)[0]
+    assert (hit.video, hit.language, hit.title) == (str(library / "Talk"), "French", "Talk")
+    assert index.search("line 12")[0].start_ms == 36000
+
+    assert backfill(index, str(library)) == (0, 2)
+    os.remove(library / "Talk_French.srt")
+    backfill(index, str(library))
+    assert index.search("traduite") == []
@@ -0,0 +1,139 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src.core.audio import AudioProcessor
+from src.core.downloader import DownloadStream
+from src.core.subtitles import SrtWriter
+from src.core.transcriber import SAMPLE_RATE, Transcriber
+
+
+class FakeModel:
+    """
+    Whisper stand-in that answers every window with one segment spanning it.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, task="transcribe", initial_prompt=None):
+        self.calls.append((len(audio), initial_prompt))
+        text = f" window {len(self.calls)}."
+        return {"text": text, "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": len(audio) / SAMPLE_RATE, "text": text}], "language": "en"}
+
+
+class FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, model_size):
+        return self.model
+
+
+def tone_blocks(seconds: float, block_seconds: float = 2.0):
+    # 1 s of tone, then 1 s of silence, so windows have quiet places to be cut.
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = (0.3 * np.sin(2 * np.pi * 440 * t) * (t % 2 < 1)).astype(np.float32)
+    block = int(block_seconds * SAMPLE_RATE)
+    return [audio[i:i + block] for i in range(0, len(audio), block)]
+
+
+def test_stream_is_transcribed_in_shifted_windows():
+    model = FakeModel()
+    emitted = []
+    result = Transcriber(registry=FakeRegistry(model)).transcribe_stream(tone_blocks(65), window_seconds=10, search_seconds=3, on_segments=emitted.append)
+
+    assert len(emitted) == len(model.calls) >= 6
+    assert sum(length for length, _ in model.calls) == 65 * SAMPLE_RATE
+    # Every window is cut at a quiet point in its last 3 seconds and picks up where the last one ended.
+    segments = result["segments"]
+    assert segments[0]["start"] == 0.0
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment["start"] == pytest.approx(previous["end"])
+    assert all(7 <= segment["end"] - segment["start"] <= 10 for segment in segments[:-1])
+    assert [segment["id"] for segment in segments] == list(range(len(segments)))
+    assert model.calls[0][1] is None and "window 1." in model.calls[1][1]
+    assert result["text"].startswith(" window 1. window 2.")
+
+
+def test_short_windows_cover_the_whole_stream():
+    model = FakeModel()
+    result = Transcriber(registry=FakeRegistry(model)).transcribe_stream(tone_blocks(20, block_seconds=0.5), window_seconds=4, search_seconds=3)
+
+    assert sum(length for length, _ in model.calls) == 20 * SAMPLE_RATE
+    segments = result["segments"]
+    assert segments[0]["start"] == 0.0 and segments[-1]["end"] == pytest.approx(20.0)
+    assert all(segment["start"] >= 0 for segment in segments)
+    with pytest.raises(ValueError):
+        Transcriber(registry=FakeRegistry(model)).transcribe_stream(tone_blocks(20), window_seconds=4, search_seconds=5)
+
+
+def test_srt_writer_numbers_cues_across_writes(tmp_path):
+    path = tmp_path / "out.srt"
+    with SrtWriter(str(path)) as writer:
+        writer.write([{"start": 0.0, "end": 1.5, "text": " one"}])
+        assert path.read_text().startswith("1\n00:00:00,000 --> 00:00:01,500\none\n")
+        writer.write([{"start": 1.5, "end": 3.0, "text": " two"}])
+    assert "2\n00:00:01,500 --> 00:00:03,000\ntwo\n" in path.read_text()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not found")
+def test_piped_download_is_decoded_while_it_is_written(tmp_path):
+    from src.bench.media import make_media
+
+    # A WAV can be decoded from a pipe (an MP4 with the index at the end could not).
+    media = AudioProcessor().extract_audio(make_media(str(tmp_path / "media"), 12, video=False))
+    target = str(tmp_path / "download.wav")
+    download = DownloadStream(target, command=["cat", media], chunk_size=4096)
+
+    blocks = list(AudioProcessor().stream_audio(download, block_seconds=1.0))
+    assert abs(sum(len(block) for block in blocks) - 12 * SAMPLE_RATE) < SAMPLE_RATE * 0.1
+    assert len(blocks) >= 12
+    assert download.bytes_read == os.path.getsize(media)
+    with open(target, "rb") as f, open(media, "rb") as original:
+        assert f.read() == original.read()
+    assert not os.path.exists(f"{target}.part")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not found")
+def test_download_is_finished_when_ffmpeg_gives_up(tmp_path):
+    import ffmpeg
+
+    # Large enough that ffmpeg rejects it long before the end of the pipe.
+    junk = tmp_path / "junk.bin"
+    junk.write_bytes(b"not a media file\n" * 1024 * 1024)
+    target = tmp_path / "download.mp4"
+    download = DownloadStream(str(target), command=["cat", str(junk)], chunk_size=65536)
+
+    with pytest.raises(ffmpeg.Error):
+        list(AudioProcessor().stream_audio(download, finish_source=True))
+    assert target.read_bytes() == junk.read_bytes()
+    assert not os.path.exists(f"{target}.part")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not found")
+def test_stream_falls_back_to_the_finished_download(tmp_path, monkeypatch):
+    from src.bench.media import make_media
+    from src.bench.stub_llm import StubLLMClient
+    from src.core import transcriber
+    from src.core.downloader import VideoDownloader
+    from src.core.runner import ProcessOptions, ProcessResult, ProcessRunner
+
+    # ffmpeg writes the MP4 index after the media data, so nothing can be decoded from a pipe.
+    media = make_media(str(tmp_path / "media"), 40)
+    target = str(tmp_path / "output" / "video.mp4")
+    monkeypatch.setattr(VideoDownloader, "stream", lambda self, url, audio_only=True: DownloadStream(target, command=["cat", media], chunk_size=4096))
+    model = FakeModel()
+    monkeypatch.setattr(transcriber, "default_registry", FakeRegistry(model))
+
+    options = ProcessOptions(url="https://example.com/watch?v=1", output_dir=str(tmp_path / "output"), stream=True, cache=False, search_index=False)
+    transcript = ProcessRunner(options, llm_client=StubLLMClient())._transcribe_stream(ProcessResult())
+
+    # The download was read to the end even though ffmpeg gave up on it, then decoded from the file.
+    with open(target, "rb") as f, open(media, "rb") as original:
+        assert f.read() == original.read()
+    assert not os.path.exists(f"{target}.part")
+    assert abs(sum(length for length, _ in model.calls) - 40 * SAMPLE_RATE) < SAMPLE_RATE * 0.1
+    assert transcript.duration == pytest.approx(40, abs=0.1)
@@ -0,0 +1,56 @@
+from src.bench.stub_llm import StubLLMClient
+from src.core.summarizer import Summarizer
+
+
+class TrackingClient(StubLLMClient):
+    """
+    Records how many requests were in flight at once.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(latency=0.01, summary_words=10, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def agenerate(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().agenerate(prompt, system_prompt=system_prompt)
+        finally:
+            self.in_flight -= 1
+
+
+class RoundsSummarizer(Summarizer):
+    """
+    Records every map or reduce round as (step, requests).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rounds = []
+
+    async def _map(self, func, args_list):
+        self.rounds.append((func.__name__, len(args_list)))
+        return await super()._map(func, args_list)
+
+
+def test_long_transcripts_are_mapped_then_reduced_in_groups():
+    # About 230 tokens each, so every sentence is a chunk of its own.
+    text = " ".join("word " * 180 + f"sentence {i}." for i in range(17))
+    client = TrackingClient()
+    summarizer = RoundsSummarizer(client, chunk_tokens=200, fan_out=3, group_size=4)
+
+    assert summarizer.summarize(text).startswith("Summary:")
+    # 17 partials reduce to 5, then to 2, which fit into the final request.
+    assert summarizer.rounds == [("_summarize_chunk", 17), ("_combine", 5), ("_combine", 2)]
+    assert client.requests == 17 + 5 + 2 + 1
+    assert client.peak == 3
+
+
+def test_short_transcripts_take_one_request():
+    client = StubLLMClient()
+    summarizer = RoundsSummarizer(client, chunk_tokens=200)
+
+    summarizer.summarize_segments([{"text": " Hello there."}, {"text": " General Kenobi."}])
+    assert summarizer.rounds == [] and client.requests == 1
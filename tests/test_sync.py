@@ -0,0 +1,65 @@
+from src.core.sync import ChannelSync, SyncIndex
+
+SOURCE = "https://www.youtube.com/@channel"
+
+
+class FakeDownloader:
+    """
+    A channel listing, newest first, with per-video metadata and request counters.
+    """
+
+    def __init__(self, videos):
+        self.videos = videos  # [{"id", "duration", ...}]
+        self.listed = 0
+        self.fetched = []
+
+    def list_entries(self, url):
+        for video in self.videos:
+            self.listed += 1
+            yield {"id": video["id"], "url": f"https://youtu.be/{video['id']}", "duration": video.get("duration")}
+
+    def metadata(self, url):
+        video_id = url.rsplit("/", 1)[1]
+        self.fetched.append(video_id)
+        video = next(video for video in self.videos if video["id"] == video_id)
+        if video.get("private"):
+            raise RuntimeError("ERROR: Private video")
+        return {"id": video_id, "webpage_url": url, "title": f"Video {video_id}", "duration": video.get("duration"), "live_status": video.get("live_status")}
+
+
+def test_only_new_and_changed_videos_are_planned(tmp_path):
+    index = SyncIndex(str(tmp_path / "sync.sqlite"))
+    videos = [{"id": f"v{i}", "duration": 60 + i} for i in range(10)]
+    first = ChannelSync(FakeDownloader(videos), index, stop_after_known=0).plan(SOURCE)
+    assert [entry.id for entry in first.new] == [f"v{i}" for i in range(10)]
+    index.mark_processed(SOURCE, first.entries)
+
+    # Two uploads, one re-edited video, a premiere and a private video.
+    videos = [
+        {"id": "n1", "duration": 30},
+        {"id": "n2", "duration": 40},
+        {"id": "up", "duration": None, "live_status": "is_upcoming"},
+        {"id": "gone", "duration": 50, "private": True},
+    ] + videos
+    videos[5]["duration"] = 999
+    downloader = FakeDownloader(videos)
+    plan = ChannelSync(downloader, index, stop_after_known=0).plan(SOURCE)
+    assert [entry.id for entry in plan.new] == ["n1", "n2"]
+    assert [entry.id for entry in plan.changed] == ["v1"]
+    assert set(plan.skipped) == {"up", "gone"}
+    # Metadata is only fetched for candidates, never for unchanged videos.
+    assert sorted(downloader.fetched) == sorted(["n1", "n2", "up", "gone", "v1"])
+    assert ChannelSync(FakeDownloader(videos), index, stop_after_known=0).plan(SOURCE, limit=1).entries[0].id == "n1"
+
+
+def test_listing_stops_after_a_run_of_processed_videos(tmp_path):
+    index = SyncIndex(str(tmp_path / "sync.sqlite"))
+    videos = [{"id": f"v{i}", "duration": 60} for i in range(1000)]
+    index.mark_processed(SOURCE, ChannelSync(FakeDownloader(videos), index, stop_after_known=0).plan(SOURCE).entries)
+    assert index.count(SOURCE) == 1000
+
+    videos = [{"id": "new", "duration": 60}] + videos
+    downloader = FakeDownloader(videos)
+    plan = ChannelSync(downloader, index, stop_after_known=20).plan(SOURCE)
+    assert [entry.id for entry in plan.entries] == ["new"]
+    assert plan.stopped_early and downloader.listed <= 100
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+
+from src.bench.media import make_segments
+from src.bench.stub_llm import StubLLMClient
+from src.core.runner import ProcessOptions, ProcessResult, ProcessRunner
+from src.core.subtitles import format_timestamp, save_srt
+from src.core.summarizer import Summarizer
+from src.core.transcriber import compact_result
+from src.core.transcript import Transcript, format_timestamps
+from src.core.translator import Translator
+
+
+def test_vectorized_timestamps_match_scalar_formatting():
+    seconds = np.concatenate((np.arange(0, 400000, 0.37), [0.0, 2.3, 59.999, 3599.9995, 360000.5]))
+    assert format_timestamps(seconds) == [format_timestamp(value) for value in seconds.tolist()]
+    assert format_timestamps([3725.25], decimal=".") == ["01:02:05.250"]
+
+
+def test_round_trips_and_drops_whisper_extras(tmp_path):
+    result = {
+        "text": " Hello there. General Kenobi.",
+        "segments": [
+            {"id": 0, "start": 0.0, "end": 1.5, "text": " Hello there.", "tokens": [1, 2, 3], "avg_logprob": -0.2},
+            {"id": 1, "start": 1.5, "end": 3.25, "text": " General Kenobi.", "tokens": [4, 5], "avg_logprob": -0.1},
+        ],
+        "language": "en",
+    }
+    transcript = Transcript.from_result(result)
+    assert len(transcript) == 2
+    assert transcript.text == result["text"]
+    assert transcript.texts == [" Hello there.", " General Kenobi."]
+    assert transcript.to_result()["segments"][1] == {"id": 1, "start": 1.5, "end": 3.25, "text": " General Kenobi."}
+    assert "tokens" not in compact_result(result)["segments"][0]
+
+    path = str(tmp_path / "transcript.json")
+    transcript.save(path)
+    loaded = Transcript.load(path)
+    assert loaded.texts == transcript.texts and loaded.language == "en"
+    assert np.array_equal(loaded.ends, transcript.ends)
+
+    with open(path, "w") as f:
+        json.dump(result, f)
+    assert Transcript.load(path).text == result["text"]
+
+
+def test_exports_every_format(tmp_path):
+    segments = make_segments(30)
+    transcript = Transcript.from_result({"segments": segments})
+    paths = transcript.export(str(tmp_path / "video"), ["srt", "vtt", "jsonl", "txt"])
+
+    save_srt({"segments": segments}, str(tmp_path / "reference.srt"))
+    srt = open(paths["srt"]).read()
+    assert srt == open(tmp_path / "reference.srt").read()
+    assert srt.startswith(f"1\n00:00:00,000 --> 00:00:03,000\n{segments[0]['text']}\n\n")
+
+    vtt = open(paths["vtt"]).read()
+    assert vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:03.000\n")
+    lines = [json.loads(line) for line in open(paths["jsonl"])]
+    assert lines[29] == {"start": 87.0, "end": 90.0, "text": segments[29]["text"]}
+    assert open(paths["txt"]).read().splitlines() == [segment["text"] for segment in segments]
+
+
+def test_translate_and_summarize_a_transcript():
+    transcript = Transcript.from_result({"segments": make_segments(20)})
+    translated = Translator(StubLLMClient()).translate_transcript(transcript, "French", token_budget=100)
+    assert np.array_equal(translated.starts, transcript.starts)
+    assert all(text.startswith("[stub] ") for text in translated.texts)
+
+    summary = Summarizer(StubLLMClient()).summarize_segments(transcript)
+    assert summary.startswith("Summary:")
+
+
+def test_translate_stage_derives_text_and_subtitles_from_one_pass(tmp_path):
+    transcript = Transcript.from_result({"segments": [
+        {"start": 0.0, "end": 2.0, "text": " Hello there."},
+        {"start": 2.0, "end": 4.0, "text": " How are you?"},
+    ]})
+    options = ProcessOptions(url="https://example.com/watch?v=1", output_dir=str(tmp_path), target_language="French", cache=False)
+    client = StubLLMClient()
+    result = ProcessResult(video_path=str(tmp_path / "video.mp4"))
+    translated = ProcessRunner(options, llm_client=client)._translate(result, transcript)
+
+    # One batch request; the full text is reassembled from the translated segments.
+    assert client.requests == 1
+    assert translated.text == " [stub] Hello there. [stub] How are you?"
+    assert open(result.translation_path).read() == "[stub] Hello there. [stub] How are you?\n"
+    assert open(result.translated_srt_path).read().startswith("1\n00:00:00,000 --> 00:00:02,000\n[stub] Hello there.\n\n")
+
+    resumed = ProcessResult(video_path=result.video_path)
+    again = ProcessRunner(options, llm_client=client)._translate(resumed, transcript)
+    assert client.requests == 1
+    assert resumed.resumed == ["translate"] and again.text == translated.text
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.bench.accuracy import word_error_rate
+from src.core.cache import ArtifactCache
+from src.core.models import WhisperProfile, resolve_profile
+from src.core.transcriber import SAMPLE_RATE, Transcriber
+
+
+class FakeModel:
+    def __init__(self):
+        self.options = []
+
+    def transcribe(self, audio, task="transcribe", **options):
+        self.options.append(options)
+        return {"text": " Hello there.", "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": 1.0, "text": " Hello there.", "tokens": [1, 2]}], "language": "en"}
+
+
+class FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+        self.requests = []
+
+    def get(self, model_size, quantize=False):
+        self.requests.append(f"{model_size}-int8" if quantize else model_size)
+        return self.model
+
+
+def test_profiles_resolve_with_overrides():
+    assert resolve_profile() == WhisperProfile()
+    assert WhisperProfile().decode_options() == {} and WhisperProfile().cache_params() == {}
+
+    fast = resolve_profile("fast", beam_size=None, threads=2)
+    assert fast.quantize and fast.threads == 2
+    assert fast.decode_options() == {"temperature": 0.0, "condition_on_previous_text": False, "fp16": False}
+    # Threads do not change the output, so they stay out of cache keys.
+    assert "threads" not in fast.cache_params()
+
+    tuned = resolve_profile("accurate", beam_size=5, temperature="0, 0.5")
+    assert tuned.decode_options() == {"beam_size": 5, "temperature": (0.0, 0.5)}
+
+    with pytest.raises(ValueError):
+        resolve_profile("turbo")
+    with pytest.raises(ValueError):
+        resolve_profile("fast", patience=2.0)
+
+
+def test_transcriber_applies_profile(tmp_path):
+    model = FakeModel()
+    registry = FakeRegistry(model)
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    default = Transcriber("tiny", cache=cache, registry=registry).transcribe(audio)
+    assert model.options == [{}] and registry.requests == ["tiny"]
+    assert "tokens" not in default["segments"][0]
+
+    Transcriber("tiny", cache=cache, registry=registry, profile=resolve_profile("balanced")).transcribe(audio)
+    assert model.options[-1] == {"temperature": (0.0, 0.4, 0.8), "fp16": False}
+    assert registry.requests[-1] == "tiny-int8"
+
+    # Each profile has its own cache entries; repeating one hits the cache.
+    Transcriber("tiny", cache=cache, registry=registry).transcribe(audio)
+    assert len(model.options) == 2
+
+
+def test_word_error_rate():
+    assert word_error_rate("Hello, world!", "hello world") == 0.0
+    assert word_error_rate("the quick brown fox", "the quick fox") == 0.25
+    assert word_error_rate("the quick brown fox", "a quick brown fox jumps") == 0.5
+    assert word_error_rate("", "") == 0.0